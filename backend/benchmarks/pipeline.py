@@ -0,0 +1,143 @@
+import argparse
+import asyncio
+import time
+from typing import Awaitable, Callable
+
+import psycopg
+
+LOOKUP_SQL = 'SELECT "book_id" FROM "bench_book" WHERE "name" = %s'
+TEMPORARY_TABLE_SQL = '''
+    CREATE TEMPORARY TABLE "bench_import"(
+        "line" BIGINT NOT NULL,
+        "spelling" TEXT NOT NULL
+    ) ON COMMIT DROP
+'''
+READ_SQL = 'SELECT "book_id", "name" FROM "bench_book" WHERE "book_id" = %s'
+
+
+async def forward(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, delay: float):
+    queue: asyncio.Queue[tuple[float, bytes]] = asyncio.Queue()
+
+    async def deliver():
+        while True:
+            deadline, data = await queue.get()
+            if not data:
+                break
+            await asyncio.sleep(max(0.0, deadline - time.monotonic()))
+            writer.write(data)
+            await writer.drain()
+        writer.close()
+
+    deliver_task = asyncio.create_task(deliver())
+    while True:
+        data = await reader.read(65536)
+        queue.put_nowait((time.monotonic() + delay, data))
+        if not data:
+            break
+    await deliver_task
+
+
+async def start_proxy(upstream: str, delay: float, connections: set[asyncio.Task]):
+    async def handle(client_reader: asyncio.StreamReader, client_writer: asyncio.StreamWriter):
+        task = asyncio.current_task()
+        assert task is not None
+        connections.add(task)
+        if upstream.startswith('/'):
+            server_reader, server_writer = await asyncio.open_unix_connection(upstream)
+        else:
+            host, port = upstream.rsplit(':', 1)
+            server_reader, server_writer = await asyncio.open_connection(host, int(port))
+        await asyncio.gather(
+            forward(client_reader, server_writer, delay),
+            forward(server_reader, client_writer, delay),
+            return_exceptions=True,
+        )
+
+    return await asyncio.start_server(handle, '127.0.0.1', 0)
+
+
+async def import_header_serial(conn: psycopg.AsyncConnection):
+    async with conn.cursor() as cur:
+        await cur.execute(LOOKUP_SQL, ['book_1'], prepare=True)
+        await cur.fetchone()
+        await cur.execute(TEMPORARY_TABLE_SQL)
+    await conn.commit()
+
+
+async def import_header_pipeline(conn: psycopg.AsyncConnection):
+    async with conn.cursor() as cur:
+        async with conn.pipeline():
+            await cur.execute(LOOKUP_SQL, ['book_1'], prepare=True)
+            await conn.execute(TEMPORARY_TABLE_SQL)
+        await cur.fetchone()
+    await conn.commit()
+
+
+async def reads_serial(conn: psycopg.AsyncConnection, count: int):
+    async with conn.cursor() as cur:
+        for book_id in range(1, count + 1):
+            await cur.execute(READ_SQL, [book_id], prepare=True)
+            await cur.fetchone()
+    await conn.commit()
+
+
+async def reads_pipeline(conn: psycopg.AsyncConnection, count: int):
+    cursors = [conn.cursor() for _ in range(count)]
+    async with conn.pipeline():
+        for book_id, cur in enumerate(cursors, 1):
+            await cur.execute(READ_SQL, [book_id], prepare=True)
+    for cur in cursors:
+        await cur.fetchone()
+        await cur.close()
+    await conn.commit()
+
+
+async def measure(title: str, run: Callable[[], Awaitable[None]], iterations: int):
+    await run()
+    start_time = time.perf_counter()
+    for _ in range(iterations):
+        await run()
+    elapsed_seconds = time.perf_counter() - start_time
+    print(f'  {title:<40}{elapsed_seconds / iterations * 1000:10.2f}ms', flush=True)
+
+
+async def benchmark(args: argparse.Namespace):
+    connections: set[asyncio.Task] = set()
+    proxy = await start_proxy(args.upstream, args.latency / 1000, connections)
+    port = proxy.sockets[0].getsockname()[1]
+    conninfo = f'host=127.0.0.1 port={port} dbname={args.dbname} user={args.user} password={args.password}'
+    async with await psycopg.AsyncConnection.connect(conninfo) as conn:
+        await conn.execute('DROP TABLE IF EXISTS "bench_book"')
+        await conn.execute('CREATE TABLE "bench_book"("book_id" BIGINT PRIMARY KEY, "name" TEXT UNIQUE NOT NULL)')
+        await conn.execute(
+            'INSERT INTO "bench_book" SELECT i, \'book_\' || i FROM generate_series(1, %s) AS i',
+            [max(args.reads, 1)],
+        )
+        await conn.commit()
+        print(f'one-way latency {args.latency}ms:', flush=True)
+        await measure('import header, serial', lambda: import_header_serial(conn), args.iterations)
+        await measure('import header, pipeline', lambda: import_header_pipeline(conn), args.iterations)
+        await measure(f'{args.reads} point reads, serial', lambda: reads_serial(conn, args.reads), args.iterations)
+        await measure(f'{args.reads} point reads, pipeline', lambda: reads_pipeline(conn, args.reads), args.iterations)
+        await conn.execute('DROP TABLE "bench_book"')
+        await conn.commit()
+    await asyncio.wait(connections)
+    proxy.close()
+    await proxy.wait_closed()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare serial statements with pipeline mode behind a slow link.')
+    parser.add_argument('--upstream', default='localhost:5432', help='host:port or unix socket path of postgres')
+    parser.add_argument('--dbname', default='postgres')
+    parser.add_argument('--user', default='postgres')
+    parser.add_argument('--password', default='postgres')
+    parser.add_argument('--latency', type=float, default=5.0, help='injected one-way latency in milliseconds')
+    parser.add_argument('--reads', type=int, default=5)
+    parser.add_argument('--iterations', type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(benchmark(args))
+
+
+if __name__ == '__main__':
+    main()
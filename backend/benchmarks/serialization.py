@@ -0,0 +1,54 @@
+import argparse
+import time
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from new_project_backend.db.book import BookCatalog
+from new_project_backend.model.book import Book
+from new_project_backend.model.word import Word, WordRecord
+
+WORD_COLUMNS = ('book_id', 'word_id', 'spelling', 'translation')
+
+
+def measure(title: str, requests: int, run):
+    start_time = time.perf_counter()
+    for _ in range(requests):
+        body = run()
+    elapsed_seconds = time.perf_counter() - start_time
+    print(f'  {title:<40}{elapsed_seconds / requests * 1e3:10.3f}ms/request{len(body):>12} bytes', flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare response serialization paths for word lists and books.')
+    parser.add_argument('--words', type=int, default=10000)
+    parser.add_argument('--books', type=int, default=1000)
+    parser.add_argument('--requests', type=int, default=20)
+    args = parser.parse_args()
+    word_rows = [(1, i, f'spelling_{i}', f'translation of word {i}') for i in range(1, args.words + 1)]
+    books = [
+        Book(book_id=i, name=f'book_{i}', description=f'description of book {i}', words_count=i, revision=i)
+        for i in range(1, args.books + 1)
+    ]
+
+    print(f'/api/words/{{book_name}} with {args.words} words:')
+    measure(
+        'before: pydantic rows, json encoder',
+        args.requests,
+        lambda: JSONResponse(jsonable_encoder([Word(**dict(zip(WORD_COLUMNS, row))) for row in word_rows])).body,
+    )
+    measure(
+        'after: slots records, orjson',
+        args.requests,
+        lambda: ORJSONResponse([WordRecord(*row) for row in word_rows]).body,
+    )
+
+    print(f'/api/books with {args.books} books:')
+    measure('before: pydantic rows, json encoder', args.requests, lambda: JSONResponse(jsonable_encoder(books)).body)
+    measure('after: encode catalog once, orjson', args.requests, lambda: BookCatalog(books).content)
+    catalog = BookCatalog(books)
+    measure('after: cached catalog bytes', args.requests, lambda: catalog.content)
+
+
+if __name__ == '__main__':
+    main()
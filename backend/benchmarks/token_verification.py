@@ -0,0 +1,64 @@
+import argparse
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import jwt
+from cryptography.hazmat.primitives import serialization as crypto_serialization
+from cryptography.hazmat.primitives.asymmetric.ed448 import Ed448PrivateKey
+
+from new_project_backend.utils import jwt as token_utils
+from new_project_backend.utils.key import KeySet
+
+
+def measure(title: str, requests: int, run):
+    start_time = time.perf_counter()
+    for _ in range(requests):
+        run()
+    elapsed_seconds = time.perf_counter() - start_time
+    print(f'  {title:<40}{elapsed_seconds / requests * 1e6:10.1f}us/request', flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare per-request access token verification costs.')
+    parser.add_argument('--requests', type=int, default=5000)
+    args = parser.parse_args()
+    payload = {
+        'sub': '1',
+        'exp': datetime.utcnow() + timedelta(seconds=600),
+    }
+
+    pem = (
+        Ed448PrivateKey.generate()
+        .private_bytes(
+            encoding=crypto_serialization.Encoding.PEM,
+            format=crypto_serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=crypto_serialization.NoEncryption(),
+        )
+        .decode()
+    )
+    ed448_token = jwt.encode(payload, pem, 'EdDSA')
+
+    with tempfile.TemporaryDirectory() as directory:
+        key_set = KeySet(str(Path(directory) / 'jwks.json'), 60)
+        key_set.initialize()
+        token_utils.key_set = key_set
+        token = token_utils.create_token(1, 600)
+        _, signing_key = key_set.get_signing_key()
+        verifying_key = signing_key.public_key()
+
+        print('before:')
+        measure('ed448, pem string per request', args.requests, lambda: jwt.decode(ed448_token, pem, ['EdDSA']))
+        print('after:')
+        measure('ed25519, parsed key', args.requests, lambda: jwt.decode(token, verifying_key, ['EdDSA']))
+        measure(
+            'ed25519, key set lookup by kid',
+            args.requests,
+            lambda: token_utils.decode_token(token, ['sub', 'exp']),
+        )
+        measure('verified-token cache hit', args.requests, lambda: token_utils.get_user_id_from_token(token))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+import argparse
+import time
+
+import psycopg
+
+TABLES_SQL = '''
+    CREATE TABLE "book"(
+        "book_id" BIGSERIAL PRIMARY KEY,
+        "name" TEXT UNIQUE NOT NULL
+    );
+
+    CREATE TABLE "word"(
+        "book_id" BIGINT NOT NULL REFERENCES "book"("book_id") ON DELETE CASCADE,
+        "word_id" BIGINT NOT NULL,
+        "spelling" TEXT NOT NULL,
+        PRIMARY KEY ("book_id", "word_id")
+    );
+'''
+
+SEQUENCE_SQL = '''
+    CREATE FUNCTION "make_book_seq"()
+    RETURNS TRIGGER
+    LANGUAGE PLPGSQL
+    AS $$
+    BEGIN
+        EXECUTE 'CREATE SEQUENCE IF NOT EXISTS "book_seq_' || NEW.book_id || '" '
+             || 'OWNED BY "book"."book_id"';
+        return NEW;
+    END
+    $$;
+
+    CREATE TRIGGER "make_book_seq"
+    AFTER INSERT ON "book"
+    FOR EACH ROW EXECUTE PROCEDURE "make_book_seq"();
+
+    CREATE FUNCTION "fill_in_word_seq"()
+    RETURNS TRIGGER
+    LANGUAGE PLPGSQL
+    AS $$
+    BEGIN
+        NEW."word_id" := nextval('"book_seq_' || NEW.book_id || '"');
+        RETURN NEW;
+    END
+    $$;
+
+    CREATE TRIGGER "fill_in_word_seq"
+    BEFORE INSERT ON "word"
+    FOR EACH ROW EXECUTE PROCEDURE "fill_in_word_seq"();
+'''
+
+COUNTER_SQL = '''
+    CREATE TABLE "word_counter"(
+        "book_id" BIGINT PRIMARY KEY REFERENCES "book"("book_id") ON DELETE CASCADE,
+        "last_word_id" BIGINT NOT NULL DEFAULT 0
+    );
+
+    CREATE FUNCTION "fill_in_word_id"()
+    RETURNS TRIGGER
+    LANGUAGE PLPGSQL
+    AS $$
+    BEGIN
+        IF NEW."word_id" IS NULL THEN
+            INSERT INTO "word_counter"("book_id", "last_word_id")
+            VALUES (NEW."book_id", 1)
+            ON CONFLICT ("book_id") DO UPDATE
+            SET "last_word_id" = "word_counter"."last_word_id" + 1
+            RETURNING "last_word_id" INTO NEW."word_id";
+        END IF;
+        RETURN NEW;
+    END
+    $$;
+
+    CREATE TRIGGER "fill_in_word_id"
+    BEFORE INSERT ON "word"
+    FOR EACH ROW EXECUTE PROCEDURE "fill_in_word_id"();
+'''
+
+SCHEMES = {
+    'sequence': SEQUENCE_SQL,
+    'counter': COUNTER_SQL,
+}
+
+
+def measure(title: str, run):
+    start_time = time.perf_counter()
+    run()
+    elapsed_seconds = time.perf_counter() - start_time
+    print(f'  {title:<32}{elapsed_seconds:10.3f}s', flush=True)
+
+
+def count_relations(conn: psycopg.Connection, schema: str):
+    relations = conn.execute(
+        'SELECT COUNT(*) FROM "pg_class" WHERE "relnamespace" = %s::regnamespace', [schema]
+    ).fetchone()
+    assert relations is not None
+    return relations[0]
+
+
+def drop_schema(conn: psycopg.Connection, schema: str):
+    while sequences := conn.execute(
+        'SELECT "sequencename" FROM "pg_sequences" WHERE "schemaname" = %s AND "sequencename" ~ %s LIMIT 1000',
+        [schema, '^book_seq_[0-9]+$'],
+    ).fetchall():
+        names = ', '.join(f'"{schema}"."{name}"' for name, in sequences)
+        conn.execute(f'DROP SEQUENCE {names}')
+    conn.execute(f'DROP SCHEMA IF EXISTS "{schema}" CASCADE')
+
+
+def benchmark(conn: psycopg.Connection, scheme: str, books: int, words: int):
+    schema = f'bench_{scheme}'
+    drop_schema(conn, schema)
+    conn.execute(f'CREATE SCHEMA "{schema}"')
+    conn.execute(f'SET search_path TO "{schema}"')
+    conn.execute(TABLES_SQL)
+    conn.execute(SCHEMES[scheme])
+    print(f'{scheme}:', flush=True)
+
+    def insert_books():
+        for start in range(0, books, 1000):
+            conn.execute(
+                'INSERT INTO "book"("name") SELECT \'book_\' || i FROM generate_series(%s::BIGINT, %s::BIGINT) AS i',
+                [start + 1, min(start + 1000, books)],
+            )
+
+    measure(f'insert {books} books', insert_books)
+
+    def insert_words():
+        with conn.cursor() as cur:
+            for i in range(words):
+                cur.execute(
+                    'INSERT INTO "word"("book_id", "spelling") VALUES (%s, %s)',
+                    [i * 7919 % books + 1, f'word_{i}'],
+                    prepare=True,
+                )
+
+    measure(f'insert {words} words one by one', insert_words)
+    measure(
+        'scan pg_class 100 times',
+        lambda: [
+            conn.execute('SELECT COUNT(*) FROM "pg_class" WHERE "relname" LIKE \'word%\'').fetchone()
+            for _ in range(100)
+        ],
+    )
+    catalog_size = conn.execute("SELECT pg_size_pretty(pg_total_relation_size('pg_class'))").fetchone()
+    assert catalog_size is not None
+    print(f'  {"relations in schema":<32}{count_relations(conn, schema):>10}')
+    print(f'  {"pg_class size":<32}{catalog_size[0]:>10}')
+
+    def delete_books():
+        for start in range(0, books, 1000):
+            conn.execute(
+                'DELETE FROM "book" WHERE "book_id" BETWEEN %s AND %s',
+                [start + 1, min(start + 1000, books)],
+            )
+
+    measure(f'delete {books} books', delete_books)
+    print(f'  {"relations left after delete":<32}{count_relations(conn, schema):>10}')
+    drop_schema(conn, schema)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare per-book sequences with per-book counter rows.')
+    parser.add_argument('--conninfo', default='host=localhost dbname=postgres user=postgres password=postgres')
+    parser.add_argument('--books', type=int, default=100000)
+    parser.add_argument('--words', type=int, default=20000)
+    parser.add_argument('--scheme', choices=[*SCHEMES, 'all'], default='all')
+    args = parser.parse_args()
+    with psycopg.connect(args.conninfo, autocommit=True) as conn:
+        for scheme in SCHEMES if args.scheme == 'all' else [args.scheme]:
+            benchmark(conn, scheme, args.books, args.words)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,14 +1,27 @@
 import os
 import shutil
+import socket
+import stat
 import subprocess
 import time
 from multiprocessing import Process
+from pathlib import Path
 from typing import Any, Callable
 
 import uvicorn  # type: ignore
 from watchdog.events import RegexMatchingEventHandler  # type: ignore
 from watchdog.observers import Observer  # type: ignore
 
+from new_project_backend.config import (
+    KEY_SET_MAX_KEYS,
+    KEY_SET_PATH,
+    SERVER_GRACEFUL_TIMEOUT,
+    SERVER_HOST,
+    SERVER_PORT,
+    SERVER_UDS,
+)
+from new_project_backend.utils.key import rotate_jwks
+
 
 class Task:
     class _EventHandler(RegexMatchingEventHandler):
@@ -138,5 +151,47 @@ def start():
         print_empty_line()
 
 
+def remove_stale_socket(path: str):
+    try:
+        if not stat.S_ISSOCK(os.stat(path).st_mode):
+            return
+    except FileNotFoundError:
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(path)
+        except ConnectionRefusedError:
+            os.unlink(path)
+
+
+def serve():
+    workers = int(os.environ.get('SERVER_WORKERS') or os.cpu_count() or 1)
+    os.environ['SERVER_WORKERS'] = str(workers)
+    if SERVER_UDS is not None:
+        remove_stale_socket(SERVER_UDS)
+    print_title('uvicorn')
+    try:
+        uvicorn.run(
+            'new_project_backend.app:app',
+            host=SERVER_HOST,
+            port=SERVER_PORT,
+            uds=SERVER_UDS,
+            workers=workers,
+            loop='uvloop',
+            http='httptools',
+            proxy_headers=True,
+            access_log=False,
+            timeout_graceful_shutdown=SERVER_GRACEFUL_TIMEOUT,
+        )
+    finally:
+        print_horizontal()
+        print_empty_line()
+
+
 def watch():
     Task(lint, start, SOURCE_DIR, ignore_regexes=['.*__pycache__.*'], recursive=True).start()
+
+
+def rotate_key():
+    kid = rotate_jwks(Path(KEY_SET_PATH), KEY_SET_MAX_KEYS)
+    print(f'Signing with {kid}', flush=True)
@@ -1,9 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import secrets
+
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from fastapi.security import OAuth2PasswordRequestFormStrict
 
+from ..config import (
+    ACCESS_TOKEN_EXPIRATION,
+    PASSWORD_HASHER_RETRY_AFTER,
+    REFRESH_TOKEN_EXPIRATION,
+)
 from ..db.errors import NotExistsError
+from ..db.refresh_token import refresh_token_db
 from ..db.user import WrongPasswordError, user_db
-from ..utils.jwt import InvalidTokenError, create_token, get_user_id_from_token
+from ..model.token import RefreshingToken, Token
+from ..utils.jwt import (
+    InvalidTokenError,
+    create_refresh_token,
+    create_token,
+    get_user_id_and_token_id_from_refresh_token,
+    get_user_id_from_token,
+)
+from ..utils.key import key_set
+from ..utils.password import PasswordHasherBusyError
 from .deps import oauth2_password_bearer
 
 auth_router = APIRouter()
@@ -12,7 +29,7 @@ auth_router = APIRouter()
 async def get_current_user(token: str = Depends(oauth2_password_bearer)):
     try:
         user_id = get_user_id_from_token(token)
-        user = await user_db.query_by_user_id(user_id)
+        user = await user_db.query_cached_by_user_id(user_id)
         return user
     except (InvalidTokenError, NotExistsError) as error:
         raise HTTPException(
@@ -33,15 +50,64 @@ async def get_current_user_and_require_admin(token: str = Depends(oauth2_passwor
     return user
 
 
+def create_token_response(user_id: int, token_id: str):
+    return Token(
+        access_token=create_token(user_id, ACCESS_TOKEN_EXPIRATION),
+        expires_in=ACCESS_TOKEN_EXPIRATION,
+        refresh_token=create_refresh_token(user_id, token_id, REFRESH_TOKEN_EXPIRATION),
+    )
+
+
 @auth_router.post('/token')
 async def login(form: OAuth2PasswordRequestFormStrict = Depends()):
     try:
         user = await user_db.verify_name_and_password(form.username, form.password)
-        token = create_token(user.user_id, 600)
-        return {'access_token': token, 'token_type': 'bearer'}
+        refresh_token = await refresh_token_db.insert(secrets.token_urlsafe(32), user.user_id, REFRESH_TOKEN_EXPIRATION)
+        return create_token_response(user.user_id, refresh_token.token_id)
     except (NotExistsError, WrongPasswordError) as error:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail='Incorrect user or password',
             headers={'WWW-Authenticate': 'Bearer'},
         ) from error
+    except PasswordHasherBusyError as error:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail='Too many password checks',
+            headers={'Retry-After': str(PASSWORD_HASHER_RETRY_AFTER)},
+        ) from error
+
+
+@auth_router.post('/token/refresh')
+async def refresh(refreshing_token: RefreshingToken):
+    try:
+        user_id, token_id = get_user_id_and_token_id_from_refresh_token(refreshing_token.refresh_token)
+        refresh_token = await refresh_token_db.rotate_by_token_id_and_user_id(
+            token_id, user_id, secrets.token_urlsafe(32), REFRESH_TOKEN_EXPIRATION
+        )
+        return create_token_response(user_id, refresh_token.token_id)
+    except (InvalidTokenError, NotExistsError) as error:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail='Invalid refresh token',
+            headers={'WWW-Authenticate': 'Bearer'},
+        ) from error
+
+
+@auth_router.post('/token/revoke')
+async def revoke(refreshing_token: RefreshingToken):
+    try:
+        user_id, token_id = get_user_id_and_token_id_from_refresh_token(refreshing_token.refresh_token)
+        await refresh_token_db.revoke_by_token_id_and_user_id(token_id, user_id)
+        return Response(status_code=status.HTTP_204_NO_CONTENT)
+    except InvalidTokenError as error:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail='Invalid refresh token',
+            headers={'WWW-Authenticate': 'Bearer'},
+        ) from error
+
+
+@auth_router.get('/jwks')
+async def query_jwks():
+    return key_set.get_public_jwks()
@@ -1,24 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 
 from ..db.book import book_db
 from ..db.errors import DuplicateRecordError, NotExistsError
 from ..model.book import AddingBook, EditingBook
 from ..model.user import User
 from .auth import get_current_user, get_current_user_and_require_admin
+from .etag import check_etag, make_etag
 
 book_router = APIRouter()
 
 
 @book_router.get('/books')
-async def query_books(_: User = Depends(get_current_user)):
-    books = await book_db.query()
-    return books
+async def query_books(request: Request, response: Response, _: User = Depends(get_current_user)):
+    books_count, revision = await book_db.query_cached_revision()
+    not_modified = check_etag(request, response, make_etag('books', books_count, revision))
+    if not_modified is not None:
+        return not_modified
+    content = await book_db.query_cached_content()
+    return Response(content, media_type='application/json', headers=dict(response.headers))
 
 
 @book_router.get('/book/{book_name}')
-async def query_book(book_name: str, _: User = Depends(get_current_user)):
+async def query_book(book_name: str, request: Request, response: Response, _: User = Depends(get_current_user)):
     try:
-        book = await book_db.query_by_name(book_name)
+        book = await book_db.query_cached_by_name(book_name)
+        not_modified = check_etag(request, response, make_etag('book', book.book_id, book.revision))
+        if not_modified is not None:
+            return not_modified
         return book
     except NotExistsError as error:
         raise HTTPException(
@@ -28,9 +36,12 @@ async def query_book(book_name: str, _: User = Depends(get_current_user)):
 
 
 @book_router.get('/book-by-id/{book_id}')
-async def query_book_by_id(book_id: int, _: User = Depends(get_current_user)):
+async def query_book_by_id(book_id: int, request: Request, response: Response, _: User = Depends(get_current_user)):
     try:
-        book = await book_db.query_by_book_id(book_id)
+        book = await book_db.query_cached_by_book_id(book_id)
+        not_modified = check_etag(request, response, make_etag('book', book.book_id, book.revision))
+        if not_modified is not None:
+            return not_modified
         return book
     except NotExistsError as error:
         raise HTTPException(
@@ -1,26 +1,46 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
 
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+
+from ..config import (
+    DAILY_PLAN_REVIEWS_MAX_COUNT,
+    DAILY_PLAN_WORDS_COUNT,
+    DAILY_PLAN_WORDS_MAX_COUNT,
+)
+from ..db.book import book_db
 from ..db.daily_plan import daily_plan_db
 from ..db.errors import DuplicateRecordError, NotExistsError
 from ..db.word import word_db
-from ..model.daily_plan import AddingDailyPlan, EditingDailyPlan
+from ..model.daily_plan import AddingDailyPlan, DailyPlanReview, EditingDailyPlan
 from ..model.user import User
 from ..model.word import WordResponce
 from .auth import get_current_user
+from .etag import check_etag, make_etag
 
 daily_plan_router = APIRouter()
 
 
 @daily_plan_router.get('/daily-plans')
-async def query_daily_plans(user: User = Depends(get_current_user)):
+async def query_daily_plans(request: Request, response: Response, user: User = Depends(get_current_user)):
+    daily_plans_count, revision = await daily_plan_db.query_revision_by_user_id(user.user_id)
+    not_modified = check_etag(request, response, make_etag('daily-plans', user.user_id, daily_plans_count, revision))
+    if not_modified is not None:
+        return not_modified
     daily_plans = await daily_plan_db.query_by_user_id(user.user_id)
     return daily_plans
 
 
 @daily_plan_router.get('/daily-plan/{book_name}')
-async def query_daily_plan(book_name: str, user: User = Depends(get_current_user)):
+async def query_daily_plan(
+    book_name: str, request: Request, response: Response, user: User = Depends(get_current_user)
+):
     try:
-        daily_plan = await daily_plan_db.query_by_user_id_and_book_name(user.user_id, book_name)
+        book = await book_db.query_cached_by_name(book_name)
+        revision = await daily_plan_db.query_revision_by_user_id_and_book_id(user.user_id, book.book_id)
+        not_modified = check_etag(request, response, make_etag('daily-plan', user.user_id, book.book_id, revision))
+        if not_modified is not None:
+            return not_modified
+        daily_plan = await daily_plan_db.query_by_user_id_and_book_id(user.user_id, book.book_id)
         return daily_plan
     except NotExistsError as error:
         raise HTTPException(
@@ -76,10 +96,19 @@ async def delete_daily_plan(book_name: str, user: User = Depends(get_current_use
 
 
 @daily_plan_router.get('/daily-plan/{book_name}/word')
-async def query_daily_plan_word(book_name: str, user: User = Depends(get_current_user)):
+async def query_daily_plan_word(
+    book_name: str, request: Request, response: Response, user: User = Depends(get_current_user)
+):
     try:
-        daily_plan = await daily_plan_db.query_by_user_id_and_book_name(user.user_id, book_name)
-        word = await word_db.query_by_book_name_and_order(book_name, daily_plan.progress)
+        book = await book_db.query_cached_by_name(book_name)
+        revision = await daily_plan_db.query_revision_by_user_id_and_book_id(user.user_id, book.book_id)
+        book_revision = await book_db.query_revision_by_book_id(book.book_id)
+        etag = make_etag('daily-plan-word', user.user_id, book.book_id, revision, book_revision)
+        not_modified = check_etag(request, response, etag)
+        if not_modified is not None:
+            return not_modified
+        daily_plan = await daily_plan_db.query_by_user_id_and_book_id(user.user_id, book.book_id)
+        word = await word_db.query_next_by_book_id_and_word_id(daily_plan.book_id, daily_plan.last_word_id)
         if not daily_plan.is_submitted:
             return WordResponce(
                 is_submitted=False,
@@ -99,10 +128,90 @@ async def query_daily_plan_word(book_name: str, user: User = Depends(get_current
         ) from error
 
 
+@daily_plan_router.get('/daily-plan/{book_name}/words')
+async def query_daily_plan_words(
+    book_name: str,
+    request: Request,
+    response: Response,
+    count: int = Query(DAILY_PLAN_WORDS_COUNT, ge=1, le=DAILY_PLAN_WORDS_MAX_COUNT),
+    user: User = Depends(get_current_user),
+):
+    try:
+        book = await book_db.query_cached_by_name(book_name)
+        revision = await daily_plan_db.query_revision_by_user_id_and_book_id(user.user_id, book.book_id)
+        book_revision = await book_db.query_revision_by_book_id(book.book_id)
+        etag = make_etag('daily-plan-words', user.user_id, book.book_id, count, revision, book_revision)
+        not_modified = check_etag(request, response, etag)
+        if not_modified is not None:
+            return not_modified
+        daily_plan, words = await daily_plan_db.query_next_words_by_user_id_and_book_id(
+            user.user_id, book.book_id, count
+        )
+        return [
+            WordResponce(
+                is_submitted=daily_plan.is_submitted and index == 0,
+                book_id=word.book_id,
+                word_id=word.word_id,
+                spelling=word.spelling,
+                translation=word.translation if daily_plan.is_submitted and index == 0 else None,
+            )
+            for index, word in enumerate(words)
+        ]
+    except NotExistsError as error:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f'Incorrect {error.name}',
+        ) from error
+
+
 @daily_plan_router.post('/daily-plan/{book_name}/word')
-async def submit_daily_plan_word(book_name: str, user: User = Depends(get_current_user)):
+async def submit_daily_plan_word(
+    book_name: str,
+    sequence: Optional[int] = Query(None, ge=1),
+    grade: Optional[int] = Query(None, ge=0, le=5),
+    user: User = Depends(get_current_user),
+):
     try:
-        await daily_plan_db.update_progress_by_user_id_and_book_name(user.user_id, book_name)
+        book = await book_db.query_cached_by_name(book_name)
+        daily_plan, word = await daily_plan_db.update_progress_and_query_next_word_by_user_id_and_book_id(
+            user.user_id, book.book_id, sequence, grade
+        )
+        if word is None:
+            return None
+        if not daily_plan.is_submitted:
+            return WordResponce(
+                is_submitted=False,
+                book_id=word.book_id,
+                word_id=word.word_id,
+                spelling=word.spelling,
+            )
+        return WordResponce(
+            is_submitted=True,
+            book_id=word.book_id,
+            word_id=word.word_id,
+            spelling=word.spelling,
+            translation=word.translation,
+        )
+    except NotExistsError as error:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f'Incorrect {error.name}',
+        ) from error
+
+
+@daily_plan_router.post('/daily-plan/{book_name}/reviews')
+async def submit_daily_plan_reviews(
+    book_name: str, reviews: list[DailyPlanReview], user: User = Depends(get_current_user)
+):
+    if len(reviews) > DAILY_PLAN_REVIEWS_MAX_COUNT:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail='Too many reviews',
+        )
+    try:
+        book = await book_db.query_cached_by_name(book_name)
+        daily_plan = await daily_plan_db.review_by_user_id_and_book_id(user.user_id, book.book_id, reviews)
+        return daily_plan
     except NotExistsError as error:
         raise HTTPException(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
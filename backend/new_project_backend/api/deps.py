@@ -1,3 +1,19 @@
 from fastapi.security import OAuth2PasswordBearer
 
+from ..db.connection import RequestConnection, connection_pool, request_connection
+
 oauth2_password_bearer = OAuth2PasswordBearer(tokenUrl='api/token')
+
+
+async def use_request_connection():
+    shared_connection = RequestConnection(connection_pool)
+    token = request_connection.set(shared_connection)
+    try:
+        yield shared_connection
+    except BaseException as error:
+        await shared_connection.close(error)
+        raise
+    else:
+        await shared_connection.close()
+    finally:
+        request_connection.reset(token)
@@ -0,0 +1,24 @@
+from typing import Optional
+
+from fastapi import Request, Response, status
+
+CACHE_CONTROL = 'private, no-cache'
+
+
+def make_etag(*parts):
+    return f'"{"-".join(map(str, parts))}"'
+
+
+def match_etag(if_none_match: Optional[str], etag: str):
+    if if_none_match is None:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in tags or any(tag.removeprefix('W/') == etag for tag in tags)
+
+
+def check_etag(request: Request, response: Response, etag: str):
+    headers = {'ETag': etag, 'Cache-Control': CACHE_CONTROL}
+    response.headers.update(headers)
+    if not match_etag(request.headers.get('If-None-Match'), etag):
+        return None
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
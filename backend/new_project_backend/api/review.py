@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from ..config import REVIEW_DUE_COUNT, REVIEW_DUE_MAX_COUNT, REVIEWS_MAX_COUNT
+from ..db.review_schedule import review_schedule_db
+from ..model.review import Review
+from ..model.user import User
+from .auth import get_current_user
+
+review_router = APIRouter()
+
+
+@review_router.get('/reviews/due')
+async def query_due_reviews(
+    count: int = Query(REVIEW_DUE_COUNT, ge=1, le=REVIEW_DUE_MAX_COUNT), user: User = Depends(get_current_user)
+):
+    due_words = await review_schedule_db.query_due_by_user_id(user.user_id, count)
+    return due_words
+
+
+@review_router.post('/reviews')
+async def submit_reviews(reviews: list[Review], user: User = Depends(get_current_user)):
+    if len(reviews) > REVIEWS_MAX_COUNT:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail='Too many reviews',
+        )
+    review_schedules = await review_schedule_db.review_by_user_id(user.user_id, reviews)
+    return review_schedules
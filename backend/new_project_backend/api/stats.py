@@ -0,0 +1,48 @@
+from fastapi import APIRouter, Depends
+
+from ..db.book import book_db
+from ..db.connection import connection_pool
+from ..db.single_flight import single_flight
+from ..db.statement import statement_registry
+from ..db.user import user_db
+from ..db.word import word_db
+from ..model.user import User
+from ..utils.jwt import token_cache
+from ..utils.password import password_hasher_pool
+from .auth import get_current_user_and_require_admin
+
+stats_router = APIRouter()
+
+
+@stats_router.get('/stats/statements')
+async def query_statement_stats(_: User = Depends(get_current_user_and_require_admin)):
+    return statement_registry.stats()
+
+
+@stats_router.get('/stats/caches')
+async def query_cache_stats(_: User = Depends(get_current_user_and_require_admin)):
+    return {
+        'user': user_db.cache_stats(),
+        'book': book_db.cache_stats(),
+        'token': token_cache.stats(),
+    }
+
+
+@stats_router.get('/stats/password-hasher')
+async def query_password_hasher_stats(_: User = Depends(get_current_user_and_require_admin)):
+    return password_hasher_pool.stats()
+
+
+@stats_router.get('/stats/connection-pool')
+async def query_connection_pool_stats(_: User = Depends(get_current_user_and_require_admin)):
+    return connection_pool.stats()
+
+
+@stats_router.get('/stats/single-flight')
+async def query_single_flight_stats(_: User = Depends(get_current_user_and_require_admin)):
+    return single_flight.stats()
+
+
+@stats_router.get('/stats/batch-loaders')
+async def query_batch_loader_stats(_: User = Depends(get_current_user_and_require_admin)):
+    return word_db.loader_stats()
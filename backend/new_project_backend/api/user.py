@@ -1,8 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 
+from ..config import PASSWORD_HASHER_RETRY_AFTER
 from ..db.errors import DuplicateRecordError, NotExistsError
+from ..db.refresh_token import refresh_token_db
 from ..db.user import user_db
 from ..model.user import AddingUser, EditingUser, User, UserNoPassword
+from ..utils.password import PasswordHasherBusyError
 from .auth import get_current_user
 
 user_router = APIRouter()
@@ -23,12 +26,20 @@ async def add_user(adding_user: AddingUser):
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             detail='Duplicate records',
         ) from error
+    except PasswordHasherBusyError as error:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail='Too many password checks',
+            headers={'Retry-After': str(PASSWORD_HASHER_RETRY_AFTER)},
+        ) from error
 
 
 @user_router.patch('/user')
 async def edit_user(editing_user: EditingUser, user: User = Depends(get_current_user)):
     try:
         new_user = await user_db.update_by_user_id(user.user_id, editing_user)
+        if editing_user.password is not None:
+            await refresh_token_db.revoke_by_user_id(user.user_id)
         return UserNoPassword.from_user(new_user)
     except DuplicateRecordError as error:
         raise HTTPException(
@@ -40,6 +51,12 @@ async def edit_user(editing_user: EditingUser, user: User = Depends(get_current_
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             detail='Incorrect user',
         ) from error
+    except PasswordHasherBusyError as error:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail='Too many password checks',
+            headers={'Retry-After': str(PASSWORD_HASHER_RETRY_AFTER)},
+        ) from error
 
 
 @user_router.delete('/user')
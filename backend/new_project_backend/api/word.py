@@ -1,30 +1,107 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import time
+from typing import Optional
 
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
+
+from ..db.book import book_db
+from ..db.connection import RequestConnection
 from ..db.errors import DuplicateRecordError, NotExistsError
 from ..db.word import word_db
 from ..model.user import User
-from ..model.word import AddingWord, EditingWord
+from ..model.word import AddingWord, EditingWord, WordFormat, WordImportResult
+from ..utils.word_format import (
+    WORD_MEDIA_TYPES,
+    WordFormatError,
+    WordReader,
+    write_words,
+)
 from .auth import get_current_user_and_require_admin
+from .deps import use_request_connection
+from .etag import check_etag, make_etag
 
 word_router = APIRouter()
 
 
 @word_router.get('/words/{book_name}')
-async def query_words(book_name: str, _: User = Depends(get_current_user_and_require_admin)):
+async def query_words(
+    book_name: str,
+    request: Request,
+    response: Response,
+    word_format: Optional[WordFormat] = Query(None, alias='format'),
+    shared_connection: RequestConnection = Depends(use_request_connection),
+    _: User = Depends(get_current_user_and_require_admin),
+):
+    try:
+        book = await book_db.query_cached_by_name(book_name)
+        revision = await book_db.query_revision_by_book_id(book.book_id)
+        etag = make_etag('words', book.book_id, revision, word_format.value if word_format is not None else 'json')
+        not_modified = check_etag(request, response, etag)
+        if not_modified is not None:
+            return not_modified
+        if word_format is not None:
+            await shared_connection.close()
+            return StreamingResponse(
+                write_words(word_db.stream_by_book_id(book.book_id), word_format),
+                media_type=WORD_MEDIA_TYPES[word_format],
+                headers=dict(response.headers),
+            )
+        words = await word_db.query_by_book_id(book.book_id)
+        return ORJSONResponse(words, headers=dict(response.headers))
+    except NotExistsError as error:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f'Incorrect {error.name}',
+        ) from error
+
+
+@word_router.post('/words/{book_name}')
+async def import_words(
+    book_name: str,
+    request: Request,
+    word_format: WordFormat = Query(WordFormat.CSV, alias='format'),
+    _: User = Depends(get_current_user_and_require_admin),
+):
+    word_reader = WordReader(request.stream(), word_format)
+    start_time = time.perf_counter()
     try:
-        words = await word_db.query_by_book_name(book_name)
-        return words
+        inserted_count = await word_db.import_by_book_name(book_name, word_reader.batches())
+        book_db.expire_cache()
     except NotExistsError as error:
         raise HTTPException(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             detail=f'Incorrect {error.name}',
         ) from error
+    except WordFormatError as error:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(error),
+        ) from error
+    elapsed_seconds = time.perf_counter() - start_time
+    return WordImportResult(
+        inserted_count=inserted_count,
+        error_count=word_reader.error_count,
+        errors=word_reader.errors,
+        elapsed_seconds=elapsed_seconds,
+        rows_per_second=inserted_count / elapsed_seconds if elapsed_seconds > 0 else 0.0,
+    )
 
 
 @word_router.get('/word/{book_name}/{word_id}')
-async def query_word(book_name: str, word_id: int, _: User = Depends(get_current_user_and_require_admin)):
+async def query_word(
+    book_name: str,
+    word_id: int,
+    request: Request,
+    response: Response,
+    _: User = Depends(get_current_user_and_require_admin),
+):
     try:
-        word = await word_db.query_by_book_name_and_word_id(book_name, word_id)
+        book = await book_db.query_cached_by_name(book_name)
+        revision = await book_db.query_revision_by_book_id(book.book_id)
+        not_modified = check_etag(request, response, make_etag('word', book.book_id, word_id, revision))
+        if not_modified is not None:
+            return not_modified
+        word = await word_db.query_by_book_id_and_word_id(book.book_id, word_id)
         return word
     except NotExistsError as error:
         raise HTTPException(
@@ -34,9 +111,20 @@ async def query_word(book_name: str, word_id: int, _: User = Depends(get_current
 
 
 @word_router.get('/word-by-order/{book_name}/{order}')
-async def query_word_by_order(book_name: str, order: int, _: User = Depends(get_current_user_and_require_admin)):
+async def query_word_by_order(
+    book_name: str,
+    order: int,
+    request: Request,
+    response: Response,
+    _: User = Depends(get_current_user_and_require_admin),
+):
     try:
-        word = await word_db.query_by_book_name_and_order(book_name, order)
+        book = await book_db.query_cached_by_name(book_name)
+        revision = await book_db.query_revision_by_book_id(book.book_id)
+        not_modified = check_etag(request, response, make_etag('word-by-order', book.book_id, order, revision))
+        if not_modified is not None:
+            return not_modified
+        word = await word_db.query_by_book_id_and_order(book.book_id, order)
         return word
     except NotExistsError as error:
         raise HTTPException(
@@ -48,7 +136,9 @@ async def query_word_by_order(book_name: str, order: int, _: User = Depends(get_
 @word_router.post('/word/{book_name}')
 async def add_word(book_name: str, adding_word: AddingWord, _: User = Depends(get_current_user_and_require_admin)):
     try:
-        word = await word_db.insert_by_book_name(book_name, adding_word)
+        book = await book_db.query_cached_by_name(book_name)
+        word = await word_db.insert_by_book_id(book.book_id, adding_word)
+        book_db.expire_cache()
         return word
     except DuplicateRecordError as error:
         raise HTTPException(
@@ -67,7 +157,8 @@ async def edit_word(
     book_name: str, word_id: int, editing_word: EditingWord, _: User = Depends(get_current_user_and_require_admin)
 ):
     try:
-        word = await word_db.update_by_book_name_and_word_id(book_name, word_id, editing_word)
+        book = await book_db.query_cached_by_name(book_name)
+        word = await word_db.update_by_book_id_and_word_id(book.book_id, word_id, editing_word)
         return word
     except DuplicateRecordError as error:
         raise HTTPException(
@@ -84,7 +175,9 @@ async def edit_word(
 @word_router.delete('/word/{book_name}/{word_id}')
 async def delete_word(book_name: str, word_id: int, _: User = Depends(get_current_user_and_require_admin)):
     try:
-        word = await word_db.delete_by_book_name_and_word_id(book_name, word_id)
+        book = await book_db.query_cached_by_name(book_name)
+        word = await word_db.delete_by_book_id_and_word_id(book.book_id, word_id)
+        book_db.expire_cache()
         return word
     except NotExistsError as error:
         raise HTTPException(
@@ -1,39 +1,47 @@
-from fastapi import FastAPI
+import asyncio
+
+from fastapi import Depends, FastAPI
 
 from .api.auth import auth_router
 from .api.book import book_router
 from .api.daily_plan import daily_plan_router
+from .api.deps import use_request_connection
+from .api.review import review_router
+from .api.stats import stats_router
 from .api.user import user_router
 from .api.word import word_router
-from .db.book import book_db
 from .db.connection import connection_pool
-from .db.daily_plan import daily_plan_db
-from .db.user import user_db
-from .db.word import word_db
-from .utils.key import private_key
+from .db.schema import schema_db
+from .job.daily_plan import run_daily_plan_rollover
+from .utils.key import key_set
+from .utils.password import password_hasher_pool
 
 app = FastAPI()
 app.include_router(auth_router, prefix='/api')
 app.include_router(user_router, prefix='/api')
-app.include_router(book_router, prefix='/api')
-app.include_router(word_router, prefix='/api')
-app.include_router(daily_plan_router, prefix='/api')
+app.include_router(book_router, prefix='/api', dependencies=[Depends(use_request_connection)])
+app.include_router(word_router, prefix='/api', dependencies=[Depends(use_request_connection)])
+app.include_router(daily_plan_router, prefix='/api', dependencies=[Depends(use_request_connection)])
+app.include_router(review_router, prefix='/api', dependencies=[Depends(use_request_connection)])
+app.include_router(stats_router, prefix='/api', dependencies=[Depends(use_request_connection)])
+
+background_tasks: set[asyncio.Task] = set()
 
 
 @app.on_event('startup')
 async def startup():
     await connection_pool.open()
-    # await daily_plan_db.drop()
-    # await word_db.drop()
-    # await book_db.drop()
-    # await user_db.drop()
-    await user_db.create()
-    await book_db.create()
-    await word_db.create()
-    await daily_plan_db.create()
-    private_key.initialize()
+    # await schema_db.drop()
+    await schema_db.migrate()
+    key_set.initialize()
+    background_tasks.add(asyncio.create_task(run_daily_plan_rollover()))
 
 
 @app.on_event('shutdown')
 async def shutdown():
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    background_tasks.clear()
     await connection_pool.close()
+    password_hasher_pool.shutdown()
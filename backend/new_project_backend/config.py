@@ -1,6 +1,54 @@
-PRIVATE_KEY_PATH = '/key/id_ed448'
+import os
+
+SERVER_HOST = os.environ.get('SERVER_HOST', '0.0.0.0')
+SERVER_PORT = int(os.environ.get('SERVER_PORT', '8000'))
+SERVER_UDS = os.environ.get('SERVER_UDS') or None
+SERVER_WORKERS = int(os.environ.get('SERVER_WORKERS', '1'))
+SERVER_GRACEFUL_TIMEOUT = int(os.environ.get('SERVER_GRACEFUL_TIMEOUT', '25'))
+KEY_SET_PATH = '/key/jwks.json'
+KEY_SET_MAX_KEYS = 3
+KEY_SET_RELOAD_INTERVAL = 60
 DB_HOST = 'postgres'
 DB_PORT = 5432
 DB_NAME = 'postgres'
 DB_USER = 'postgres'
 DB_PASSWORD = 'postgres'
+DB_PREPARED_MAX = 256
+DB_MAX_CONNECTIONS = int(os.environ.get('DB_MAX_CONNECTIONS', '100'))
+DB_RESERVED_CONNECTIONS = int(os.environ.get('DB_RESERVED_CONNECTIONS', '10'))
+DB_POOL_MAX_SIZE = int(
+    os.environ.get('DB_POOL_MAX_SIZE') or max(1, (DB_MAX_CONNECTIONS - DB_RESERVED_CONNECTIONS) // SERVER_WORKERS)
+)
+DB_POOL_MIN_SIZE = int(os.environ.get('DB_POOL_MIN_SIZE') or min(4, DB_POOL_MAX_SIZE))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', '30'))
+DB_POOL_MAX_WAITING = int(os.environ.get('DB_POOL_MAX_WAITING', '0'))
+DB_POOL_MAX_IDLE = float(os.environ.get('DB_POOL_MAX_IDLE', '600'))
+DB_POOL_MAX_LIFETIME = float(os.environ.get('DB_POOL_MAX_LIFETIME', '3600'))
+DB_POOL_CHECK = os.environ.get('DB_POOL_CHECK', 'none')
+DB_POOL_CHECKOUT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SCHEMA_MIGRATION_LOCK_ID = 0x6E65775F70726F6A
+WORD_IMPORT_BATCH_SIZE = 1000
+WORD_IMPORT_MAX_ERRORS = 1000
+WORD_EXPORT_BATCH_SIZE = 1000
+WORD_LOAD_BATCH_WINDOW = float(os.environ.get('WORD_LOAD_BATCH_WINDOW', '0.0005'))
+WORD_LOAD_BATCH_MAX_SIZE = int(os.environ.get('WORD_LOAD_BATCH_MAX_SIZE', '500'))
+DAILY_PLAN_ROLLOVER_BATCH_SIZE = 1000
+DAILY_PLAN_ROLLOVER_INTERVAL = 900
+DAILY_PLAN_ROLLOVER_LOCK_ID = 0x6E65775F726F6C6C
+DAILY_PLAN_WORDS_COUNT = 10
+DAILY_PLAN_WORDS_MAX_COUNT = 100
+DAILY_PLAN_REVIEWS_MAX_COUNT = 1000
+REVIEW_DUE_COUNT = 20
+REVIEW_DUE_MAX_COUNT = 100
+REVIEWS_MAX_COUNT = 1000
+USER_CACHE_MAXSIZE = 10000
+USER_CACHE_TTL = float(os.environ.get('USER_CACHE_TTL', '30'))
+PASSWORD_HASHER_WORKERS = max(1, (os.cpu_count() or 1) // SERVER_WORKERS)
+PASSWORD_HASHER_MAX_PENDING = 64
+PASSWORD_HASHER_RETRY_AFTER = 1
+ACCESS_TOKEN_EXPIRATION = 600
+REFRESH_TOKEN_EXPIRATION = 30 * 24 * 60 * 60
+TOKEN_CACHE_MAXSIZE = 10000
+TOKEN_CACHE_TTL = 600
+BOOK_CACHE_TTL = 5
+BOOK_CACHE_STALE_TTL = 300
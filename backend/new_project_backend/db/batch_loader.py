@@ -0,0 +1,136 @@
+import asyncio
+import contextlib
+from typing import Awaitable, Callable, Generic, Hashable, Optional, TypeVar, Union
+
+from psycopg import Error
+
+K = TypeVar('K', bound=Hashable)
+V = TypeVar('V')
+T = TypeVar('T')
+
+
+class BatchLoader(Generic[K, V]):
+    def __init__(
+        self,
+        load_many: Callable[[list[K]], Awaitable[list[Union[V, Exception]]]],
+        window: float,
+        max_batch_size: int,
+    ):
+        self._load_many = load_many
+        self._window = window
+        self._max_batch_size = max_batch_size
+        self._pending: dict[K, asyncio.Future[V]] = {}
+        self._window_event: Optional[asyncio.Event] = None
+        self._dispatch_tasks: set[asyncio.Task] = set()
+        self.loads = 0
+        self.batches = 0
+        self.batched_keys = 0
+        self.max_seen_batch_size = 0
+        self.errors = 0
+        self.fallbacks = 0
+
+    def _take_batch(self):
+        self._window_event = None
+        batch = self._pending
+        self._pending = {}
+        return batch
+
+    def _dispatch_in_background(self, batch: dict[K, asyncio.Future[V]]):
+        batch = {key: future for key, future in batch.items() if not future.done()}
+        if not batch:
+            return
+        task = asyncio.create_task(self._resolve(batch))
+        self._dispatch_tasks.add(task)
+        task.add_done_callback(self._dispatch_tasks.discard)
+
+    async def _dispatch(self, batch: dict[K, asyncio.Future[V]]):
+        try:
+            await self._resolve(batch)
+        except asyncio.CancelledError:
+            self._dispatch_in_background(batch)
+            raise
+
+    async def _wait_window(self, window_event: asyncio.Event):
+        try:
+            await asyncio.wait_for(window_event.wait(), self._window)
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            if self._window_event is window_event:
+                self._dispatch_in_background(self._take_batch())
+            raise
+        if self._window_event is window_event:
+            await self._dispatch(self._take_batch())
+
+    @staticmethod
+    async def _settle(awaitable: Awaitable[T]) -> Union[T, Error]:
+        try:
+            return await awaitable
+        except Error as error:
+            return error
+
+    @staticmethod
+    def _set(future: asyncio.Future[V], result: Union[V, Exception]):
+        if future.done():
+            return
+        if isinstance(result, Exception):
+            future.set_exception(result)
+        else:
+            future.set_result(result)
+
+    async def _resolve(self, batch: dict[K, asyncio.Future[V]]):
+        try:
+            await self._load_batch(batch)
+        except Exception as error:
+            for future in batch.values():
+                self._set(future, error)
+            raise
+
+    async def _load_batch(self, batch: dict[K, asyncio.Future[V]]):
+        self.batches += 1
+        self.batched_keys += len(batch)
+        self.max_seen_batch_size = max(self.max_seen_batch_size, len(batch))
+        results = await self._settle(self._load_many(list(batch)))
+        if not isinstance(results, Error):
+            for future, result in zip(batch.values(), results):
+                self._set(future, result)
+            return
+        self.errors += 1
+        if len(batch) == 1:
+            for future in batch.values():
+                self._set(future, results)
+            return
+        self.fallbacks += 1
+        for key, future in batch.items():
+            if not future.done():
+                results = await self._settle(self._load_many([key]))
+                self._set(future, results if isinstance(results, Error) else results[0])
+
+    async def load(self, key: K) -> V:
+        self.loads += 1
+        future = self._pending.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._pending[key] = future
+            with contextlib.suppress(Exception):
+                if len(self._pending) >= self._max_batch_size:
+                    if self._window_event is not None:
+                        self._window_event.set()
+                    await self._dispatch(self._take_batch())
+                elif self._window_event is None:
+                    window_event = self._window_event = asyncio.Event()
+                    await self._wait_window(window_event)
+        return await asyncio.shield(future)
+
+    def stats(self):
+        return {
+            'window': self._window,
+            'max_batch_size': self._max_batch_size,
+            'loads': self.loads,
+            'batches': self.batches,
+            'batched_keys': self.batched_keys,
+            'average_batch_size': self.batched_keys / self.batches if self.batches else 0.0,
+            'max_seen_batch_size': self.max_seen_batch_size,
+            'errors': self.errors,
+            'fallbacks': self.fallbacks,
+        }
@@ -1,88 +1,106 @@
-from typing import AsyncContextManager, Callable
+from typing import AsyncContextManager, Callable, Optional
 
+import orjson
 from psycopg import AsyncConnection
 from psycopg.errors import UniqueViolation
 from psycopg.rows import class_row
 
+from ..config import BOOK_CACHE_STALE_TTL, BOOK_CACHE_TTL
 from ..model.book import AddingBook, Book, EditingBook
-from .connection import connection_pool
+from ..utils.cache import RevalidatingCache
+from .connection import connection
 from .errors import DuplicateRecordError, NotExistsError
+from .single_flight import single_flight
+from .statement import statement_registry
+
+
+class BookCatalog:
+    def __init__(self, books: list[Book]):
+        self.books_by_book_id = {book.book_id: book for book in books}
+        self.book_ids_by_name = {book.name: book.book_id for book in books}
+        self._revision: Optional[int] = None
+        self._content: Optional[bytes] = None
+
+    @property
+    def revision(self):
+        if self._revision is None:
+            self._revision = max((book.revision for book in self.books_by_book_id.values()), default=0)
+        return self._revision
+
+    @property
+    def content(self):
+        if self._content is None:
+            self._content = orjson.dumps([book.dict() for book in self.books_by_book_id.values()])
+        return self._content
+
+    def add(self, book: Book):
+        self._revision = None
+        self._content = None
+        old_book = self.books_by_book_id.get(book.book_id)
+        if old_book is not None:
+            self.book_ids_by_name.pop(old_book.name, None)
+        self.books_by_book_id[book.book_id] = book
+        self.book_ids_by_name[book.name] = book.book_id
+
+    def remove(self, book_id: int):
+        self._revision = None
+        self._content = None
+        book = self.books_by_book_id.pop(book_id, None)
+        if book is not None:
+            self.book_ids_by_name.pop(book.name, None)
 
 
 class BookDB:
     def __init__(self, connection_generator: Callable[..., AsyncContextManager[AsyncConnection]]):
         self._connection_generator = connection_generator
+        self._catalog_cache: RevalidatingCache[BookCatalog] = RevalidatingCache(
+            self._load_catalog, BOOK_CACHE_TTL, BOOK_CACHE_STALE_TTL
+        )
+        self._catalog: Optional[BookCatalog] = None
 
-    async def create(self):
-        async with self._connection_generator() as conn:
-            async with conn.cursor() as cur:
-                await cur.execute(
-                    '''
-                        CREATE TABLE IF NOT EXISTS "book"(
-                            "book_id" BIGSERIAL PRIMARY KEY,
-                            "name" TEXT UNIQUE NOT NULL,
-                            "description" TEXT,
-                            "words_count" BIGINT DEFAULT 0
-                        );
-
-                        CREATE OR REPLACE FUNCTION "make_book_seq"()
-                        RETURNS TRIGGER
-                        LANGUAGE PLPGSQL
-                        AS $$
-                        BEGIN
-                            EXECUTE 'CREATE SEQUENCE IF NOT EXISTS "book_seq_' || NEW.book_id || '" '
-                                 || 'OWNED BY "book"."book_id"';
-                            return NEW;
-                        END
-                        $$;
-
-                        CREATE OR REPLACE TRIGGER "make_book_seq"
-                        AFTER INSERT ON "book"
-                        FOR EACH ROW EXECUTE PROCEDURE "make_book_seq"();
-                    '''
-                )
+    def cache_stats(self):
+        return self._catalog_cache.stats()
 
-    async def drop(self):
-        async with self._connection_generator() as conn:
-            async with conn.cursor() as cur:
-                await cur.execute(
-                    '''
-                        DROP TABLE IF EXISTS "book";
-                        DROP FUNCTION IF EXISTS "make_book_seq";
-                    '''
-                )
+    def expire_cache(self):
+        self._catalog_cache.expire()
 
     async def insert(self, adding_book: AddingBook):
         async with self._connection_generator() as conn:
             async with conn.cursor(row_factory=class_row(Book)) as cur:
                 adding_book_dict = adding_book.dict()
                 try:
-                    await cur.execute(
-                        f'''
+                    await statement_registry.execute(
+                        cur,
+                        'book.insert',
+                        lambda columns: f'''
                             INSERT INTO "book"(
-                                {', '.join([f'"{key}"' for key in adding_book_dict.keys()])}
+                                {', '.join([f'"{key}"' for key in columns])}
                             )
                             VALUES(
-                                {', '.join(['%s'] * len(adding_book_dict))}
+                                {', '.join(['%s'] * len(columns))}
                             )
                             RETURNING *;
                         ''',
                         [
                             *adding_book_dict.values(),
                         ],
+                        adding_book_dict.keys(),
                     )
                     book = await cur.fetchone()
                     assert book is not None
-                    return book
                 except UniqueViolation as error:
                     raise DuplicateRecordError() from error
+        self._catalog_cache.update(lambda catalog: catalog.add(book))
+        return book
 
     async def update_by_book_id(self, book_id: int, editing_book: EditingBook):
         async with self._connection_generator() as conn:
             async with conn.cursor(row_factory=class_row(Book)) as cur:
                 editing_book_dict = editing_book.dict(exclude_unset=True)
                 if not editing_book_dict:
-                    await cur.execute(
+                    await statement_registry.execute(
+                        cur,
+                        'book.query_by_book_id',
                         '''
                             SELECT * FROM "book"
                             WHERE "book_id" = %s;
@@ -93,10 +111,12 @@ class BookDB:
                     )
                 else:
                     try:
-                        await cur.execute(
-                            f'''
+                        await statement_registry.execute(
+                            cur,
+                            'book.update_by_book_id',
+                            lambda columns: f'''
                                 UPDATE "book"
-                                SET {', '.join([f'"{key}" = %s' for key in editing_book_dict.keys()])}
+                                SET {', '.join([f'"{key}" = %s' for key in columns])}
                                 WHERE "book_id" = %s
                                 RETURNING *;
                             ''',
@@ -104,20 +124,24 @@ class BookDB:
                                 *editing_book_dict.values(),
                                 book_id,
                             ],
+                            editing_book_dict.keys(),
                         )
                     except UniqueViolation as error:
                         raise DuplicateRecordError() from error
                 book = await cur.fetchone()
                 if book is None:
                     raise NotExistsError('book')
-                return book
+        self._catalog_cache.update(lambda catalog: catalog.add(book))
+        return book
 
     async def update_by_name(self, name: str, editing_book: EditingBook):
         async with self._connection_generator() as conn:
             async with conn.cursor(row_factory=class_row(Book)) as cur:
                 editing_book_dict = editing_book.dict(exclude_unset=True)
                 if not editing_book_dict:
-                    await cur.execute(
+                    await statement_registry.execute(
+                        cur,
+                        'book.query_by_name',
                         '''
                             SELECT * FROM "book"
                             WHERE "name" = %s;
@@ -128,10 +152,12 @@ class BookDB:
                     )
                 else:
                     try:
-                        await cur.execute(
-                            f'''
+                        await statement_registry.execute(
+                            cur,
+                            'book.update_by_name',
+                            lambda columns: f'''
                                 UPDATE "book"
-                                SET {', '.join([f'"{key}" = %s' for key in editing_book_dict.keys()])}
+                                SET {', '.join([f'"{key}" = %s' for key in columns])}
                                 WHERE "name" = %s
                                 RETURNING *;
                             ''',
@@ -139,18 +165,22 @@ class BookDB:
                                 *editing_book_dict.values(),
                                 name,
                             ],
+                            editing_book_dict.keys(),
                         )
                     except UniqueViolation as error:
                         raise DuplicateRecordError() from error
                 book = await cur.fetchone()
                 if book is None:
                     raise NotExistsError('book')
-                return book
+        self._catalog_cache.update(lambda catalog: catalog.add(book))
+        return book
 
     async def delete_by_book_id(self, book_id: int):
         async with self._connection_generator() as conn:
             async with conn.cursor(row_factory=class_row(Book)) as cur:
-                await cur.execute(
+                await statement_registry.execute(
+                    cur,
+                    'book.delete_by_book_id',
                     '''
                         DELETE FROM "book"
                         WHERE "book_id" = %s
@@ -163,12 +193,15 @@ class BookDB:
                 book = await cur.fetchone()
                 if book is None:
                     raise NotExistsError('book')
-                return book
+        self._catalog_cache.update(lambda catalog: catalog.remove(book.book_id))
+        return book
 
     async def delete_by_name(self, name: str):
         async with self._connection_generator() as conn:
             async with conn.cursor(row_factory=class_row(Book)) as cur:
-                await cur.execute(
+                await statement_registry.execute(
+                    cur,
+                    'book.delete_by_name',
                     '''
                         DELETE FROM "book"
                         WHERE "name" = %s
@@ -181,23 +214,30 @@ class BookDB:
                 book = await cur.fetchone()
                 if book is None:
                     raise NotExistsError('book')
-                return book
+        self._catalog_cache.update(lambda catalog: catalog.remove(book.book_id))
+        return book
 
     async def query(self):
         async with self._connection_generator() as conn:
             async with conn.cursor(row_factory=class_row(Book)) as cur:
-                await cur.execute(
-                    '''
-                        SELECT * FROM "book";
+                await statement_registry.execute(
+                    cur,
+                    'book.query',
                     '''
+                        SELECT * FROM "book"
+                        ORDER BY "book_id";
+                    ''',
                 )
                 books = await cur.fetchall()
                 return books
 
+    @single_flight.coalesce('book.query_by_book_id')
     async def query_by_book_id(self, book_id: int):
         async with self._connection_generator() as conn:
             async with conn.cursor(row_factory=class_row(Book)) as cur:
-                await cur.execute(
+                await statement_registry.execute(
+                    cur,
+                    'book.query_by_book_id',
                     '''
                         SELECT * FROM "book"
                         WHERE "book_id" = %s;
@@ -211,10 +251,13 @@ class BookDB:
                     raise NotExistsError('book')
                 return book
 
+    @single_flight.coalesce('book.query_by_name')
     async def query_by_name(self, name: str):
         async with self._connection_generator() as conn:
             async with conn.cursor(row_factory=class_row(Book)) as cur:
-                await cur.execute(
+                await statement_registry.execute(
+                    cur,
+                    'book.query_by_name',
                     '''
                         SELECT * FROM "book"
                         WHERE "name" = %s;
@@ -228,5 +271,73 @@ class BookDB:
                     raise NotExistsError('book')
                 return book
 
+    @single_flight.coalesce('book.query_revision_by_book_id')
+    async def query_revision_by_book_id(self, book_id: int):
+        async with self._connection_generator() as conn:
+            async with conn.cursor() as cur:
+                await statement_registry.execute(
+                    cur,
+                    'book.query_revision_by_book_id',
+                    '''
+                        SELECT "revision" FROM "book"
+                        WHERE "book_id" = %s;
+                    ''',
+                    [
+                        book_id,
+                    ],
+                )
+                row = await cur.fetchone()
+                if row is None:
+                    raise NotExistsError('book')
+                return row[0]
+
+    async def query_revision(self):
+        async with self._connection_generator() as conn:
+            async with conn.cursor() as cur:
+                await statement_registry.execute(
+                    cur,
+                    'book.query_revision',
+                    '''
+                        SELECT COUNT(*), COALESCE(MAX("revision"), 0) FROM "book";
+                    ''',
+                )
+                row = await cur.fetchone()
+                assert row is not None
+                return row[0], row[1]
+
+    async def _load_catalog(self):
+        catalog = self._catalog
+        if catalog is not None:
+            books_count, revision = await self.query_revision()
+            if books_count == len(catalog.books_by_book_id) and revision == catalog.revision:
+                return catalog
+        self._catalog = BookCatalog(await self.query())
+        return self._catalog
+
+    async def query_cached_content(self):
+        catalog = await self._catalog_cache.get()
+        return catalog.content
+
+    async def query_cached_revision(self):
+        catalog = await self._catalog_cache.get()
+        return len(catalog.books_by_book_id), catalog.revision
+
+    async def query_cached_by_book_id(self, book_id: int):
+        catalog = await self._catalog_cache.get()
+        book = catalog.books_by_book_id.get(book_id)
+        if book is None:
+            book = await self.query_by_book_id(book_id)
+            self._catalog_cache.update(lambda catalog: catalog.add(book))
+        return book
+
+    async def query_cached_by_name(self, name: str):
+        catalog = await self._catalog_cache.get()
+        book_id = catalog.book_ids_by_name.get(name)
+        if book_id is None:
+            book = await self.query_by_name(name)
+            self._catalog_cache.update(lambda catalog: catalog.add(book))
+            return book
+        return catalog.books_by_book_id[book_id]
+
 
-book_db = BookDB(connection_pool.connection)
+book_db = BookDB(connection)
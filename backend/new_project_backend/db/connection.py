@@ -1,7 +1,133 @@
+import asyncio
+import time
+from contextlib import AsyncExitStack, asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Optional
+
+from psycopg import AsyncConnection
 from psycopg_pool import AsyncConnectionPool
 
-from ..config import DB_HOST, DB_NAME, DB_PASSWORD, DB_PORT, DB_USER
+from ..config import (
+    DB_HOST,
+    DB_NAME,
+    DB_PASSWORD,
+    DB_POOL_CHECK,
+    DB_POOL_CHECKOUT_BUCKETS,
+    DB_POOL_MAX_IDLE,
+    DB_POOL_MAX_LIFETIME,
+    DB_POOL_MAX_SIZE,
+    DB_POOL_MAX_WAITING,
+    DB_POOL_MIN_SIZE,
+    DB_POOL_TIMEOUT,
+    DB_PORT,
+    DB_PREPARED_MAX,
+    DB_USER,
+)
+from ..utils.histogram import LatencyHistogram
+
+connection_checks = {
+    'none': None,
+    'connection': AsyncConnectionPool.check_connection,
+}
+
+
+async def configure_connection(conn: AsyncConnection):
+    conn.prepared_max = DB_PREPARED_MAX
+
+
+class ObservedConnectionPool(AsyncConnectionPool):
+    def __init__(self, *args: Any, checkout_buckets: tuple[float, ...], **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.checkout_histogram = LatencyHistogram(checkout_buckets)
+        self.checkout_errors = 0
+
+    async def getconn(self, timeout: Optional[float] = None):
+        start_time = time.perf_counter()
+        try:
+            return await super().getconn(timeout)
+        except Exception:
+            self.checkout_errors += 1
+            raise
+        finally:
+            self.checkout_histogram.observe(time.perf_counter() - start_time)
+
+    def stats(self):
+        pool_stats = self.get_stats()
+        return {
+            'min_size': self.min_size,
+            'max_size': self.max_size,
+            'timeout': self.timeout,
+            'max_waiting': self.max_waiting,
+            'max_idle': self.max_idle,
+            'max_lifetime': self.max_lifetime,
+            'size': pool_stats.get('pool_size', 0),
+            'available': pool_stats.get('pool_available', 0),
+            'in_use': pool_stats.get('pool_size', 0) - pool_stats.get('pool_available', 0),
+            'waiting': pool_stats.get('requests_waiting', 0),
+            'requests': pool_stats.get('requests_num', 0),
+            'requests_queued': pool_stats.get('requests_queued', 0),
+            'requests_errors': pool_stats.get('requests_errors', 0),
+            'requests_wait_ms': pool_stats.get('requests_wait_ms', 0),
+            'usage_ms': pool_stats.get('usage_ms', 0),
+            'connections': pool_stats.get('connections_num', 0),
+            'connections_errors': pool_stats.get('connections_errors', 0),
+            'connections_lost': pool_stats.get('connections_lost', 0),
+            'returns_bad': pool_stats.get('returns_bad', 0),
+            'checkout_errors': self.checkout_errors,
+            'checkout': self.checkout_histogram.stats(),
+        }
+
 
-connection_pool = AsyncConnectionPool(
-    conninfo=f'host={DB_HOST} port={DB_PORT} dbname={DB_NAME} user={DB_USER} password={DB_PASSWORD}', open=False
+connection_pool = ObservedConnectionPool(
+    conninfo=f'host={DB_HOST} port={DB_PORT} dbname={DB_NAME} user={DB_USER} password={DB_PASSWORD}',
+    min_size=DB_POOL_MIN_SIZE,
+    max_size=DB_POOL_MAX_SIZE,
+    timeout=DB_POOL_TIMEOUT,
+    max_waiting=DB_POOL_MAX_WAITING,
+    max_idle=DB_POOL_MAX_IDLE,
+    max_lifetime=DB_POOL_MAX_LIFETIME,
+    configure=configure_connection,
+    check=connection_checks[DB_POOL_CHECK],
+    checkout_buckets=DB_POOL_CHECKOUT_BUCKETS,
+    open=False,
 )
+
+
+class RequestConnection:
+    def __init__(self, pool: AsyncConnectionPool):
+        self._pool = pool
+        self._task = asyncio.current_task()
+        self._stack = AsyncExitStack()
+        self._conn: Optional[AsyncConnection] = None
+        self._is_closed = False
+
+    def is_usable(self):
+        return not self._is_closed and asyncio.current_task() is self._task
+
+    async def get(self, timeout: Optional[float] = None):
+        if self._conn is None:
+            self._conn = await self._stack.enter_async_context(self._pool.connection(timeout))
+        return self._conn
+
+    async def close(self, error: Optional[BaseException] = None):
+        self._is_closed = True
+        self._conn = None
+        if error is None:
+            await self._stack.aclose()
+        else:
+            await self._stack.__aexit__(type(error), error, error.__traceback__)
+
+
+request_connection: ContextVar[Optional[RequestConnection]] = ContextVar('request_connection', default=None)
+
+
+@asynccontextmanager
+async def connection(timeout: Optional[float] = None) -> AsyncIterator[AsyncConnection]:
+    shared_connection = request_connection.get()
+    if shared_connection is None or not shared_connection.is_usable():
+        async with connection_pool.connection(timeout) as conn:
+            yield conn
+        return
+    conn = await shared_connection.get(timeout)
+    async with conn.transaction():
+        yield conn
@@ -1,385 +1,789 @@
-from typing import AsyncContextManager, Callable
+from typing import AsyncContextManager, Callable, Optional
 
-from psycopg import AsyncConnection
+from psycopg import AsyncConnection, AsyncCursor
 from psycopg.errors import UniqueViolation
-from psycopg.rows import class_row
+from psycopg.rows import dict_row
 
-from ..model.book import Book
-from ..model.daily_plan import AddingDailyPlan, DailyPlan, EditingDailyPlan
-from ..model.user import User
-from .connection import connection_pool
+from ..config import DAILY_PLAN_ROLLOVER_BATCH_SIZE, DAILY_PLAN_ROLLOVER_LOCK_ID
+from ..model.daily_plan import (
+    AddingDailyPlan,
+    DailyPlan,
+    DailyPlanReview,
+    EditingDailyPlan,
+)
+from ..model.word import WordRecord
+from .connection import connection
 from .errors import DuplicateRecordError, NotExistsError
+from .statement import statement_registry
 
 
 class DailyPlanDB:
     def __init__(self, connection_generator: Callable[..., AsyncContextManager[AsyncConnection]]):
         self._connection_generator = connection_generator
 
-    async def create(self):
-        async with self._connection_generator() as conn:
-            async with conn.cursor() as cur:
-                await cur.execute(
-                    '''
-                        CREATE TABLE IF NOT EXISTS "daily_plan"(
-                            "user_id" BIGINT REFERENCES "user"("user_id") ON DELETE CASCADE,
-                            "book_id" BIGINT REFERENCES "book"("book_id") ON DELETE CASCADE,
-                            "daily_goal" BIGINT NOT NULL,
-                            "is_submitted" BOOLEAN NOT NULL DEFAULT FALSE,
-                            "progress" BIGINT NOT NULL DEFAULT 0,
-                            PRIMARY KEY ("user_id", "book_id")
-                        );
-
-                        CREATE TABLE IF NOT EXISTS "daily_plan_evaluation_detail"(
-                            "evaluation_id" BIGSERIAL PRIMARY KEY,
-                            "date" TIMESTAMP NOT NULL,
-                            "daily_goal" BIGINT NOT NULL,
-                            "daily_progress" BIGINT NOT NULL
-                        );
-
-                        CREATE TABLE IF NOT EXISTS "daily_plan_evaluation"(
-                            "user_id" BIGINT NOT NULL REFERENCES "user"("user_id"),
-                            "book_id" BIGINT NOT NULL REFERENCES "book"("book_id"),
-                            "evaluation_id" BIGINT NOT NULL
-                                REFERENCES "daily_plan_evaluation_detail"("evaluation_id") ON DELETE CASCADE,
-                            PRIMARY KEY ("user_id", "book_id", "evaluation_id")
-                        );
-                    '''
-                )
+    async def _query_max_user_id(self, cur: AsyncCursor):
+        await statement_registry.execute(
+            cur,
+            'daily_plan.query_max_user_id',
+            '''
+                SELECT COALESCE(MAX("user_id"), 0) FROM "daily_plan";
+            ''',
+        )
+        row = await cur.fetchone()
+        assert row is not None
+        return row[0]
 
-    async def drop(self):
-        async with self._connection_generator() as conn:
-            async with conn.cursor() as cur:
-                await cur.execute(
-                    '''
-                        DROP TABLE IF EXISTS "daily_plan_evaluation";
-                        DROP TABLE IF EXISTS "daily_plan_evaluation_detail";
-                        DROP TABLE IF EXISTS "daily_plan";
-                    '''
+    async def _rollover_by_user_id_range(self, cur: AsyncCursor, start_user_id: int, end_user_id: int):
+        await statement_registry.execute(
+            cur,
+            'daily_plan.rollover_by_user_id_range',
+            '''
+                WITH "due_daily_plan" AS (
+                    SELECT
+                        "daily_plan"."user_id",
+                        "daily_plan"."book_id",
+                        "daily_plan"."daily_goal",
+                        "daily_plan"."progress",
+                        "daily_plan"."progress" - "daily_plan"."day_start_progress" AS "daily_progress",
+                        "daily_plan"."last_rollover_date",
+                        (now() AT TIME ZONE "user"."time_zone")::DATE AS "rollover_date",
+                        nextval(pg_get_serial_sequence('"daily_plan_evaluation_detail"', 'evaluation_id'))
+                            AS "evaluation_id"
+                    FROM "daily_plan"
+                    JOIN "user" ON "user"."user_id" = "daily_plan"."user_id"
+                    WHERE "daily_plan"."user_id" >= %s
+                    AND "daily_plan"."user_id" < %s
+                    AND "daily_plan"."last_rollover_date" < (now() AT TIME ZONE "user"."time_zone")::DATE
+                    FOR UPDATE OF "daily_plan"
+                ), "inserted_detail" AS (
+                    INSERT INTO "daily_plan_evaluation_detail"(
+                        "evaluation_id",
+                        "date",
+                        "daily_goal",
+                        "daily_progress"
+                    )
+                    SELECT
+                        "evaluation_id",
+                        "last_rollover_date",
+                        "daily_goal",
+                        "daily_progress"
+                    FROM "due_daily_plan"
+                ), "inserted_evaluation" AS (
+                    INSERT INTO "daily_plan_evaluation"(
+                        "user_id",
+                        "book_id",
+                        "evaluation_id"
+                    )
+                    SELECT
+                        "user_id",
+                        "book_id",
+                        "evaluation_id"
+                    FROM "due_daily_plan"
+                ), "updated_daily_plan" AS (
+                    UPDATE "daily_plan"
+                    SET "day_start_progress" = "due_daily_plan"."progress",
+                    "last_rollover_date" = "due_daily_plan"."rollover_date"
+                    FROM "due_daily_plan"
+                    WHERE "daily_plan"."user_id" = "due_daily_plan"."user_id"
+                    AND "daily_plan"."book_id" = "due_daily_plan"."book_id"
+                    RETURNING "daily_plan"."user_id"
                 )
+                SELECT COUNT(*) FROM "updated_daily_plan";
+            ''',
+            [
+                start_user_id,
+                end_user_id,
+            ],
+        )
+        row = await cur.fetchone()
+        assert row is not None
+        return row[0]
 
-    async def insert_by_user_id_and_book_name(self, user_id: int, book_name: str, adding_daily_plan: AddingDailyPlan):
+    async def rollover(self):
         async with self._connection_generator() as conn:
             async with conn.cursor() as cur:
-                cur.row_factory = class_row(User)
-                await cur.execute(
-                    '''
-                        SELECT * FROM "user"
-                        WHERE "user_id" = %s;
-                    ''',
-                    [
-                        user_id,
-                    ],
-                )
-                user = await cur.fetchone()
-                if user is None:
-                    raise NotExistsError('user')
-                cur.row_factory = class_row(Book)
-                await cur.execute(
+                await statement_registry.execute(
+                    cur,
+                    'daily_plan.try_lock_rollover',
                     '''
-                        SELECT * FROM "book"
-                        WHERE "name" = %s;
+                        SELECT pg_try_advisory_lock(%s);
                     ''',
                     [
-                        book_name,
+                        DAILY_PLAN_ROLLOVER_LOCK_ID,
                     ],
                 )
-                book = await cur.fetchone()
-                if book is None:
-                    raise NotExistsError('book')
-                cur.row_factory = class_row(DailyPlan)
+                row = await cur.fetchone()
+                assert row is not None
+                await conn.commit()
+                if not row[0]:
+                    return 0
+                try:
+                    rollover_count = 0
+                    max_user_id = await self._query_max_user_id(cur)
+                    await conn.commit()
+                    for start_user_id in range(1, max_user_id + 1, DAILY_PLAN_ROLLOVER_BATCH_SIZE):
+                        rollover_count += await self._rollover_by_user_id_range(
+                            cur, start_user_id, start_user_id + DAILY_PLAN_ROLLOVER_BATCH_SIZE
+                        )
+                        await conn.commit()
+                    return rollover_count
+                finally:
+                    await conn.rollback()
+                    await statement_registry.execute(
+                        cur,
+                        'daily_plan.unlock_rollover',
+                        '''
+                            SELECT pg_advisory_unlock(%s);
+                        ''',
+                        [
+                            DAILY_PLAN_ROLLOVER_LOCK_ID,
+                        ],
+                    )
+                    await conn.commit()
+
+    async def insert_by_user_id_and_book_name(self, user_id: int, book_name: str, adding_daily_plan: AddingDailyPlan):
+        async with self._connection_generator() as conn:
+            async with conn.cursor(row_factory=dict_row) as cur:
                 adding_daily_plan_dict = adding_daily_plan.dict()
                 try:
-                    await cur.execute(
-                        f'''
-                            INSERT INTO "daily_plan"(
-                                "user_id",
-                                "book_id",
-                                {', '.join([f'"{key}"' for key in adding_daily_plan_dict.keys()])}
-                            )
-                            VALUES(
-                                %s,
-                                %s,
-                                {', '.join(['%s'] * len(adding_daily_plan_dict))}
+                    await statement_registry.execute(
+                        cur,
+                        'daily_plan.insert_by_user_id_and_book_name',
+                        lambda columns: f'''
+                            WITH "target_user" AS (
+                                SELECT "user_id", "time_zone" FROM "user"
+                                WHERE "user_id" = %s
+                            ), "target_book" AS (
+                                SELECT "book_id" FROM "book"
+                                WHERE "name" = %s
+                            ), "inserted_daily_plan" AS (
+                                INSERT INTO "daily_plan"(
+                                    "user_id",
+                                    "book_id",
+                                    "last_rollover_date",
+                                    {', '.join([f'"{key}"' for key in columns])}
+                                )
+                                SELECT
+                                    "user_id",
+                                    "book_id",
+                                    (now() AT TIME ZONE "time_zone")::DATE,
+                                    {', '.join(['%s'] * len(columns))}
+                                FROM "target_user", "target_book"
+                                RETURNING *
                             )
-                            RETURNING *;
+                            SELECT
+                                "target_user"."user_id",
+                                "target_book"."book_id",
+                                "inserted_daily_plan"."daily_goal",
+                                "inserted_daily_plan"."is_submitted",
+                                "inserted_daily_plan"."progress",
+                                "inserted_daily_plan"."last_word_id",
+                                "inserted_daily_plan"."revision",
+                                "inserted_daily_plan"."last_sequence"
+                            FROM (SELECT 1) AS "dummy"
+                            LEFT JOIN "target_user" ON TRUE
+                            LEFT JOIN "target_book" ON TRUE
+                            LEFT JOIN "inserted_daily_plan" ON TRUE;
                         ''',
                         [
-                            user.user_id,
-                            book.book_id,
+                            user_id,
+                            book_name,
                             *adding_daily_plan_dict.values(),
                         ],
+                        adding_daily_plan_dict.keys(),
                     )
-                    word = await cur.fetchone()
-                    assert word is not None
-                    return word
                 except UniqueViolation as error:
                     raise DuplicateRecordError() from error
+                row = await cur.fetchone()
+                assert row is not None
+                if row['user_id'] is None:
+                    raise NotExistsError('user')
+                if row['book_id'] is None:
+                    raise NotExistsError('book')
+                assert row['daily_goal'] is not None
+                return DailyPlan(**row)
 
     async def update_by_user_id_and_book_name(self, user_id: int, book_name: str, editing_daily_plan: EditingDailyPlan):
+        editing_daily_plan_dict = editing_daily_plan.dict(exclude_unset=True)
+        if not editing_daily_plan_dict:
+            return await self.query_by_user_id_and_book_name(user_id, book_name)
         async with self._connection_generator() as conn:
-            async with conn.cursor() as cur:
-                cur.row_factory = class_row(User)
-                await cur.execute(
-                    '''
-                        SELECT * FROM "user"
-                        WHERE "user_id" = %s;
-                    ''',
-                    [
-                        user_id,
-                    ],
-                )
-                user = await cur.fetchone()
-                if user is None:
-                    raise NotExistsError('user')
-                cur.row_factory = class_row(Book)
-                await cur.execute(
-                    '''
-                        SELECT * FROM "book"
-                        WHERE "name" = %s;
-                    ''',
-                    [
-                        book_name,
-                    ],
-                )
-                book = await cur.fetchone()
-                if book is None:
-                    raise NotExistsError('book')
-                cur.row_factory = class_row(DailyPlan)
-                editing_daily_plan_dict = editing_daily_plan.dict(exclude_unset=True)
-                if not editing_daily_plan_dict:
-                    await cur.execute(
-                        '''
-                            SELECT * FROM "daily_plan"
-                            WHERE "user_id" = %s
-                            AND "book_id" = %s;
+            async with conn.cursor(row_factory=dict_row) as cur:
+                try:
+                    await statement_registry.execute(
+                        cur,
+                        'daily_plan.update_by_user_id_and_book_name',
+                        lambda columns: f'''
+                            WITH "target_user" AS (
+                                SELECT "user_id" FROM "user"
+                                WHERE "user_id" = %s
+                            ), "target_book" AS (
+                                SELECT "book_id" FROM "book"
+                                WHERE "name" = %s
+                            ), "updated_daily_plan" AS (
+                                UPDATE "daily_plan"
+                                SET {', '.join([f'"{key}" = %s' for key in columns])}
+                                FROM "target_user", "target_book"
+                                WHERE "daily_plan"."user_id" = "target_user"."user_id"
+                                AND "daily_plan"."book_id" = "target_book"."book_id"
+                                RETURNING "daily_plan".*
+                            )
+                            SELECT
+                                "target_user"."user_id",
+                                "target_book"."book_id",
+                                "updated_daily_plan"."daily_goal",
+                                "updated_daily_plan"."is_submitted",
+                                "updated_daily_plan"."progress",
+                                "updated_daily_plan"."last_word_id",
+                                "updated_daily_plan"."revision",
+                                "updated_daily_plan"."last_sequence"
+                            FROM (SELECT 1) AS "dummy"
+                            LEFT JOIN "target_user" ON TRUE
+                            LEFT JOIN "target_book" ON TRUE
+                            LEFT JOIN "updated_daily_plan" ON TRUE;
                         ''',
                         [
-                            user.user_id,
-                            book.book_id,
+                            user_id,
+                            book_name,
+                            *editing_daily_plan_dict.values(),
                         ],
+                        editing_daily_plan_dict.keys(),
                     )
-                else:
-                    try:
-                        await cur.execute(
-                            f'''
-                                UPDATE "daily_plan"
-                                SET {', '.join([f'"{key}" = %s' for key in editing_daily_plan_dict.keys()])}
-                                WHERE "user_id" = %s
-                                AND "book_id" = %s
-                                RETURNING *;
-                            ''',
-                            [
-                                *editing_daily_plan_dict.values(),
-                                user.user_id,
-                                book.book_id,
-                            ],
-                        )
-                    except UniqueViolation as error:
-                        raise DuplicateRecordError() from error
-                daily_plan = await cur.fetchone()
-                if daily_plan is None:
+                except UniqueViolation as error:
+                    raise DuplicateRecordError() from error
+                row = await cur.fetchone()
+                assert row is not None
+                if row['user_id'] is None:
+                    raise NotExistsError('user')
+                if row['book_id'] is None:
+                    raise NotExistsError('book')
+                if row['daily_goal'] is None:
                     raise NotExistsError('daily plan')
-                return daily_plan
+                return DailyPlan(**row)
 
     async def delete_by_user_id_and_book_name(self, user_id: int, book_name: str):
         async with self._connection_generator() as conn:
-            async with conn.cursor() as cur:
-                cur.row_factory = class_row(User)
-                await cur.execute(
+            async with conn.cursor(row_factory=dict_row) as cur:
+                await statement_registry.execute(
+                    cur,
+                    'daily_plan.delete_by_user_id_and_book_name',
                     '''
-                        SELECT * FROM "user"
-                        WHERE "user_id" = %s;
+                        WITH "target_user" AS (
+                            SELECT "user_id" FROM "user"
+                            WHERE "user_id" = %s
+                        ), "target_book" AS (
+                            SELECT "book_id" FROM "book"
+                            WHERE "name" = %s
+                        ), "deleted_daily_plan" AS (
+                            DELETE FROM "daily_plan"
+                            USING "target_user", "target_book"
+                            WHERE "daily_plan"."user_id" = "target_user"."user_id"
+                            AND "daily_plan"."book_id" = "target_book"."book_id"
+                            RETURNING "daily_plan".*
+                        )
+                        SELECT
+                            "target_user"."user_id",
+                            "target_book"."book_id",
+                            "deleted_daily_plan"."daily_goal",
+                            "deleted_daily_plan"."is_submitted",
+                            "deleted_daily_plan"."progress",
+                            "deleted_daily_plan"."last_word_id",
+                            "deleted_daily_plan"."revision",
+                            "deleted_daily_plan"."last_sequence"
+                        FROM (SELECT 1) AS "dummy"
+                        LEFT JOIN "target_user" ON TRUE
+                        LEFT JOIN "target_book" ON TRUE
+                        LEFT JOIN "deleted_daily_plan" ON TRUE;
                     ''',
                     [
                         user_id,
-                    ],
-                )
-                user = await cur.fetchone()
-                if user is None:
-                    raise NotExistsError('user')
-                cur.row_factory = class_row(Book)
-                await cur.execute(
-                    '''
-                        SELECT * FROM "book"
-                        WHERE "name" = %s;
-                    ''',
-                    [
                         book_name,
                     ],
                 )
-                book = await cur.fetchone()
-                if book is None:
+                row = await cur.fetchone()
+                assert row is not None
+                if row['user_id'] is None:
+                    raise NotExistsError('user')
+                if row['book_id'] is None:
                     raise NotExistsError('book')
-                cur.row_factory = class_row(DailyPlan)
-                await cur.execute(
-                    '''
-                        DELETE FROM "daily_plan"
-                        WHERE "user_id" = %s
-                        AND "book_id" = %s
-                        RETURNING *;
-                    ''',
-                    [
-                        user.user_id,
-                        book.book_id,
-                    ],
-                )
-                daily_plan = await cur.fetchone()
-                if daily_plan is None:
+                if row['daily_goal'] is None:
                     raise NotExistsError('daily plan')
-                return daily_plan
+                return DailyPlan(**row)
 
     async def query_by_user_id(self, user_id: int):
         async with self._connection_generator() as conn:
-            async with conn.cursor() as cur:
-                cur.row_factory = class_row(User)
-                await cur.execute(
+            async with conn.cursor(row_factory=dict_row) as cur:
+                await statement_registry.execute(
+                    cur,
+                    'daily_plan.query_by_user_id',
                     '''
-                        SELECT * FROM "user"
-                        WHERE "user_id" = %s;
+                        SELECT
+                            "user"."user_id",
+                            "daily_plan"."book_id",
+                            "daily_plan"."daily_goal",
+                            "daily_plan"."is_submitted",
+                            "daily_plan"."progress",
+                            "daily_plan"."last_word_id",
+                            "daily_plan"."revision",
+                            "daily_plan"."last_sequence"
+                        FROM (SELECT 1) AS "dummy"
+                        LEFT JOIN "user" ON "user"."user_id" = %s
+                        LEFT JOIN "daily_plan" ON "daily_plan"."user_id" = "user"."user_id";
                     ''',
                     [
                         user_id,
                     ],
                 )
-                user = await cur.fetchone()
-                if user is None:
+                rows = await cur.fetchall()
+                if rows[0]['user_id'] is None:
                     raise NotExistsError('user')
-                cur.row_factory = class_row(DailyPlan)
-                await cur.execute(
+                return [DailyPlan(**row) for row in rows if row['book_id'] is not None]
+
+    async def query_by_user_id_and_book_name(self, user_id: int, book_name: str):
+        async with self._connection_generator() as conn:
+            async with conn.cursor(row_factory=dict_row) as cur:
+                await statement_registry.execute(
+                    cur,
+                    'daily_plan.query_by_user_id_and_book_name',
                     '''
-                        SELECT * FROM "daily_plan"
-                        WHERE "user_id" = %s;
+                        SELECT
+                            "user"."user_id",
+                            "book"."book_id",
+                            "daily_plan"."daily_goal",
+                            "daily_plan"."is_submitted",
+                            "daily_plan"."progress",
+                            "daily_plan"."last_word_id",
+                            "daily_plan"."revision",
+                            "daily_plan"."last_sequence"
+                        FROM (SELECT 1) AS "dummy"
+                        LEFT JOIN "user" ON "user"."user_id" = %s
+                        LEFT JOIN "book" ON "book"."name" = %s
+                        LEFT JOIN "daily_plan" ON "daily_plan"."user_id" = "user"."user_id"
+                        AND "daily_plan"."book_id" = "book"."book_id";
                     ''',
                     [
-                        user.user_id,
+                        user_id,
+                        book_name,
                     ],
                 )
-                daily_plans = await cur.fetchall()
-                return daily_plans
+                row = await cur.fetchone()
+                assert row is not None
+                if row['user_id'] is None:
+                    raise NotExistsError('user')
+                if row['book_id'] is None:
+                    raise NotExistsError('book')
+                if row['daily_goal'] is None:
+                    raise NotExistsError('daily plan')
+                return DailyPlan(**row)
 
-    async def query_by_user_id_and_book_name(self, user_id: int, book_name: str):
+    async def query_by_user_id_and_book_id(self, user_id: int, book_id: int):
         async with self._connection_generator() as conn:
-            async with conn.cursor() as cur:
-                cur.row_factory = class_row(User)
-                await cur.execute(
+            async with conn.cursor(row_factory=dict_row) as cur:
+                await statement_registry.execute(
+                    cur,
+                    'daily_plan.query_by_user_id_and_book_id',
                     '''
-                        SELECT * FROM "user"
-                        WHERE "user_id" = %s;
+                        SELECT
+                            "user"."user_id",
+                            "book"."book_id",
+                            "daily_plan"."daily_goal",
+                            "daily_plan"."is_submitted",
+                            "daily_plan"."progress",
+                            "daily_plan"."last_word_id",
+                            "daily_plan"."revision",
+                            "daily_plan"."last_sequence"
+                        FROM (SELECT 1) AS "dummy"
+                        LEFT JOIN "user" ON "user"."user_id" = %s
+                        LEFT JOIN "book" ON "book"."book_id" = %s
+                        LEFT JOIN "daily_plan" ON "daily_plan"."user_id" = "user"."user_id"
+                        AND "daily_plan"."book_id" = "book"."book_id";
                     ''',
                     [
                         user_id,
+                        book_id,
                     ],
                 )
-                user = await cur.fetchone()
-                if user is None:
+                row = await cur.fetchone()
+                assert row is not None
+                if row['user_id'] is None:
                     raise NotExistsError('user')
-                cur.row_factory = class_row(Book)
-                await cur.execute(
+                if row['book_id'] is None:
+                    raise NotExistsError('book')
+                if row['daily_goal'] is None:
+                    raise NotExistsError('daily plan')
+                return DailyPlan(**row)
+
+    async def query_revision_by_user_id(self, user_id: int):
+        async with self._connection_generator() as conn:
+            async with conn.cursor() as cur:
+                await statement_registry.execute(
+                    cur,
+                    'daily_plan.query_revision_by_user_id',
                     '''
-                        SELECT * FROM "book"
-                        WHERE "name" = %s;
+                        SELECT COUNT(*), COALESCE(MAX("revision"), 0) FROM "daily_plan"
+                        WHERE "user_id" = %s;
                     ''',
                     [
-                        book_name,
+                        user_id,
                     ],
                 )
-                book = await cur.fetchone()
-                if book is None:
-                    raise NotExistsError('book')
-                cur.row_factory = class_row(DailyPlan)
-                await cur.execute(
+                row = await cur.fetchone()
+                assert row is not None
+                return row[0], row[1]
+
+    async def query_revision_by_user_id_and_book_id(self, user_id: int, book_id: int):
+        async with self._connection_generator() as conn:
+            async with conn.cursor() as cur:
+                await statement_registry.execute(
+                    cur,
+                    'daily_plan.query_revision_by_user_id_and_book_id',
                     '''
-                        SELECT * FROM "daily_plan"
+                        SELECT "revision" FROM "daily_plan"
                         WHERE "user_id" = %s
                         AND "book_id" = %s;
                     ''',
                     [
-                        user.user_id,
-                        book.book_id,
+                        user_id,
+                        book_id,
                     ],
                 )
-                daily_plan = await cur.fetchone()
-                if daily_plan is None:
+                row = await cur.fetchone()
+                if row is None:
                     raise NotExistsError('daily plan')
-                return daily_plan
+                return row[0]
 
-    async def update_progress_by_user_id_and_book_name(self, user_id: int, book_name: str):
+    async def query_next_words_by_user_id_and_book_id(self, user_id: int, book_id: int, count: int):
         async with self._connection_generator() as conn:
-            async with conn.cursor() as cur:
-                cur.row_factory = class_row(User)
-                await cur.execute(
+            async with conn.cursor(row_factory=dict_row) as cur:
+                await statement_registry.execute(
+                    cur,
+                    'daily_plan.query_next_words_by_user_id_and_book_id',
                     '''
-                        SELECT * FROM "user"
-                        WHERE "user_id" = %s;
+                        SELECT
+                            "user"."user_id",
+                            "book"."book_id",
+                            "daily_plan"."daily_goal",
+                            "daily_plan"."is_submitted",
+                            "daily_plan"."progress",
+                            "daily_plan"."last_word_id",
+                            "daily_plan"."revision",
+                            "daily_plan"."last_sequence",
+                            "next_word"."word_id",
+                            "next_word"."spelling",
+                            "next_word"."translation"
+                        FROM (SELECT 1) AS "dummy"
+                        LEFT JOIN "user" ON "user"."user_id" = %s
+                        LEFT JOIN "book" ON "book"."book_id" = %s
+                        LEFT JOIN "daily_plan" ON "daily_plan"."user_id" = "user"."user_id"
+                        AND "daily_plan"."book_id" = "book"."book_id"
+                        LEFT JOIN LATERAL (
+                            SELECT "word_id", "spelling", "translation" FROM "word"
+                            WHERE "word"."book_id" = "daily_plan"."book_id"
+                            AND "word"."word_id" > "daily_plan"."last_word_id"
+                            ORDER BY "word"."word_id"
+                            LIMIT %s
+                        ) AS "next_word" ON TRUE
+                        ORDER BY "next_word"."word_id";
                     ''',
                     [
                         user_id,
+                        book_id,
+                        count,
                     ],
                 )
-                user = await cur.fetchone()
-                if user is None:
+                rows = await cur.fetchall()
+                row = rows[0]
+                if row['user_id'] is None:
                     raise NotExistsError('user')
-                cur.row_factory = class_row(Book)
-                await cur.execute(
+                if row['book_id'] is None:
+                    raise NotExistsError('book')
+                if row['daily_goal'] is None:
+                    raise NotExistsError('daily plan')
+                words = [
+                    WordRecord(word_row['book_id'], word_row['word_id'], word_row['spelling'], word_row['translation'])
+                    for word_row in rows
+                    if word_row['word_id'] is not None
+                ]
+                for key in ('word_id', 'spelling', 'translation'):
+                    row.pop(key)
+                return DailyPlan(**row), words
+
+    async def update_progress_and_query_next_word_by_user_id_and_book_id(
+        self, user_id: int, book_id: int, sequence: Optional[int] = None, grade: Optional[int] = None
+    ):
+        async with self._connection_generator() as conn:
+            async with conn.cursor(row_factory=dict_row) as cur:
+                await statement_registry.execute(
+                    cur,
+                    'daily_plan.update_progress_and_query_next_word_by_user_id_and_book_id',
                     '''
-                        SELECT * FROM "book"
-                        WHERE "name" = %s;
+                        WITH "target_user" AS (
+                            SELECT "user_id" FROM "user"
+                            WHERE "user_id" = %s
+                        ), "target_book" AS (
+                            SELECT "book_id" FROM "book"
+                            WHERE "book_id" = %s
+                        ), "locked_daily_plan" AS (
+                            SELECT "daily_plan".* FROM "daily_plan", "target_user", "target_book"
+                            WHERE "daily_plan"."user_id" = "target_user"."user_id"
+                            AND "daily_plan"."book_id" = "target_book"."book_id"
+                            FOR UPDATE OF "daily_plan"
+                        ), "updated_daily_plan" AS (
+                            UPDATE "daily_plan"
+                            SET "progress" = CASE
+                                WHEN "daily_plan"."is_submitted" THEN "daily_plan"."progress" + 1
+                                ELSE "daily_plan"."progress"
+                            END,
+                            "last_word_id" = CASE
+                                WHEN "daily_plan"."is_submitted" THEN COALESCE(
+                                    (
+                                        SELECT "word"."word_id" FROM "word"
+                                        WHERE "word"."book_id" = "daily_plan"."book_id"
+                                        AND "word"."word_id" > "daily_plan"."last_word_id"
+                                        ORDER BY "word"."word_id"
+                                        LIMIT 1
+                                    ),
+                                    "daily_plan"."last_word_id"
+                                )
+                                ELSE "daily_plan"."last_word_id"
+                            END,
+                            "is_submitted" = NOT "daily_plan"."is_submitted",
+                            "last_sequence" = COALESCE(%s, "daily_plan"."last_sequence")
+                            FROM "locked_daily_plan"
+                            WHERE "daily_plan"."user_id" = "locked_daily_plan"."user_id"
+                            AND "daily_plan"."book_id" = "locked_daily_plan"."book_id"
+                            AND (%s::BIGINT IS NULL OR %s::BIGINT > "locked_daily_plan"."last_sequence")
+                            RETURNING "daily_plan".*
+                        ), "scheduled_review" AS (
+                            INSERT INTO "review_schedule"(
+                                "user_id",
+                                "book_id",
+                                "word_id",
+                                "ease_factor",
+                                "interval_days",
+                                "repetitions",
+                                "due_at",
+                                "last_grade"
+                            )
+                            SELECT
+                                "updated_daily_plan"."user_id",
+                                "word"."book_id",
+                                "word"."word_id",
+                                "schedule".*,
+                                %s::BIGINT
+                            FROM "updated_daily_plan"
+                            JOIN LATERAL (
+                                SELECT "book_id", "word_id" FROM "word"
+                                WHERE "word"."book_id" = "updated_daily_plan"."book_id"
+                                AND "word"."word_id" > "updated_daily_plan"."last_word_id"
+                                ORDER BY "word"."word_id"
+                                LIMIT 1
+                            ) AS "word" ON TRUE
+                            CROSS JOIN LATERAL "schedule_review"(2.5, 0, 0, %s::BIGINT) AS "schedule"
+                            WHERE "updated_daily_plan"."is_submitted"
+                            AND %s::BIGINT IS NOT NULL
+                            ON CONFLICT ("user_id", "book_id", "word_id") DO UPDATE
+                            SET ("ease_factor", "interval_days", "repetitions", "due_at") = (
+                                SELECT * FROM "schedule_review"(
+                                    "review_schedule"."ease_factor",
+                                    "review_schedule"."interval_days",
+                                    "review_schedule"."repetitions",
+                                    EXCLUDED."last_grade"
+                                )
+                            ),
+                            "last_grade" = EXCLUDED."last_grade",
+                            "reviewed_at" = now()
+                        ), "current_daily_plan" AS (
+                            SELECT * FROM "updated_daily_plan"
+                            UNION ALL
+                            SELECT * FROM "locked_daily_plan"
+                            WHERE NOT EXISTS (SELECT FROM "updated_daily_plan")
+                        )
+                        SELECT
+                            "target_user"."user_id",
+                            "target_book"."book_id",
+                            "current_daily_plan"."daily_goal",
+                            "current_daily_plan"."is_submitted",
+                            "current_daily_plan"."progress",
+                            "current_daily_plan"."last_word_id",
+                            "current_daily_plan"."revision",
+                            "current_daily_plan"."last_sequence",
+                            "next_word"."word_id",
+                            "next_word"."spelling",
+                            "next_word"."translation"
+                        FROM (SELECT 1) AS "dummy"
+                        LEFT JOIN "target_user" ON TRUE
+                        LEFT JOIN "target_book" ON TRUE
+                        LEFT JOIN "current_daily_plan" ON TRUE
+                        LEFT JOIN LATERAL (
+                            SELECT "word_id", "spelling", "translation" FROM "word"
+                            WHERE "word"."book_id" = "current_daily_plan"."book_id"
+                            AND "word"."word_id" > "current_daily_plan"."last_word_id"
+                            ORDER BY "word"."word_id"
+                            LIMIT 1
+                        ) AS "next_word" ON TRUE;
                     ''',
                     [
-                        book_name,
+                        user_id,
+                        book_id,
+                        sequence,
+                        sequence,
+                        sequence,
+                        grade,
+                        grade,
+                        grade,
                     ],
                 )
-                book = await cur.fetchone()
-                if book is None:
+                row = await cur.fetchone()
+                assert row is not None
+                if row['user_id'] is None:
+                    raise NotExistsError('user')
+                if row['book_id'] is None:
                     raise NotExistsError('book')
-                cur.row_factory = class_row(DailyPlan)
-                await cur.execute(
+                if row['daily_goal'] is None:
+                    raise NotExistsError('daily plan')
+                word_id = row.pop('word_id')
+                spelling = row.pop('spelling')
+                translation = row.pop('translation')
+                daily_plan = DailyPlan(**row)
+                if word_id is None:
+                    return daily_plan, None
+                return daily_plan, WordRecord(daily_plan.book_id, word_id, spelling, translation)
+
+    async def review_by_user_id_and_book_id(self, user_id: int, book_id: int, reviews: list[DailyPlanReview]):
+        async with self._connection_generator() as conn:
+            async with conn.cursor(row_factory=dict_row) as cur:
+                await statement_registry.execute(
+                    cur,
+                    'daily_plan.review_by_user_id_and_book_id',
                     '''
-                        SELECT * FROM "daily_plan"
-                        WHERE "user_id" = %s
-                        AND "book_id" = %s;
+                        WITH "target_user" AS (
+                            SELECT "user_id" FROM "user"
+                            WHERE "user_id" = %s
+                        ), "target_book" AS (
+                            SELECT "book_id" FROM "book"
+                            WHERE "book_id" = %s
+                        ), "review" AS (
+                            SELECT * FROM unnest(%s::BIGINT[], %s::BIGINT[], %s::BIGINT[])
+                            AS "review"("sequence", "word_id", "grade")
+                        ), "locked_daily_plan" AS (
+                            SELECT "daily_plan".* FROM "daily_plan", "target_user", "target_book"
+                            WHERE "daily_plan"."user_id" = "target_user"."user_id"
+                            AND "daily_plan"."book_id" = "target_book"."book_id"
+                            FOR UPDATE OF "daily_plan"
+                        ), "pending_review" AS (
+                            SELECT "review".* FROM "locked_daily_plan"
+                            JOIN "review" ON "review"."sequence" > "locked_daily_plan"."last_sequence"
+                        ), "latest_review" AS (
+                            SELECT DISTINCT ON ("word_id") * FROM "pending_review"
+                            ORDER BY "word_id", "sequence" DESC
+                        ), "next_word" AS (
+                            SELECT
+                                "locked_daily_plan"."user_id",
+                                "word"."book_id",
+                                "word"."word_id",
+                                "latest_review"."grade",
+                                "latest_review"."word_id" IS NOT NULL AS "is_reviewed",
+                                row_number() OVER (ORDER BY "word"."word_id") AS "position"
+                            FROM "locked_daily_plan"
+                            JOIN LATERAL (
+                                SELECT "book_id", "word_id" FROM "word"
+                                WHERE "word"."book_id" = "locked_daily_plan"."book_id"
+                                AND "word"."word_id" > "locked_daily_plan"."last_word_id"
+                                ORDER BY "word"."word_id"
+                                LIMIT (SELECT COUNT(*) FROM "latest_review")
+                            ) AS "word" ON TRUE
+                            LEFT JOIN "latest_review" ON "latest_review"."word_id" = "word"."word_id"
+                        ), "applied_word" AS (
+                            SELECT "user_id", "book_id", "word_id", "grade" FROM "next_word"
+                            WHERE NOT EXISTS (
+                                SELECT FROM "next_word" AS "gap"
+                                WHERE NOT "gap"."is_reviewed"
+                                AND "gap"."position" < "next_word"."position"
+                            )
+                            AND "is_reviewed"
+                        ), "applied_review" AS (
+                            SELECT
+                                (SELECT COUNT(*) FROM "applied_word") AS "words_count",
+                                (SELECT MAX("word_id") FROM "applied_word") AS "last_word_id",
+                                (SELECT MAX("sequence") FROM "pending_review") AS "last_sequence"
+                        ), "scheduled_review" AS (
+                            INSERT INTO "review_schedule"(
+                                "user_id",
+                                "book_id",
+                                "word_id",
+                                "ease_factor",
+                                "interval_days",
+                                "repetitions",
+                                "due_at",
+                                "last_grade"
+                            )
+                            SELECT
+                                "applied_word"."user_id",
+                                "applied_word"."book_id",
+                                "applied_word"."word_id",
+                                "schedule".*,
+                                "applied_word"."grade"
+                            FROM "applied_word", "schedule_review"(2.5, 0, 0, "applied_word"."grade") AS "schedule"
+                            ON CONFLICT ("user_id", "book_id", "word_id") DO UPDATE
+                            SET ("ease_factor", "interval_days", "repetitions", "due_at") = (
+                                SELECT * FROM "schedule_review"(
+                                    "review_schedule"."ease_factor",
+                                    "review_schedule"."interval_days",
+                                    "review_schedule"."repetitions",
+                                    EXCLUDED."last_grade"
+                                )
+                            ),
+                            "last_grade" = EXCLUDED."last_grade",
+                            "reviewed_at" = now()
+                        ), "updated_daily_plan" AS (
+                            UPDATE "daily_plan"
+                            SET "progress" = "daily_plan"."progress" + "applied_review"."words_count",
+                            "last_word_id" = COALESCE("applied_review"."last_word_id", "daily_plan"."last_word_id"),
+                            "is_submitted" = "daily_plan"."is_submitted" AND "applied_review"."words_count" = 0,
+                            "last_sequence" = "applied_review"."last_sequence"
+                            FROM "locked_daily_plan", "applied_review"
+                            WHERE "daily_plan"."user_id" = "locked_daily_plan"."user_id"
+                            AND "daily_plan"."book_id" = "locked_daily_plan"."book_id"
+                            AND "applied_review"."last_sequence" IS NOT NULL
+                            RETURNING "daily_plan".*
+                        ), "current_daily_plan" AS (
+                            SELECT * FROM "updated_daily_plan"
+                            UNION ALL
+                            SELECT * FROM "locked_daily_plan"
+                            WHERE NOT EXISTS (SELECT FROM "updated_daily_plan")
+                        )
+                        SELECT
+                            "target_user"."user_id",
+                            "target_book"."book_id",
+                            "current_daily_plan"."daily_goal",
+                            "current_daily_plan"."is_submitted",
+                            "current_daily_plan"."progress",
+                            "current_daily_plan"."last_word_id",
+                            "current_daily_plan"."revision",
+                            "current_daily_plan"."last_sequence"
+                        FROM (SELECT 1) AS "dummy"
+                        LEFT JOIN "target_user" ON TRUE
+                        LEFT JOIN "target_book" ON TRUE
+                        LEFT JOIN "current_daily_plan" ON TRUE;
                     ''',
                     [
-                        user.user_id,
-                        book.book_id,
+                        user_id,
+                        book_id,
+                        [review.sequence for review in reviews],
+                        [review.word_id for review in reviews],
+                        [review.grade for review in reviews],
                     ],
                 )
-                daily_plan = await cur.fetchone()
-                if daily_plan is None:
-                    raise NotExistsError('daily plan')
-                if daily_plan.is_submitted:
-                    await cur.execute(
-                        '''
-                            UPDATE "daily_plan"
-                            SET "progress" = "progress" + 1,
-                            "is_submitted" = FALSE
-                            WHERE "user_id" = %s
-                            AND "book_id" = %s
-                            RETURNING *;
-                        ''',
-                        [
-                            user.user_id,
-                            book.book_id,
-                        ],
-                    )
-                else:
-                    await cur.execute(
-                        '''
-                            UPDATE "daily_plan"
-                            SET "is_submitted" = TRUE
-                            WHERE "user_id" = %s
-                            AND "book_id" = %s
-                            RETURNING *;
-                        ''',
-                        [
-                            user.user_id,
-                            book.book_id,
-                        ],
-                    )
-                daily_plan = await cur.fetchone()
-                if daily_plan is None:
+                row = await cur.fetchone()
+                assert row is not None
+                if row['user_id'] is None:
+                    raise NotExistsError('user')
+                if row['book_id'] is None:
+                    raise NotExistsError('book')
+                if row['daily_goal'] is None:
                     raise NotExistsError('daily plan')
-                return daily_plan
+                return DailyPlan(**row)
 
 
-daily_plan_db = DailyPlanDB(connection_pool.connection)
+daily_plan_db = DailyPlanDB(connection)
@@ -0,0 +1,6 @@
+from .baseline import baseline
+from .migration import Migration
+
+migrations: list[Migration] = [
+    baseline,
+]
@@ -0,0 +1,376 @@
+from .migration import Migration
+
+baseline = Migration(
+    1,
+    'baseline',
+    '''
+    CREATE TABLE IF NOT EXISTS "user"(
+        "user_id" BIGSERIAL PRIMARY KEY,
+        "name" TEXT UNIQUE NOT NULL,
+        "hashed_password" TEXT NOT NULL,
+        "is_admin" BOOLEAN DEFAULT FALSE,
+        "nickname" TEXT,
+        "email" TEXT UNIQUE,
+        "phone" TEXT UNIQUE,
+        "time_zone" TEXT NOT NULL DEFAULT 'UTC'
+    );
+
+    ALTER TABLE "user"
+    ADD COLUMN IF NOT EXISTS "time_zone" TEXT NOT NULL DEFAULT 'UTC';
+
+    CREATE SEQUENCE IF NOT EXISTS "book_revision_seq";
+
+    CREATE TABLE IF NOT EXISTS "book"(
+        "book_id" BIGSERIAL PRIMARY KEY,
+        "name" TEXT UNIQUE NOT NULL,
+        "description" TEXT,
+        "words_count" BIGINT DEFAULT 0,
+        "revision" BIGINT NOT NULL DEFAULT nextval('"book_revision_seq"')
+    );
+
+    ALTER TABLE "book"
+    ADD COLUMN IF NOT EXISTS "revision" BIGINT NOT NULL DEFAULT nextval('"book_revision_seq"');
+
+    CREATE OR REPLACE FUNCTION "update_book_revision"()
+    RETURNS TRIGGER
+    LANGUAGE PLPGSQL
+    AS $$
+    BEGIN
+        NEW."revision" := nextval('"book_revision_seq"');
+        RETURN NEW;
+    END
+    $$;
+
+    CREATE OR REPLACE TRIGGER "update_book_revision"
+    BEFORE UPDATE ON "book"
+    FOR EACH ROW EXECUTE PROCEDURE "update_book_revision"();
+
+    DROP TRIGGER IF EXISTS "make_book_seq" ON "book";
+    DROP FUNCTION IF EXISTS "make_book_seq";
+
+    CREATE TABLE IF NOT EXISTS "word"(
+        "book_id" BIGINT NOT NULL REFERENCES "book"("book_id") ON DELETE CASCADE,
+        "word_id" BIGINT NOT NULL,
+        "spelling" TEXT NOT NULL,
+        "translation" TEXT,
+        PRIMARY KEY ("book_id", "word_id")
+    );
+
+    CREATE TABLE IF NOT EXISTS "word_counter"(
+        "book_id" BIGINT PRIMARY KEY REFERENCES "book"("book_id") ON DELETE CASCADE,
+        "last_word_id" BIGINT NOT NULL DEFAULT 0
+    );
+
+    DO $$
+    DECLARE
+        "book_seq" RECORD;
+    BEGIN
+        FOR "book_seq" IN
+            SELECT "sequencename", "last_value" FROM "pg_sequences"
+            WHERE "schemaname" = current_schema()
+            AND "sequencename" ~ '^book_seq_[0-9]+$'
+        LOOP
+            INSERT INTO "word_counter"("book_id", "last_word_id")
+            SELECT "book"."book_id", GREATEST(
+                COALESCE("book_seq"."last_value", 0),
+                COALESCE(MAX("word"."word_id"), 0)
+            )
+            FROM "book"
+            LEFT JOIN "word" ON "word"."book_id" = "book"."book_id"
+            WHERE "book"."book_id" = substring("book_seq"."sequencename" FROM 10)::BIGINT
+            GROUP BY "book"."book_id"
+            ON CONFLICT ("book_id") DO UPDATE
+            SET "last_word_id" = GREATEST("word_counter"."last_word_id", EXCLUDED."last_word_id");
+            EXECUTE format('DROP SEQUENCE IF EXISTS %I', "book_seq"."sequencename");
+        END LOOP;
+    END
+    $$;
+
+    DROP TRIGGER IF EXISTS "fill_in_word_seq" ON "word";
+    DROP FUNCTION IF EXISTS "fill_in_word_seq";
+
+    CREATE OR REPLACE FUNCTION "fill_in_word_id"()
+    RETURNS TRIGGER
+    LANGUAGE PLPGSQL
+    AS $$
+    BEGIN
+        IF NEW."word_id" IS NULL THEN
+            INSERT INTO "word_counter"("book_id", "last_word_id")
+            VALUES (NEW."book_id", 1)
+            ON CONFLICT ("book_id") DO UPDATE
+            SET "last_word_id" = "word_counter"."last_word_id" + 1
+            RETURNING "last_word_id" INTO NEW."word_id";
+        END IF;
+        RETURN NEW;
+    END
+    $$;
+
+    CREATE OR REPLACE TRIGGER "fill_in_word_id"
+    BEFORE INSERT ON "word"
+    FOR EACH ROW EXECUTE PROCEDURE "fill_in_word_id"();
+
+    CREATE OR REPLACE FUNCTION "update_words_count_after_insert"()
+    RETURNS TRIGGER
+    LANGUAGE PLPGSQL
+    AS $$
+    BEGIN
+        UPDATE "book"
+        SET "words_count" = "book"."words_count" + "inserted_word_count"."count"
+        FROM (
+            SELECT "book_id", COUNT(*) AS "count" FROM "inserted_word"
+            GROUP BY "book_id"
+        ) AS "inserted_word_count"
+        WHERE "book"."book_id" = "inserted_word_count"."book_id";
+        RETURN NULL;
+    END
+    $$;
+
+    CREATE OR REPLACE TRIGGER "update_words_count_after_insert"
+    AFTER INSERT ON "word"
+    REFERENCING NEW TABLE AS "inserted_word"
+    FOR EACH STATEMENT EXECUTE PROCEDURE "update_words_count_after_insert"();
+
+    CREATE OR REPLACE FUNCTION "update_words_count_after_delete"()
+    RETURNS TRIGGER
+    LANGUAGE PLPGSQL
+    AS $$
+    BEGIN
+        UPDATE "book"
+        SET "words_count" = "book"."words_count" - "deleted_word_count"."count"
+        FROM (
+            SELECT "book_id", COUNT(*) AS "count" FROM "deleted_word"
+            GROUP BY "book_id"
+        ) AS "deleted_word_count"
+        WHERE "book"."book_id" = "deleted_word_count"."book_id";
+        RETURN NULL;
+    END
+    $$;
+
+    CREATE OR REPLACE TRIGGER "update_words_count_after_delete"
+    AFTER DELETE ON "word"
+    REFERENCING OLD TABLE AS "deleted_word"
+    FOR EACH STATEMENT EXECUTE PROCEDURE "update_words_count_after_delete"();
+
+    CREATE OR REPLACE FUNCTION "update_book_revision_after_update"()
+    RETURNS TRIGGER
+    LANGUAGE PLPGSQL
+    AS $$
+    BEGIN
+        UPDATE "book"
+        SET "revision" = nextval('"book_revision_seq"')
+        WHERE "book_id" IN (
+            SELECT "book_id" FROM "updated_word"
+        );
+        RETURN NULL;
+    END
+    $$;
+
+    CREATE OR REPLACE TRIGGER "update_book_revision_after_update"
+    AFTER UPDATE ON "word"
+    REFERENCING NEW TABLE AS "updated_word"
+    FOR EACH STATEMENT EXECUTE PROCEDURE "update_book_revision_after_update"();
+
+    CREATE SEQUENCE IF NOT EXISTS "daily_plan_revision_seq";
+
+    CREATE TABLE IF NOT EXISTS "daily_plan"(
+        "user_id" BIGINT REFERENCES "user"("user_id") ON DELETE CASCADE,
+        "book_id" BIGINT REFERENCES "book"("book_id") ON DELETE CASCADE,
+        "daily_goal" BIGINT NOT NULL,
+        "is_submitted" BOOLEAN NOT NULL DEFAULT FALSE,
+        "progress" BIGINT NOT NULL DEFAULT 0,
+        "last_word_id" BIGINT NOT NULL DEFAULT 0,
+        "day_start_progress" BIGINT NOT NULL DEFAULT 0,
+        "last_rollover_date" DATE NOT NULL DEFAULT CURRENT_DATE,
+        "revision" BIGINT NOT NULL DEFAULT nextval('"daily_plan_revision_seq"'),
+        "last_sequence" BIGINT NOT NULL DEFAULT 0,
+        PRIMARY KEY ("user_id", "book_id")
+    );
+
+    DO $$
+    BEGIN
+        IF NOT EXISTS (
+            SELECT FROM "information_schema"."columns"
+            WHERE "table_schema" = current_schema()
+            AND "table_name" = 'daily_plan'
+            AND "column_name" = 'last_word_id'
+        ) THEN
+            ALTER TABLE "daily_plan"
+            ADD COLUMN "last_word_id" BIGINT NOT NULL DEFAULT 0;
+
+            UPDATE "daily_plan"
+            SET "last_word_id" = COALESCE(
+                (
+                    SELECT "word"."word_id" FROM "word"
+                    WHERE "word"."book_id" = "daily_plan"."book_id"
+                    ORDER BY "word"."word_id"
+                    LIMIT 1 OFFSET "daily_plan"."progress" - 1
+                ),
+                (
+                    SELECT MAX("word"."word_id") FROM "word"
+                    WHERE "word"."book_id" = "daily_plan"."book_id"
+                ),
+                0
+            )
+            WHERE "progress" > 0;
+        END IF;
+
+        IF NOT EXISTS (
+            SELECT FROM "information_schema"."columns"
+            WHERE "table_schema" = current_schema()
+            AND "table_name" = 'daily_plan'
+            AND "column_name" = 'day_start_progress'
+        ) THEN
+            ALTER TABLE "daily_plan"
+            ADD COLUMN "day_start_progress" BIGINT NOT NULL DEFAULT 0,
+            ADD COLUMN "last_rollover_date" DATE NOT NULL DEFAULT CURRENT_DATE;
+
+            UPDATE "daily_plan"
+            SET "day_start_progress" = "progress";
+        END IF;
+    END
+    $$;
+
+    ALTER TABLE "daily_plan"
+    ADD COLUMN IF NOT EXISTS "revision" BIGINT NOT NULL
+    DEFAULT nextval('"daily_plan_revision_seq"');
+
+    ALTER TABLE "daily_plan"
+    ADD COLUMN IF NOT EXISTS "last_sequence" BIGINT NOT NULL DEFAULT 0;
+
+    CREATE OR REPLACE FUNCTION "update_daily_plan_revision"()
+    RETURNS TRIGGER
+    LANGUAGE PLPGSQL
+    AS $$
+    BEGIN
+        NEW."revision" := nextval('"daily_plan_revision_seq"');
+        RETURN NEW;
+    END
+    $$;
+
+    CREATE OR REPLACE TRIGGER "update_daily_plan_revision"
+    BEFORE UPDATE ON "daily_plan"
+    FOR EACH ROW EXECUTE PROCEDURE "update_daily_plan_revision"();
+
+    CREATE TABLE IF NOT EXISTS "daily_plan_evaluation_detail"(
+        "evaluation_id" BIGSERIAL PRIMARY KEY,
+        "date" TIMESTAMP NOT NULL,
+        "daily_goal" BIGINT NOT NULL,
+        "daily_progress" BIGINT NOT NULL
+    );
+
+    CREATE TABLE IF NOT EXISTS "daily_plan_evaluation"(
+        "user_id" BIGINT NOT NULL REFERENCES "user"("user_id") ON DELETE CASCADE,
+        "book_id" BIGINT NOT NULL REFERENCES "book"("book_id") ON DELETE CASCADE,
+        "evaluation_id" BIGINT NOT NULL
+            REFERENCES "daily_plan_evaluation_detail"("evaluation_id") ON DELETE CASCADE,
+        PRIMARY KEY ("user_id", "book_id", "evaluation_id")
+    );
+
+    DO $$
+    BEGIN
+        IF EXISTS (
+            SELECT FROM "pg_constraint"
+            WHERE "conrelid" = '"daily_plan_evaluation"'::regclass
+            AND "conname" = 'daily_plan_evaluation_user_id_fkey'
+            AND "confdeltype" <> 'c'
+        ) THEN
+            ALTER TABLE "daily_plan_evaluation"
+            DROP CONSTRAINT "daily_plan_evaluation_user_id_fkey",
+            DROP CONSTRAINT "daily_plan_evaluation_book_id_fkey",
+            ADD CONSTRAINT "daily_plan_evaluation_user_id_fkey"
+                FOREIGN KEY ("user_id") REFERENCES "user"("user_id") ON DELETE CASCADE,
+            ADD CONSTRAINT "daily_plan_evaluation_book_id_fkey"
+                FOREIGN KEY ("book_id") REFERENCES "book"("book_id") ON DELETE CASCADE;
+        END IF;
+    END
+    $$;
+
+    CREATE TABLE IF NOT EXISTS "refresh_token"(
+        "token_id" TEXT PRIMARY KEY,
+        "family_id" TEXT NOT NULL,
+        "user_id" BIGINT NOT NULL REFERENCES "user"("user_id") ON DELETE CASCADE,
+        "expires_at" TIMESTAMPTZ NOT NULL,
+        "is_used" BOOLEAN NOT NULL DEFAULT FALSE,
+        "is_revoked" BOOLEAN NOT NULL DEFAULT FALSE
+    );
+
+    CREATE INDEX IF NOT EXISTS "refresh_token_family_id_idx"
+    ON "refresh_token"("family_id");
+
+    CREATE INDEX IF NOT EXISTS "refresh_token_user_id_expires_at_idx"
+    ON "refresh_token"("user_id", "expires_at");
+
+    CREATE TABLE IF NOT EXISTS "review_schedule"(
+        "user_id" BIGINT NOT NULL REFERENCES "user"("user_id") ON DELETE CASCADE,
+        "book_id" BIGINT NOT NULL,
+        "word_id" BIGINT NOT NULL,
+        "ease_factor" DOUBLE PRECISION NOT NULL DEFAULT 2.5,
+        "interval_days" BIGINT NOT NULL DEFAULT 0,
+        "repetitions" BIGINT NOT NULL DEFAULT 0,
+        "last_grade" BIGINT NOT NULL,
+        "due_at" TIMESTAMPTZ NOT NULL,
+        "reviewed_at" TIMESTAMPTZ NOT NULL DEFAULT now(),
+        PRIMARY KEY ("user_id", "book_id", "word_id"),
+        FOREIGN KEY ("book_id", "word_id") REFERENCES "word"("book_id", "word_id") ON DELETE CASCADE
+    );
+
+    CREATE INDEX IF NOT EXISTS "review_schedule_user_id_due_at_idx"
+    ON "review_schedule"("user_id", "due_at");
+
+    CREATE INDEX IF NOT EXISTS "review_schedule_book_id_word_id_idx"
+    ON "review_schedule"("book_id", "word_id");
+
+    CREATE OR REPLACE FUNCTION "schedule_review"(
+        "ease_factor" DOUBLE PRECISION,
+        "interval_days" BIGINT,
+        "repetitions" BIGINT,
+        "grade" BIGINT,
+        OUT "next_ease_factor" DOUBLE PRECISION,
+        OUT "next_interval_days" BIGINT,
+        OUT "next_repetitions" BIGINT,
+        OUT "next_due_at" TIMESTAMPTZ
+    )
+    LANGUAGE PLPGSQL
+    STABLE
+    AS $$
+    BEGIN
+        "next_ease_factor" := GREATEST(
+            1.3,
+            "ease_factor" + 0.1 - (5 - "grade") * (0.08 + (5 - "grade") * 0.02)
+        );
+        IF "grade" < 3 THEN
+            "next_repetitions" := 0;
+            "next_interval_days" := 1;
+        ELSE
+            "next_repetitions" := "repetitions" + 1;
+            "next_interval_days" := CASE "repetitions"
+                WHEN 0 THEN 1
+                WHEN 1 THEN 6
+                ELSE ROUND("interval_days" * "ease_factor")
+            END;
+        END IF;
+        "next_due_at" := now() + "next_interval_days" * INTERVAL '1 day';
+    END
+    $$;
+    ''',
+    '''
+    DROP TABLE IF EXISTS "review_schedule";
+    DROP FUNCTION IF EXISTS "schedule_review";
+    DROP TABLE IF EXISTS "refresh_token";
+    DROP TABLE IF EXISTS "daily_plan_evaluation";
+    DROP TABLE IF EXISTS "daily_plan_evaluation_detail";
+    DROP TABLE IF EXISTS "daily_plan";
+    DROP SEQUENCE IF EXISTS "daily_plan_revision_seq";
+    DROP FUNCTION IF EXISTS "update_daily_plan_revision";
+    DROP TABLE IF EXISTS "word";
+    DROP TABLE IF EXISTS "word_counter";
+    DROP FUNCTION IF EXISTS "fill_in_word_id";
+    DROP FUNCTION IF EXISTS "update_words_count_after_insert";
+    DROP FUNCTION IF EXISTS "update_words_count_after_delete";
+    DROP FUNCTION IF EXISTS "update_book_revision_after_update";
+    DROP TABLE IF EXISTS "book";
+    DROP SEQUENCE IF EXISTS "book_revision_seq";
+    DROP FUNCTION IF EXISTS "update_book_revision";
+    DROP TABLE IF EXISTS "user";
+    ''',
+)
@@ -0,0 +1,152 @@
+from typing import AsyncContextManager, Callable
+
+from psycopg import AsyncConnection
+from psycopg.rows import class_row
+
+from ..model.token import RefreshToken
+from .connection import connection
+from .errors import NotExistsError
+from .statement import statement_registry
+
+
+class RefreshTokenDB:
+    def __init__(self, connection_generator: Callable[..., AsyncContextManager[AsyncConnection]]):
+        self._connection_generator = connection_generator
+
+    async def insert(self, token_id: str, user_id: int, expiration_seconds: int):
+        async with self._connection_generator() as conn:
+            async with conn.cursor(row_factory=class_row(RefreshToken)) as cur:
+                await statement_registry.execute(
+                    cur,
+                    'refresh_token.insert',
+                    '''
+                        WITH "deleted_refresh_token" AS (
+                            DELETE FROM "refresh_token"
+                            WHERE "user_id" = %s
+                            AND "expires_at" < now()
+                        )
+                        INSERT INTO "refresh_token"(
+                            "token_id",
+                            "family_id",
+                            "user_id",
+                            "expires_at"
+                        )
+                        VALUES(
+                            %s,
+                            %s,
+                            %s,
+                            now() + %s * INTERVAL '1 second'
+                        )
+                        RETURNING *;
+                    ''',
+                    [
+                        user_id,
+                        token_id,
+                        token_id,
+                        user_id,
+                        expiration_seconds,
+                    ],
+                )
+                refresh_token = await cur.fetchone()
+                assert refresh_token is not None
+                return refresh_token
+
+    async def rotate_by_token_id_and_user_id(
+        self, token_id: str, user_id: int, new_token_id: str, expiration_seconds: int
+    ):
+        async with self._connection_generator() as conn:
+            async with conn.cursor(row_factory=class_row(RefreshToken)) as cur:
+                await statement_registry.execute(
+                    cur,
+                    'refresh_token.rotate_by_token_id_and_user_id',
+                    '''
+                        WITH "used_refresh_token" AS (
+                            UPDATE "refresh_token"
+                            SET "is_used" = TRUE
+                            WHERE "token_id" = %s
+                            AND "user_id" = %s
+                            AND NOT "is_used"
+                            AND NOT "is_revoked"
+                            AND "expires_at" > now()
+                            RETURNING *
+                        ), "revoked_refresh_token" AS (
+                            UPDATE "refresh_token"
+                            SET "is_revoked" = TRUE
+                            WHERE "family_id" IN (
+                                SELECT "family_id" FROM "refresh_token"
+                                WHERE "token_id" = %s
+                                AND "user_id" = %s
+                                AND "is_used"
+                            )
+                        )
+                        INSERT INTO "refresh_token"(
+                            "token_id",
+                            "family_id",
+                            "user_id",
+                            "expires_at"
+                        )
+                        SELECT
+                            %s,
+                            "family_id",
+                            "user_id",
+                            now() + %s * INTERVAL '1 second'
+                        FROM "used_refresh_token"
+                        RETURNING *;
+                    ''',
+                    [
+                        token_id,
+                        user_id,
+                        token_id,
+                        user_id,
+                        new_token_id,
+                        expiration_seconds,
+                    ],
+                )
+                refresh_token = await cur.fetchone()
+        if refresh_token is None:
+            raise NotExistsError('refresh token')
+        return refresh_token
+
+    async def revoke_by_token_id_and_user_id(self, token_id: str, user_id: int):
+        async with self._connection_generator() as conn:
+            async with conn.cursor() as cur:
+                await statement_registry.execute(
+                    cur,
+                    'refresh_token.revoke_by_token_id_and_user_id',
+                    '''
+                        UPDATE "refresh_token"
+                        SET "is_revoked" = TRUE
+                        WHERE "family_id" IN (
+                            SELECT "family_id" FROM "refresh_token"
+                            WHERE "token_id" = %s
+                            AND "user_id" = %s
+                        );
+                    ''',
+                    [
+                        token_id,
+                        user_id,
+                    ],
+                )
+                return cur.rowcount
+
+    async def revoke_by_user_id(self, user_id: int):
+        async with self._connection_generator() as conn:
+            async with conn.cursor() as cur:
+                await statement_registry.execute(
+                    cur,
+                    'refresh_token.revoke_by_user_id',
+                    '''
+                        UPDATE "refresh_token"
+                        SET "is_revoked" = TRUE
+                        WHERE "user_id" = %s
+                        AND NOT "is_revoked"
+                        AND "expires_at" > now();
+                    ''',
+                    [
+                        user_id,
+                    ],
+                )
+                return cur.rowcount
+
+
+refresh_token_db = RefreshTokenDB(connection)
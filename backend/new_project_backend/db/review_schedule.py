@@ -0,0 +1,87 @@
+from typing import AsyncContextManager, Callable
+
+from psycopg import AsyncConnection
+from psycopg.rows import class_row
+
+from ..model.review import DueWord, Review, ReviewSchedule
+from .connection import connection
+from .statement import statement_registry
+
+
+class ReviewScheduleDB:
+    def __init__(self, connection_generator: Callable[..., AsyncContextManager[AsyncConnection]]):
+        self._connection_generator = connection_generator
+
+    async def query_due_by_user_id(self, user_id: int, count: int):
+        async with self._connection_generator() as conn:
+            async with conn.cursor(row_factory=class_row(DueWord)) as cur:
+                await statement_registry.execute(
+                    cur,
+                    'review_schedule.query_due_by_user_id',
+                    '''
+                        SELECT
+                            "due_review"."book_id",
+                            "due_review"."word_id",
+                            "word"."spelling",
+                            "word"."translation",
+                            "due_review"."due_at"
+                        FROM (
+                            SELECT "book_id", "word_id", "due_at" FROM "review_schedule"
+                            WHERE "user_id" = %s
+                            AND "due_at" <= now()
+                            ORDER BY "due_at"
+                            LIMIT %s
+                        ) AS "due_review"
+                        JOIN "word" ON "word"."book_id" = "due_review"."book_id"
+                        AND "word"."word_id" = "due_review"."word_id"
+                        ORDER BY "due_review"."due_at";
+                    ''',
+                    [
+                        user_id,
+                        count,
+                    ],
+                )
+                due_words = await cur.fetchall()
+                return due_words
+
+    async def review_by_user_id(self, user_id: int, reviews: list[Review]):
+        async with self._connection_generator() as conn:
+            async with conn.cursor(row_factory=class_row(ReviewSchedule)) as cur:
+                await statement_registry.execute(
+                    cur,
+                    'review_schedule.review_by_user_id',
+                    '''
+                        WITH "review" AS (
+                            SELECT * FROM unnest(%s::BIGINT[], %s::BIGINT[], %s::BIGINT[])
+                            AS "review"("book_id", "word_id", "grade")
+                        )
+                        UPDATE "review_schedule"
+                        SET ("ease_factor", "interval_days", "repetitions", "due_at") = (
+                            SELECT * FROM "schedule_review"(
+                                "review_schedule"."ease_factor",
+                                "review_schedule"."interval_days",
+                                "review_schedule"."repetitions",
+                                "review"."grade"
+                            )
+                        ),
+                        "last_grade" = "review"."grade",
+                        "reviewed_at" = now()
+                        FROM "review"
+                        WHERE "review_schedule"."user_id" = %s
+                        AND "review_schedule"."book_id" = "review"."book_id"
+                        AND "review_schedule"."word_id" = "review"."word_id"
+                        AND "review_schedule"."due_at" <= now()
+                        RETURNING "review_schedule".*;
+                    ''',
+                    [
+                        [review.book_id for review in reviews],
+                        [review.word_id for review in reviews],
+                        [review.grade for review in reviews],
+                        user_id,
+                    ],
+                )
+                review_schedules = await cur.fetchall()
+                return review_schedules
+
+
+review_schedule_db = ReviewScheduleDB(connection)
@@ -0,0 +1,136 @@
+from typing import AsyncContextManager, Callable
+
+from psycopg import AsyncConnection
+from psycopg.errors import UndefinedTable
+
+from ..config import SCHEMA_MIGRATION_LOCK_ID
+from .connection import connection
+from .migrations import Migration, migrations
+from .statement import statement_registry
+
+
+class SchemaDB:
+    def __init__(
+        self,
+        connection_generator: Callable[..., AsyncContextManager[AsyncConnection]],
+        schema_migrations: list[Migration],
+    ):
+        self._connection_generator = connection_generator
+        self._migrations = sorted(schema_migrations, key=lambda migration: migration.version)
+
+    @property
+    def latest_version(self):
+        return self._migrations[-1].version if self._migrations else 0
+
+    async def query_version(self):
+        try:
+            async with self._connection_generator() as conn:
+                async with conn.cursor() as cur:
+                    await statement_registry.execute(
+                        cur,
+                        'schema.query_version',
+                        '''
+                            SELECT COALESCE(MAX("version"), 0) FROM "schema_version";
+                        ''',
+                        prepare=False,
+                    )
+                    row = await cur.fetchone()
+                    assert row is not None
+                    return row[0]
+        except UndefinedTable:
+            return 0
+
+    async def migrate(self):
+        if await self.query_version() >= self.latest_version:
+            return []
+        async with self._connection_generator() as conn:
+            async with conn.cursor() as cur:
+                async with conn.pipeline():
+                    await statement_registry.execute(
+                        cur,
+                        'schema.lock',
+                        '''
+                            SELECT pg_advisory_xact_lock(%s);
+                        ''',
+                        [
+                            SCHEMA_MIGRATION_LOCK_ID,
+                        ],
+                        prepare=False,
+                    )
+                    await statement_registry.execute(
+                        cur,
+                        'schema.create_version_table',
+                        '''
+                            CREATE TABLE IF NOT EXISTS "schema_version"(
+                                "version" BIGINT PRIMARY KEY,
+                                "name" TEXT NOT NULL,
+                                "applied_at" TIMESTAMPTZ NOT NULL DEFAULT now()
+                            );
+                        ''',
+                        prepare=False,
+                    )
+                    await statement_registry.execute(
+                        cur,
+                        'schema.query_version',
+                        '''
+                            SELECT COALESCE(MAX("version"), 0) FROM "schema_version";
+                        ''',
+                        prepare=False,
+                    )
+                row = await cur.fetchone()
+                assert row is not None
+                applied_migrations = [migration for migration in self._migrations if migration.version > row[0]]
+                for migration in applied_migrations:
+                    await statement_registry.execute(
+                        cur,
+                        f'schema.upgrade_{migration.version}',
+                        migration.upgrade,
+                        prepare=False,
+                    )
+                    await statement_registry.execute(
+                        cur,
+                        'schema.insert_version',
+                        '''
+                            INSERT INTO "schema_version"("version", "name")
+                            VALUES (%s, %s);
+                        ''',
+                        [
+                            migration.version,
+                            migration.name,
+                        ],
+                        prepare=False,
+                    )
+                return applied_migrations
+
+    async def drop(self):
+        async with self._connection_generator() as conn:
+            async with conn.cursor() as cur:
+                await statement_registry.execute(
+                    cur,
+                    'schema.lock',
+                    '''
+                        SELECT pg_advisory_xact_lock(%s);
+                    ''',
+                    [
+                        SCHEMA_MIGRATION_LOCK_ID,
+                    ],
+                    prepare=False,
+                )
+                for migration in reversed(self._migrations):
+                    await statement_registry.execute(
+                        cur,
+                        f'schema.downgrade_{migration.version}',
+                        migration.downgrade,
+                        prepare=False,
+                    )
+                await statement_registry.execute(
+                    cur,
+                    'schema.drop_version_table',
+                    '''
+                        DROP TABLE IF EXISTS "schema_version";
+                    ''',
+                    prepare=False,
+                )
+
+
+schema_db = SchemaDB(connection, migrations)
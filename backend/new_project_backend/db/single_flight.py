@@ -0,0 +1,75 @@
+import asyncio
+import functools
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar('T')
+
+
+class SingleFlightStats:
+    def __init__(self):
+        self.calls = 0
+        self.flights = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    def dict(self):
+        return {
+            'calls': self.calls,
+            'flights': self.flights,
+            'coalesced': self.coalesced,
+            'errors': self.errors,
+        }
+
+
+class SingleFlight:
+    def __init__(self):
+        self._flights: dict[tuple[str, Hashable], asyncio.Future[Any]] = {}
+        self._stats: dict[str, SingleFlightStats] = {}
+
+    def _finish(self, name: str, key: Hashable, flight: asyncio.Future[Any]):
+        if self._flights.get((name, key)) is flight:
+            del self._flights[(name, key)]
+        if not flight.cancelled() and flight.exception() is not None:
+            self._stats[name].errors += 1
+
+    async def run(self, name: str, key: Hashable, function: Callable[[], Awaitable[T]]) -> T:
+        stats = self._stats.setdefault(name, SingleFlightStats())
+        stats.calls += 1
+        while True:
+            flight = self._flights.get((name, key))
+            if flight is None:
+                break
+            stats.coalesced += 1
+            await asyncio.wait([flight])
+            if not flight.cancelled():
+                return flight.result()
+        stats.flights += 1
+        flight = asyncio.get_running_loop().create_future()
+        self._flights[(name, key)] = flight
+        flight.add_done_callback(functools.partial(self._finish, name, key))
+        try:
+            result = await function()
+        except asyncio.CancelledError:
+            flight.cancel()
+            raise
+        except BaseException as error:
+            flight.set_exception(error)
+            raise
+        flight.set_result(result)
+        return result
+
+    def coalesce(self, name: str):
+        def decorator(method: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+            @functools.wraps(method)
+            async def wrapper(*args: Any, **kwargs: Any) -> T:
+                return await self.run(name, (args, tuple(sorted(kwargs.items()))), lambda: method(*args, **kwargs))
+
+            return wrapper
+
+        return decorator
+
+    def stats(self):
+        return {name: stats.dict() for name, stats in self._stats.items()}
+
+
+single_flight = SingleFlight()
@@ -0,0 +1,90 @@
+from collections import OrderedDict
+from typing import Any, Callable, Iterable, Optional, Sequence, Union
+from weakref import WeakKeyDictionary
+
+from psycopg import AsyncConnection, AsyncCursor, AsyncServerCursor
+
+StatementBuilder = Callable[[tuple[str, ...]], str]
+StatementKey = tuple[str, tuple[str, ...]]
+
+
+class StatementStats:
+    def __init__(self):
+        self.sql_hits = 0
+        self.sql_misses = 0
+        self.connection_cache_hits = 0
+        self.connection_cache_misses = 0
+        self.unprepared = 0
+
+    def dict(self):
+        return {
+            'sql_hits': self.sql_hits,
+            'sql_misses': self.sql_misses,
+            'connection_cache_hits': self.connection_cache_hits,
+            'connection_cache_misses': self.connection_cache_misses,
+            'unprepared': self.unprepared,
+        }
+
+
+class StatementRegistry:
+    def __init__(self):
+        self._statements: dict[StatementKey, str] = {}
+        self._stats: dict[StatementKey, StatementStats] = {}
+        self._prepared: WeakKeyDictionary[AsyncConnection, OrderedDict[StatementKey, None]] = WeakKeyDictionary()
+
+    def get(self, name: str, query: Union[str, StatementBuilder], columns: Iterable[str] = ()):
+        key = (name, tuple(columns))
+        stats = self._stats.setdefault(key, StatementStats())
+        sql = self._statements.get(key)
+        if sql is None:
+            stats.sql_misses += 1
+            sql = query if isinstance(query, str) else query(key[1])
+            self._statements[key] = sql
+        else:
+            stats.sql_hits += 1
+        return key, sql
+
+    def _track_prepared(self, conn: AsyncConnection, key: StatementKey):
+        prepared = self._prepared.setdefault(conn, OrderedDict())
+        if key in prepared:
+            self._stats[key].connection_cache_hits += 1
+            prepared.move_to_end(key)
+            return
+        self._stats[key].connection_cache_misses += 1
+        prepared[key] = None
+        if conn.prepared_max is not None:
+            while len(prepared) > conn.prepared_max:
+                prepared.popitem(last=False)
+
+    async def execute(
+        self,
+        cur: AsyncCursor[Any],
+        name: str,
+        query: Union[str, StatementBuilder],
+        params: Optional[Sequence[Any]] = None,
+        columns: Iterable[str] = (),
+        *,
+        prepare: bool = True,
+    ):
+        key, sql = self.get(name, query, columns)
+        if isinstance(cur, AsyncServerCursor) or not prepare:
+            self._stats[key].unprepared += 1
+            await cur.execute(sql, params)
+            return cur
+        self._track_prepared(cur.connection, key)
+        await cur.execute(sql, params, prepare=True)
+        return cur
+
+    def copy(self, cur: AsyncCursor[Any], name: str, query: str):
+        key, sql = self.get(name, query)
+        self._stats[key].unprepared += 1
+        return cur.copy(sql)
+
+    def stats(self):
+        return {
+            f'{name}({", ".join(columns)})' if columns else name: stats.dict()
+            for (name, columns), stats in self._stats.items()
+        }
+
+
+statement_registry = StatementRegistry()
@@ -5,10 +5,13 @@ from psycopg import AsyncConnection
 from psycopg.errors import UniqueViolation
 from psycopg.rows import class_row
 
+from ..config import USER_CACHE_MAXSIZE, USER_CACHE_TTL
 from ..model.user import AddingUser, EditingUser, User
-from ..utils.password import password_hasher
-from .connection import connection_pool
+from ..utils.cache import TTLCache
+from ..utils.password import password_hasher_pool
+from .connection import connection
 from .errors import DuplicateRecordError, NotExistsError
+from .statement import statement_registry
 
 
 class WrongPasswordError(Exception):
@@ -18,81 +21,54 @@ class WrongPasswordError(Exception):
 class UserDB:
     def __init__(self, connection_generator: Callable[..., AsyncContextManager[AsyncConnection]]):
         self._connection_generator = connection_generator
+        self._user_cache: TTLCache[int, User] = TTLCache(USER_CACHE_MAXSIZE, USER_CACHE_TTL)
 
-    async def create(self):
-        async with self._connection_generator() as conn:
-            async with conn.cursor() as cur:
-                await cur.execute(
-                    '''
-                        CREATE TABLE IF NOT EXISTS "user"(
-                            "user_id" BIGSERIAL PRIMARY KEY,
-                            "name" TEXT UNIQUE NOT NULL,
-                            "hashed_password" TEXT NOT NULL,
-                            "is_admin" BOOLEAN DEFAULT FALSE,
-                            "nickname" TEXT,
-                            "email" TEXT UNIQUE,
-                            "phone" TEXT UNIQUE
-                        );
-                    '''
-                )
-
-    async def drop(self):
-        async with self._connection_generator() as conn:
-            async with conn.cursor() as cur:
-                await cur.execute(
-                    '''
-                        DROP TABLE IF EXISTS "user";
-                    '''
-                )
+    def cache_stats(self):
+        return self._user_cache.stats()
 
     async def insert(self, adding_user: AddingUser):
+        adding_user_dict = adding_user.dict()
+        password = adding_user_dict.pop('password')
+        adding_user_dict['hashed_password'] = await password_hasher_pool.hash(password)
         async with self._connection_generator() as conn:
             async with conn.cursor(row_factory=class_row(User)) as cur:
-                adding_user_dict = adding_user.dict()
-                password = adding_user_dict.pop('password')
-                adding_user_dict['hashed_password'] = password_hasher.hash(password)
                 try:
-                    await cur.execute(
-                        f'''
+                    await statement_registry.execute(
+                        cur,
+                        'user.insert',
+                        lambda columns: f'''
                             INSERT INTO "user"(
-                                {', '.join([f'"{key}"' for key in adding_user_dict.keys()])}
-                            )
-                            VALUES(
-                                {', '.join(['%s'] * len(adding_user_dict))}
+                                "user_id", "is_admin", {', '.join([f'"{key}"' for key in columns])}
                             )
+                            SELECT
+                                "next_user"."user_id", "next_user"."user_id" = 1, {', '.join(['%s'] * len(columns))}
+                            FROM (
+                                SELECT nextval(pg_get_serial_sequence('"user"', 'user_id')) AS "user_id"
+                            ) AS "next_user"
                             RETURNING *;
                         ''',
                         [
                             *adding_user_dict.values(),
                         ],
+                        adding_user_dict.keys(),
                     )
                     user = await cur.fetchone()
                     assert user is not None
-                    if user.user_id == 1:
-                        await cur.execute(
-                            '''
-                                UPDATE "user"
-                                SET "is_admin" = %s
-                                WHERE "user_id" = %s
-                                RETURNING *;
-                            ''',
-                            [
-                                True,
-                                1,
-                            ],
-                        )
-                        user = await cur.fetchone()
-                        assert user is not None
                     return user
                 except UniqueViolation as error:
                     raise DuplicateRecordError() from error
 
     async def update_by_user_id(self, user_id: int, editing_user: EditingUser):
+        editing_user_dict = editing_user.dict(exclude_unset=True)
+        if 'password' in editing_user_dict:
+            password = editing_user_dict.pop('password')
+            editing_user_dict['hashed_password'] = await password_hasher_pool.hash(password)
         async with self._connection_generator() as conn:
             async with conn.cursor(row_factory=class_row(User)) as cur:
-                editing_user_dict = editing_user.dict(exclude_unset=True)
                 if not editing_user_dict:
-                    await cur.execute(
+                    await statement_registry.execute(
+                        cur,
+                        'user.query_by_user_id',
                         '''
                             SELECT * FROM "user"
                             WHERE "user_id" = %s;
@@ -102,14 +78,13 @@ class UserDB:
                         ],
                     )
                 else:
-                    if 'password' in editing_user_dict:
-                        password = editing_user_dict.pop('password')
-                        editing_user_dict['hashed_password'] = password_hasher.hash(password)
                     try:
-                        await cur.execute(
-                            f'''
+                        await statement_registry.execute(
+                            cur,
+                            'user.update_by_user_id',
+                            lambda columns: f'''
                                 UPDATE "user"
-                                SET {', '.join([f'"{key}" = %s' for key in editing_user_dict.keys()])}
+                                SET {', '.join([f'"{key}" = %s' for key in columns])}
                                 WHERE "user_id" = %s
                                 RETURNING *;
                             ''',
@@ -117,20 +92,27 @@ class UserDB:
                                 *editing_user_dict.values(),
                                 user_id,
                             ],
+                            editing_user_dict.keys(),
                         )
                     except UniqueViolation as error:
                         raise DuplicateRecordError() from error
                 user = await cur.fetchone()
                 if user is None:
                     raise NotExistsError('user')
-                return user
+        self._user_cache.delete(user.user_id)
+        return user
 
     async def update_by_name(self, name: str, editing_user: EditingUser):
+        editing_user_dict = editing_user.dict(exclude_unset=True)
+        if 'password' in editing_user_dict:
+            password = editing_user_dict.pop('password')
+            editing_user_dict['hashed_password'] = await password_hasher_pool.hash(password)
         async with self._connection_generator() as conn:
             async with conn.cursor(row_factory=class_row(User)) as cur:
-                editing_user_dict = editing_user.dict(exclude_unset=True)
                 if not editing_user_dict:
-                    await cur.execute(
+                    await statement_registry.execute(
+                        cur,
+                        'user.query_by_name',
                         '''
                             SELECT * FROM "user"
                             WHERE "name" = %s;
@@ -140,14 +122,13 @@ class UserDB:
                         ],
                     )
                 else:
-                    if 'password' in editing_user_dict:
-                        password = editing_user_dict.pop('password')
-                        editing_user_dict['hashed_password'] = password_hasher.hash(password)
                     try:
-                        await cur.execute(
-                            f'''
+                        await statement_registry.execute(
+                            cur,
+                            'user.update_by_name',
+                            lambda columns: f'''
                                 UPDATE "user"
-                                SET {', '.join([f'"{key}" = %s' for key in editing_user_dict.keys()])}
+                                SET {', '.join([f'"{key}" = %s' for key in columns])}
                                 WHERE "name" = %s
                                 RETURNING *;
                             ''',
@@ -155,18 +136,22 @@ class UserDB:
                                 *editing_user_dict.values(),
                                 name,
                             ],
+                            editing_user_dict.keys(),
                         )
                     except UniqueViolation as error:
                         raise DuplicateRecordError() from error
                 user = await cur.fetchone()
                 if user is None:
                     raise NotExistsError('user')
-                return user
+        self._user_cache.delete(user.user_id)
+        return user
 
     async def delete_by_user_id(self, user_id: int):
         async with self._connection_generator() as conn:
             async with conn.cursor(row_factory=class_row(User)) as cur:
-                await cur.execute(
+                await statement_registry.execute(
+                    cur,
+                    'user.delete_by_user_id',
                     '''
                         DELETE FROM "user"
                         WHERE "user_id" = %s
@@ -179,12 +164,15 @@ class UserDB:
                 user = await cur.fetchone()
                 if user is None:
                     raise NotExistsError('user')
-                return user
+        self._user_cache.delete(user.user_id)
+        return user
 
     async def delete_by_name(self, name: str):
         async with self._connection_generator() as conn:
             async with conn.cursor(row_factory=class_row(User)) as cur:
-                await cur.execute(
+                await statement_registry.execute(
+                    cur,
+                    'user.delete_by_name',
                     '''
                         DELETE FROM "user"
                         WHERE "name" = %s
@@ -197,12 +185,15 @@ class UserDB:
                 user = await cur.fetchone()
                 if user is None:
                     raise NotExistsError('user')
-                return user
+        self._user_cache.delete(user.user_id)
+        return user
 
     async def query_by_user_id(self, user_id: int):
         async with self._connection_generator() as conn:
             async with conn.cursor(row_factory=class_row(User)) as cur:
-                await cur.execute(
+                await statement_registry.execute(
+                    cur,
+                    'user.query_by_user_id',
                     '''
                         SELECT * FROM "user"
                         WHERE "user_id" = %s;
@@ -216,10 +207,19 @@ class UserDB:
                     raise NotExistsError('user')
                 return user
 
+    async def query_cached_by_user_id(self, user_id: int):
+        user = self._user_cache.get(user_id)
+        if user is None:
+            user = await self.query_by_user_id(user_id)
+            self._user_cache.set(user_id, user)
+        return user
+
     async def query_by_name(self, name: str):
         async with self._connection_generator() as conn:
             async with conn.cursor(row_factory=class_row(User)) as cur:
-                await cur.execute(
+                await statement_registry.execute(
+                    cur,
+                    'user.query_by_name',
                     '''
                         SELECT * FROM "user"
                         WHERE "name" = %s;
@@ -233,79 +233,41 @@ class UserDB:
                     raise NotExistsError('user')
                 return user
 
-    async def verify_user_id_and_password(self, user_id: int, password: str):
+    async def _verify_password(self, user: User, password: str):
+        try:
+            hashed_password = await password_hasher_pool.verify(user.hashed_password, password)
+        except VerificationError as error:
+            raise WrongPasswordError() from error
+        if hashed_password is None:
+            return user
         async with self._connection_generator() as conn:
             async with conn.cursor(row_factory=class_row(User)) as cur:
-                await cur.execute(
+                await statement_registry.execute(
+                    cur,
+                    'user.update_hashed_password_by_user_id_and_hashed_password',
                     '''
-                        SELECT * FROM "user"
-                        WHERE "user_id" = %s;
+                        UPDATE "user"
+                        SET "hashed_password" = %s
+                        WHERE "user_id" = %s
+                        AND "hashed_password" = %s
+                        RETURNING *;
                     ''',
                     [
-                        user_id,
+                        hashed_password,
+                        user.user_id,
+                        user.hashed_password,
                     ],
                 )
-                user = await cur.fetchone()
-                if user is None:
-                    raise NotExistsError('user')
-                try:
-                    password_hasher.verify(user.hashed_password, password)
-                    if password_hasher.check_needs_rehash(user.hashed_password):
-                        user.hashed_password = password_hasher.hash(password)
-                        await cur.execute(
-                            '''
-                                UPDATE "user"
-                                SET "hashed_password" = %s
-                                WHERE "user_id" = %s
-                                RETURNING *;
-                            ''',
-                            [
-                                user.hashed_password,
-                                user.user_id,
-                            ],
-                        )
-                        user = await cur.fetchone()
-                        assert user is not None
-                    return user
-                except VerificationError as error:
-                    raise WrongPasswordError() from error
+                new_user = await cur.fetchone()
+                return user if new_user is None else new_user
+
+    async def verify_user_id_and_password(self, user_id: int, password: str):
+        user = await self.query_by_user_id(user_id)
+        return await self._verify_password(user, password)
 
     async def verify_name_and_password(self, name: str, password: str):
-        async with self._connection_generator() as conn:
-            async with conn.cursor(row_factory=class_row(User)) as cur:
-                await cur.execute(
-                    '''
-                        SELECT * FROM "user"
-                        WHERE "name" = %s;
-                    ''',
-                    [
-                        name,
-                    ],
-                )
-                user = await cur.fetchone()
-                if user is None:
-                    raise NotExistsError('user')
-                try:
-                    password_hasher.verify(user.hashed_password, password)
-                    if password_hasher.check_needs_rehash(user.hashed_password):
-                        user.hashed_password = password_hasher.hash(password)
-                        await cur.execute(
-                            '''
-                                UPDATE "user"
-                                SET "hashed_password" = %s
-                                WHERE "user_id" = %s
-                                RETURNING *;
-                            ''',
-                            [
-                                user.hashed_password,
-                                user.user_id,
-                            ],
-                        )
-                        user = await cur.fetchone()
-                        assert user is not None
-                    return user
-                except VerificationError as error:
-                    raise WrongPasswordError() from error
+        user = await self.query_by_name(name)
+        return await self._verify_password(user, password)
 
 
-user_db = UserDB(connection_pool.connection)
+user_db = UserDB(connection)
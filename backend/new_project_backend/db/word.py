@@ -1,603 +1,476 @@
-from typing import AsyncContextManager, Callable
+from typing import AsyncContextManager, AsyncIterable, Callable, Union
 
 from psycopg import AsyncConnection
 from psycopg.errors import UniqueViolation
-from psycopg.rows import class_row
+from psycopg.rows import dict_row
 
-from ..model.book import Book
-from ..model.word import AddingWord, EditingWord, Word
-from .connection import connection_pool
+from ..config import (
+    WORD_EXPORT_BATCH_SIZE,
+    WORD_LOAD_BATCH_MAX_SIZE,
+    WORD_LOAD_BATCH_WINDOW,
+)
+from ..model.word import AddingWord, EditingWord, Word, WordRecord
+from .batch_loader import BatchLoader
+from .connection import connection
 from .errors import DuplicateRecordError, NotExistsError
+from .single_flight import single_flight
+from .statement import statement_registry
+
+BIGINT_MIN = -(2**63)
+BIGINT_MAX = 2**63 - 1
 
 
 class WordDB:
     def __init__(self, connection_generator: Callable[..., AsyncContextManager[AsyncConnection]]):
         self._connection_generator = connection_generator
+        self._word_loader: BatchLoader[tuple[int, int], Word] = BatchLoader(
+            self._query_many_by_book_id_and_word_id, WORD_LOAD_BATCH_WINDOW, WORD_LOAD_BATCH_MAX_SIZE
+        )
+        self._next_word_loader: BatchLoader[tuple[int, int], Word] = BatchLoader(
+            self._query_next_many_by_book_id_and_word_id, WORD_LOAD_BATCH_WINDOW, WORD_LOAD_BATCH_MAX_SIZE
+        )
 
-    async def create(self):
-        async with self._connection_generator() as conn:
-            async with conn.cursor() as cur:
-                await cur.execute(
-                    '''
-                        CREATE TABLE IF NOT EXISTS "word"(
-                            "book_id" BIGINT NOT NULL REFERENCES "book"("book_id") ON DELETE CASCADE,
-                            "word_id" BIGINT NOT NULL,
-                            "spelling" TEXT NOT NULL,
-                            "translation" TEXT,
-                            PRIMARY KEY ("book_id", "word_id")
-                        );
-
-                        CREATE OR REPLACE FUNCTION "fill_in_word_seq"()
-                        RETURNS TRIGGER
-                        LANGUAGE PLPGSQL
-                        AS $$
-                        BEGIN
-                            NEW."word_id" := nextval('"book_seq_' || NEW.book_id || '"');
-                            RETURN NEW;
-                        END
-                        $$;
-
-                        CREATE OR REPLACE TRIGGER "fill_in_word_seq"
-                        BEFORE INSERT ON "word"
-                        FOR EACH ROW EXECUTE PROCEDURE "fill_in_word_seq"();
-
-                        CREATE OR REPLACE FUNCTION "update_words_count_after_insert"()
-                        RETURNS TRIGGER
-                        LANGUAGE PLPGSQL
-                        AS $$
-                        BEGIN
-                            UPDATE "book"
-                            SET "words_count" = "words_count" + 1
-                            WHERE "book_id" = NEW."book_id";
-                            RETURN NEW;
-                        END
-                        $$;
-
-                        CREATE OR REPLACE TRIGGER "update_words_count_after_insert"
-                        AFTER INSERT ON "word"
-                        FOR EACH ROW EXECUTE procedure "update_words_count_after_insert"();
-
-                        CREATE OR REPLACE FUNCTION "update_words_count_after_delete"()
-                        RETURNS TRIGGER
-                        LANGUAGE PLPGSQL
-                        AS $$
-                        BEGIN
-                            UPDATE "book"
-                            SET "words_count" = "words_count" - 1
-                            WHERE "book_id" = OLD."book_id";
-                            RETURN OLD;
-                        END
-                        $$;
-
-                        CREATE OR REPLACE TRIGGER "update_words_count_after_delete"
-                        AFTER DELETE ON "word"
-                        FOR EACH ROW EXECUTE procedure "update_words_count_after_delete"();
-                    '''
-                )
-
-    async def drop(self):
-        async with self._connection_generator() as conn:
-            async with conn.cursor() as cur:
-                await cur.execute(
-                    '''
-                        DROP TABLE IF EXISTS "word";
-                        DROP FUNCTION IF EXISTS "fill_in_word_seq";
-                    '''
-                )
+    def loader_stats(self):
+        return {
+            'word': self._word_loader.stats(),
+            'next_word': self._next_word_loader.stats(),
+        }
 
     async def insert_by_book_id(self, book_id: int, adding_word: AddingWord):
         async with self._connection_generator() as conn:
-            async with conn.cursor() as cur:
-                cur.row_factory = class_row(Book)
-                await cur.execute(
-                    '''
-                        SELECT * FROM "book"
-                        WHERE "book_id" = %s;
-                    ''',
-                    [
-                        book_id,
-                    ],
-                )
-                book = await cur.fetchone()
-                if book is None:
-                    raise NotExistsError('book')
-                cur.row_factory = class_row(Word)
+            async with conn.cursor(row_factory=dict_row) as cur:
                 adding_word_dict = adding_word.dict()
                 try:
-                    await cur.execute(
-                        f'''
-                            INSERT INTO word(
-                                book_id,
-                                {', '.join([f'"{key}"' for key in adding_word_dict.keys()])}
-                            )
-                            VALUES(
-                                %s,
-                                {', '.join(['%s'] * len(adding_word_dict))}
+                    await statement_registry.execute(
+                        cur,
+                        'word.insert_by_book_id',
+                        lambda columns: f'''
+                            WITH "target_book" AS (
+                                SELECT "book_id" FROM "book"
+                                WHERE "book_id" = %s
+                            ), "inserted_word" AS (
+                                INSERT INTO "word"(
+                                    "book_id",
+                                    {', '.join([f'"{key}"' for key in columns])}
+                                )
+                                SELECT
+                                    "book_id",
+                                    {', '.join(['%s'] * len(columns))}
+                                FROM "target_book"
+                                RETURNING *
                             )
-                            RETURNING *;
+                            SELECT
+                                "target_book"."book_id",
+                                "inserted_word"."word_id",
+                                "inserted_word"."spelling",
+                                "inserted_word"."translation"
+                            FROM (SELECT 1) AS "dummy"
+                            LEFT JOIN "target_book" ON TRUE
+                            LEFT JOIN "inserted_word" ON TRUE;
                         ''',
                         [
-                            book.book_id,
+                            book_id,
                             *adding_word_dict.values(),
                         ],
+                        adding_word_dict.keys(),
                     )
-                    word = await cur.fetchone()
-                    assert word is not None
-                    return word
                 except UniqueViolation as error:
                     raise DuplicateRecordError() from error
+                row = await cur.fetchone()
+                assert row is not None
+                if row['book_id'] is None:
+                    raise NotExistsError('book')
+                assert row['word_id'] is not None
+                return Word(**row)
 
-    async def insert_by_book_name(self, book_name: str, adding_word: AddingWord):
+    async def import_by_book_name(self, book_name: str, batches: AsyncIterable[list[tuple[int, AddingWord]]]):
         async with self._connection_generator() as conn:
-            async with conn.cursor() as cur:
-                cur.row_factory = class_row(Book)
-                await cur.execute(
-                    '''
-                        SELECT * FROM "book"
-                        WHERE "name" = %s;
-                    ''',
-                    [
-                        book_name,
-                    ],
-                )
-                book = await cur.fetchone()
-                if book is None:
-                    raise NotExistsError('book')
-                cur.row_factory = class_row(Word)
-                adding_word_dict = adding_word.dict()
-                try:
-                    await cur.execute(
-                        f'''
-                            INSERT INTO "word"(
-                                "book_id",
-                                {', '.join([f'"{key}"' for key in adding_word_dict.keys()])}
-                            )
-                            VALUES(
-                                %s,
-                                {', '.join(['%s'] * len(adding_word_dict))}
-                            )
-                            RETURNING *;
+            async with conn.cursor() as cur, conn.cursor() as temporary_table_cur:
+                async with conn.pipeline():
+                    await statement_registry.execute(
+                        cur,
+                        'book.query_book_id_by_name',
+                        '''
+                            SELECT "book_id" FROM "book"
+                            WHERE "name" = %s;
                         ''',
                         [
-                            book.book_id,
-                            *adding_word_dict.values(),
+                            book_name,
                         ],
                     )
-                    word = await cur.fetchone()
-                    assert word is not None
-                    return word
-                except UniqueViolation as error:
-                    raise DuplicateRecordError() from error
-
-    async def update_by_book_id_and_word_id(self, book_id: int, word_id: int, editing_word: EditingWord):
-        async with self._connection_generator() as conn:
-            async with conn.cursor() as cur:
-                cur.row_factory = class_row(Book)
-                await cur.execute(
-                    '''
-                        SELECT * FROM "book"
-                        WHERE "book_id" = %s;
-                    ''',
-                    [
-                        book_id,
-                    ],
-                )
-                book = await cur.fetchone()
-                if book is None:
-                    raise NotExistsError('book')
-                cur.row_factory = class_row(Word)
-                editing_word_dict = editing_word.dict(exclude_unset=True)
-                if not editing_word_dict:
-                    await cur.execute(
+                    await statement_registry.execute(
+                        temporary_table_cur,
+                        'word.create_import_table',
                         '''
-                            SELECT * FROM "word"
-                            WHERE "book_id" = %s
-                            AND "word_id" = %s;
+                            CREATE TEMPORARY TABLE "word_import"(
+                                "line" BIGINT NOT NULL,
+                                "spelling" TEXT NOT NULL,
+                                "translation" TEXT
+                            ) ON COMMIT DROP;
                         ''',
-                        [
-                            book.book_id,
-                            word_id,
-                        ],
+                        prepare=False,
                     )
-                else:
-                    try:
-                        await cur.execute(
-                            f'''
-                                UPDATE "word"
-                                SET {', '.join([f'"{key}" = %s' for key in editing_word_dict.keys()])}
-                                WHERE "book_id" = %s
-                                AND "word_id" = %s
-                                RETURNING *;
-                            ''',
-                            [
-                                *editing_word_dict.values(),
-                                book.book_id,
-                                word_id,
-                            ],
-                        )
-                    except UniqueViolation as error:
-                        raise DuplicateRecordError() from error
-                word = await cur.fetchone()
-                if word is None:
-                    raise NotExistsError('word')
-                return word
-
-    async def update_by_book_name_and_word_id(self, book_name: str, word_id: int, editing_word: EditingWord):
-        async with self._connection_generator() as conn:
-            async with conn.cursor() as cur:
-                cur.row_factory = class_row(Book)
-                await cur.execute(
+                row = await cur.fetchone()
+                if row is None:
+                    raise NotExistsError('book')
+                (book_id,) = row
+                async with statement_registry.copy(
+                    cur,
+                    'word.copy_import_rows',
                     '''
-                        SELECT * FROM "book"
-                        WHERE "name" = %s;
+                        COPY "word_import"("line", "spelling", "translation") FROM STDIN;
+                    ''',
+                ) as copy:
+                    async for batch in batches:
+                        for line, adding_word in batch:
+                            await copy.write_row([line, adding_word.spelling, adding_word.translation])
+                await statement_registry.execute(
+                    cur,
+                    'word.insert_imported_rows',
+                    '''
+                        WITH "import_count" AS (
+                            SELECT COUNT(*) AS "count" FROM "word_import"
+                        ), "reserved_word_id" AS (
+                            INSERT INTO "word_counter"("book_id", "last_word_id")
+                            SELECT %s, "count" FROM "import_count"
+                            ON CONFLICT ("book_id") DO UPDATE
+                            SET "last_word_id" = "word_counter"."last_word_id" + EXCLUDED."last_word_id"
+                            RETURNING "last_word_id"
+                        )
+                        INSERT INTO "word"("book_id", "word_id", "spelling", "translation")
+                        SELECT
+                            %s,
+                            "reserved_word_id"."last_word_id" - "import_count"."count"
+                                + ROW_NUMBER() OVER (ORDER BY "word_import"."line"),
+                            "word_import"."spelling",
+                            "word_import"."translation"
+                        FROM "word_import", "import_count", "reserved_word_id";
                     ''',
                     [
-                        book_name,
+                        book_id,
+                        book_id,
                     ],
                 )
-                book = await cur.fetchone()
-                if book is None:
-                    raise NotExistsError('book')
-                cur.row_factory = class_row(Word)
-                editing_word_dict = editing_word.dict(exclude_unset=True)
-                if not editing_word_dict:
-                    await cur.execute(
-                        '''
-                            SELECT * FROM "word"
-                            WHERE "book_id" = %s
-                            AND "word_id" = %s;
+                return cur.rowcount
+
+    async def update_by_book_id_and_word_id(self, book_id: int, word_id: int, editing_word: EditingWord):
+        editing_word_dict = editing_word.dict(exclude_unset=True)
+        if not editing_word_dict:
+            return await self.query_by_book_id_and_word_id(book_id, word_id)
+        async with self._connection_generator() as conn:
+            async with conn.cursor(row_factory=dict_row) as cur:
+                try:
+                    await statement_registry.execute(
+                        cur,
+                        'word.update_by_book_id_and_word_id',
+                        lambda columns: f'''
+                            WITH "target_book" AS (
+                                SELECT "book_id" FROM "book"
+                                WHERE "book_id" = %s
+                            ), "updated_word" AS (
+                                UPDATE "word"
+                                SET {', '.join([f'"{key}" = %s' for key in columns])}
+                                FROM "target_book"
+                                WHERE "word"."book_id" = "target_book"."book_id"
+                                AND "word"."word_id" = %s
+                                RETURNING "word".*
+                            )
+                            SELECT
+                                "target_book"."book_id",
+                                "updated_word"."word_id",
+                                "updated_word"."spelling",
+                                "updated_word"."translation"
+                            FROM (SELECT 1) AS "dummy"
+                            LEFT JOIN "target_book" ON TRUE
+                            LEFT JOIN "updated_word" ON TRUE;
                         ''',
                         [
-                            book.book_id,
+                            book_id,
+                            *editing_word_dict.values(),
                             word_id,
                         ],
+                        editing_word_dict.keys(),
                     )
-                else:
-                    try:
-                        await cur.execute(
-                            f'''
-                                UPDATE "word"
-                                SET {', '.join([f'"{key}" = %s' for key in editing_word_dict.keys()])}
-                                WHERE "book_id" = %s
-                                AND "word_id" = %s
-                                RETURNING *;
-                            ''',
-                            [
-                                *editing_word_dict.values(),
-                                book.book_id,
-                                word_id,
-                            ],
-                        )
-                    except UniqueViolation as error:
-                        raise DuplicateRecordError() from error
-                word = await cur.fetchone()
-                if word is None:
+                except UniqueViolation as error:
+                    raise DuplicateRecordError() from error
+                row = await cur.fetchone()
+                assert row is not None
+                if row['book_id'] is None:
+                    raise NotExistsError('book')
+                if row['word_id'] is None:
                     raise NotExistsError('word')
-                return word
+                return Word(**row)
 
     async def delete_by_book_id(self, book_id: int):
         async with self._connection_generator() as conn:
-            async with conn.cursor() as cur:
-                cur.row_factory = class_row(Book)
-                await cur.execute(
+            async with conn.cursor(row_factory=dict_row) as cur:
+                await statement_registry.execute(
+                    cur,
+                    'word.delete_by_book_id',
                     '''
-                        SELECT * FROM "book"
-                        WHERE "book_id" = %s;
+                        WITH "target_book" AS (
+                            SELECT "book_id" FROM "book"
+                            WHERE "book_id" = %s
+                        ), "deleted_word" AS (
+                            DELETE FROM "word"
+                            USING "target_book"
+                            WHERE "word"."book_id" = "target_book"."book_id"
+                            RETURNING "word".*
+                        )
+                        SELECT
+                            "target_book"."book_id",
+                            "deleted_word"."word_id",
+                            "deleted_word"."spelling",
+                            "deleted_word"."translation"
+                        FROM (SELECT 1) AS "dummy"
+                        LEFT JOIN "target_book" ON TRUE
+                        LEFT JOIN "deleted_word" ON TRUE;
                     ''',
                     [
                         book_id,
                     ],
                 )
-                book = await cur.fetchone()
-                if book is None:
+                rows = await cur.fetchall()
+                if rows[0]['book_id'] is None:
                     raise NotExistsError('book')
-                cur.row_factory = class_row(Word)
-                await cur.execute(
-                    '''
-                        DELETE FROM "word"
-                        WHERE "book_id" = %s
-                        RETURNING *;
-                    ''',
-                    [
-                        book.book_id,
-                    ],
-                )
-                words = await cur.fetchall()
-                return words
+                return [Word(**row) for row in rows if row['word_id'] is not None]
 
     async def delete_by_book_name(self, book_name: str):
         async with self._connection_generator() as conn:
-            async with conn.cursor() as cur:
-                cur.row_factory = class_row(Book)
-                await cur.execute(
+            async with conn.cursor(row_factory=dict_row) as cur:
+                await statement_registry.execute(
+                    cur,
+                    'word.delete_by_book_name',
                     '''
-                        SELECT * FROM "book"
-                        WHERE "name" = %s;
+                        WITH "target_book" AS (
+                            SELECT "book_id" FROM "book"
+                            WHERE "name" = %s
+                        ), "deleted_word" AS (
+                            DELETE FROM "word"
+                            USING "target_book"
+                            WHERE "word"."book_id" = "target_book"."book_id"
+                            RETURNING "word".*
+                        )
+                        SELECT
+                            "target_book"."book_id",
+                            "deleted_word"."word_id",
+                            "deleted_word"."spelling",
+                            "deleted_word"."translation"
+                        FROM (SELECT 1) AS "dummy"
+                        LEFT JOIN "target_book" ON TRUE
+                        LEFT JOIN "deleted_word" ON TRUE;
                     ''',
                     [
                         book_name,
                     ],
                 )
-                book = await cur.fetchone()
-                if book is None:
+                rows = await cur.fetchall()
+                if rows[0]['book_id'] is None:
                     raise NotExistsError('book')
-                cur.row_factory = class_row(Word)
-                await cur.execute(
-                    '''
-                        DELETE FROM "word"
-                        WHERE "book_id" = %s
-                        RETURNING *;
-                    ''',
-                    [
-                        book.book_id,
-                    ],
-                )
-                words = await cur.fetchall()
-                return words
+                return [Word(**row) for row in rows if row['word_id'] is not None]
 
     async def delete_by_book_id_and_word_id(self, book_id: int, word_id: int):
         async with self._connection_generator() as conn:
-            async with conn.cursor() as cur:
-                cur.row_factory = class_row(Book)
-                await cur.execute(
+            async with conn.cursor(row_factory=dict_row) as cur:
+                await statement_registry.execute(
+                    cur,
+                    'word.delete_by_book_id_and_word_id',
                     '''
-                        SELECT * FROM "book"
-                        WHERE "book_id" = %s;
+                        WITH "target_book" AS (
+                            SELECT "book_id" FROM "book"
+                            WHERE "book_id" = %s
+                        ), "deleted_word" AS (
+                            DELETE FROM "word"
+                            USING "target_book"
+                            WHERE "word"."book_id" = "target_book"."book_id"
+                            AND "word"."word_id" = %s
+                            RETURNING "word".*
+                        )
+                        SELECT
+                            "target_book"."book_id",
+                            "deleted_word"."word_id",
+                            "deleted_word"."spelling",
+                            "deleted_word"."translation"
+                        FROM (SELECT 1) AS "dummy"
+                        LEFT JOIN "target_book" ON TRUE
+                        LEFT JOIN "deleted_word" ON TRUE;
                     ''',
                     [
                         book_id,
-                    ],
-                )
-                book = await cur.fetchone()
-                if book is None:
-                    raise NotExistsError('book')
-                cur.row_factory = class_row(Word)
-                await cur.execute(
-                    '''
-                        DELETE FROM "word"
-                        WHERE "book_id" = %s
-                        AND "word_id" = %s
-                        RETURNING *;
-                    ''',
-                    [
-                        book.book_id,
                         word_id,
                     ],
                 )
-                word = await cur.fetchone()
-                if word is None:
-                    raise NotExistsError('word')
-                return word
-
-    async def delete_by_book_name_and_word_id(self, book_name: str, word_id: int):
-        async with self._connection_generator() as conn:
-            async with conn.cursor() as cur:
-                cur.row_factory = class_row(Book)
-                await cur.execute(
-                    '''
-                        SELECT * FROM "book"
-                        WHERE "name" = %s;
-                    ''',
-                    [
-                        book_name,
-                    ],
-                )
-                book = await cur.fetchone()
-                if book is None:
+                row = await cur.fetchone()
+                assert row is not None
+                if row['book_id'] is None:
                     raise NotExistsError('book')
-                cur.row_factory = class_row(Word)
-                await cur.execute(
-                    '''
-                        DELETE FROM "word"
-                        WHERE "book_id" = %s
-                        AND "word_id" = %s
-                        RETURNING *;
-                    ''',
-                    [
-                        book.book_id,
-                        word_id,
-                    ],
-                )
-                word = await cur.fetchone()
-                if word is None:
+                if row['word_id'] is None:
                     raise NotExistsError('word')
-                return word
+                return Word(**row)
 
+    @single_flight.coalesce('word.query_by_book_id')
     async def query_by_book_id(self, book_id: int):
         async with self._connection_generator() as conn:
             async with conn.cursor() as cur:
-                cur.row_factory = class_row(Book)
-                await cur.execute(
+                await statement_registry.execute(
+                    cur,
+                    'word.query_by_book_id',
                     '''
-                        SELECT * FROM "book"
-                        WHERE "book_id" = %s;
+                        SELECT
+                            "book"."book_id",
+                            "word"."word_id",
+                            "word"."spelling",
+                            "word"."translation"
+                        FROM (SELECT 1) AS "dummy"
+                        LEFT JOIN "book" ON "book"."book_id" = %s
+                        LEFT JOIN "word" ON "word"."book_id" = "book"."book_id"
+                        ORDER BY "word"."word_id";
                     ''',
                     [
                         book_id,
                     ],
                 )
-                book = await cur.fetchone()
-                if book is None:
+                rows = await cur.fetchall()
+                if rows[0][0] is None:
                     raise NotExistsError('book')
-                cur.row_factory = class_row(Word)
-                await cur.execute(
-                    '''
-                        SELECT * FROM "word"
-                        WHERE "book_id" = %s;
-                    ''',
-                    [
-                        book.book_id,
-                    ],
-                )
-                words = await cur.fetchall()
-                return words
+                return [WordRecord(*row) for row in rows if row[1] is not None]
 
-    async def query_by_book_name(self, book_name: str):
+    async def stream_by_book_id(self, book_id: int):
         async with self._connection_generator() as conn:
-            async with conn.cursor() as cur:
-                cur.row_factory = class_row(Book)
-                await cur.execute(
-                    '''
-                        SELECT * FROM "book"
-                        WHERE "name" = %s;
-                    ''',
-                    [
-                        book_name,
-                    ],
-                )
-                book = await cur.fetchone()
-                if book is None:
-                    raise NotExistsError('book')
-                cur.row_factory = class_row(Word)
-                await cur.execute(
+            async with conn.cursor('word_export') as cur:
+                await statement_registry.execute(
+                    cur,
+                    'word.stream_by_book_id',
                     '''
-                        SELECT * FROM "word"
-                        WHERE "book_id" = %s;
+                        SELECT "book_id", "word_id", "spelling", "translation" FROM "word"
+                        WHERE "book_id" = %s
+                        ORDER BY "word_id";
                     ''',
                     [
-                        book.book_id,
+                        book_id,
                     ],
                 )
-                words = await cur.fetchall()
-                return words
+                while rows := await cur.fetchmany(WORD_EXPORT_BATCH_SIZE):
+                    yield rows
 
+    @single_flight.coalesce('word.query_by_book_id_and_word_id')
     async def query_by_book_id_and_word_id(self, book_id: int, word_id: int):
-        async with self._connection_generator() as conn:
-            async with conn.cursor() as cur:
-                cur.row_factory = class_row(Book)
-                await cur.execute(
-                    '''
-                        SELECT * FROM "book"
-                        WHERE "book_id" = %s;
-                    ''',
-                    [
-                        book_id,
-                    ],
-                )
-                book = await cur.fetchone()
-                if book is None:
-                    raise NotExistsError('book')
-                cur.row_factory = class_row(Word)
-                await cur.execute(
-                    '''
-                        SELECT * FROM "word"
-                        WHERE "book_id" = %s
-                        AND "word_id" = %s;
-                    ''',
-                    [
-                        book.book_id,
-                        word_id,
-                    ],
-                )
-                word = await cur.fetchone()
-                if word is None:
-                    raise NotExistsError('word')
-                return word
+        self._check_key(book_id, word_id)
+        return await self._word_loader.load((book_id, word_id))
 
-    async def query_by_book_name_and_word_id(self, book_name: str, word_id: int):
+    async def _query_many_by_book_id_and_word_id(self, keys: list[tuple[int, int]]):
         async with self._connection_generator() as conn:
-            async with conn.cursor() as cur:
-                cur.row_factory = class_row(Book)
-                await cur.execute(
+            async with conn.cursor(row_factory=dict_row) as cur:
+                await statement_registry.execute(
+                    cur,
+                    'word.query_many_by_book_id_and_word_id',
                     '''
-                        SELECT * FROM "book"
-                        WHERE "name" = %s;
+                        SELECT
+                            "book"."book_id",
+                            "word"."word_id",
+                            "word"."spelling",
+                            "word"."translation"
+                        FROM unnest(%s::BIGINT[], %s::BIGINT[]) WITH ORDINALITY AS "key"("book_id", "word_id", "index")
+                        LEFT JOIN "book" ON "book"."book_id" = "key"."book_id"
+                        LEFT JOIN "word" ON "word"."book_id" = "book"."book_id"
+                        AND "word"."word_id" = "key"."word_id"
+                        ORDER BY "key"."index";
                     ''',
                     [
-                        book_name,
+                        [book_id for book_id, _ in keys],
+                        [word_id for _, word_id in keys],
                     ],
                 )
-                book = await cur.fetchone()
-                if book is None:
-                    raise NotExistsError('book')
-                cur.row_factory = class_row(Word)
-                await cur.execute(
-                    '''
-                        SELECT * FROM "word"
-                        WHERE "book_id" = %s
-                        AND "word_id" = %s;
-                    ''',
-                    [
-                        book.book_id,
-                        word_id,
-                    ],
-                )
-                word = await cur.fetchone()
-                if word is None:
-                    raise NotExistsError('word')
-                return word
+                rows = await cur.fetchall()
+                return [self._word_or_error(row) for row in rows]
 
+    @single_flight.coalesce('word.query_by_book_id_and_order')
     async def query_by_book_id_and_order(self, book_id: int, order: int):
         async with self._connection_generator() as conn:
-            async with conn.cursor() as cur:
-                cur.row_factory = class_row(Book)
-                await cur.execute(
+            async with conn.cursor(row_factory=dict_row) as cur:
+                await statement_registry.execute(
+                    cur,
+                    'word.query_by_book_id_and_order',
                     '''
-                        SELECT * FROM "book"
-                        WHERE "book_id" = %s;
+                        SELECT
+                            "book"."book_id",
+                            "word"."word_id",
+                            "word"."spelling",
+                            "word"."translation"
+                        FROM (SELECT 1) AS "dummy"
+                        LEFT JOIN "book" ON "book"."book_id" = %s
+                        LEFT JOIN LATERAL (
+                            SELECT * FROM "word"
+                            WHERE "word"."book_id" = "book"."book_id"
+                            AND %s BETWEEN 0 AND "book"."words_count" - 1
+                            ORDER BY "word"."word_id"
+                            LIMIT 1 OFFSET GREATEST(%s, 0)
+                        ) AS "word" ON TRUE;
                     ''',
                     [
                         book_id,
-                    ],
-                )
-                book = await cur.fetchone()
-                if book is None:
-                    raise NotExistsError('book')
-                if not 0 <= order < book.words_count:
-                    raise NotExistsError('word')
-                cur.row_factory = class_row(Word)
-                await cur.execute(
-                    '''
-                        SELECT * FROM "word"
-                        WHERE "book_id" = %s
-                        ORDER BY "word_id"
-                        LIMIT 1 OFFSET %s;
-                    ''',
-                    [
-                        book.book_id,
+                        order,
                         order,
                     ],
                 )
-                word = await cur.fetchone()
-                if word is None:
+                row = await cur.fetchone()
+                assert row is not None
+                if row['book_id'] is None:
+                    raise NotExistsError('book')
+                if row['word_id'] is None:
                     raise NotExistsError('word')
-                return word
+                return Word(**row)
+
+    @single_flight.coalesce('word.query_next_by_book_id_and_word_id')
+    async def query_next_by_book_id_and_word_id(self, book_id: int, word_id: int):
+        self._check_key(book_id, word_id)
+        return await self._next_word_loader.load((book_id, word_id))
 
-    async def query_by_book_name_and_order(self, book_name: str, order: int):
+    async def _query_next_many_by_book_id_and_word_id(self, keys: list[tuple[int, int]]):
         async with self._connection_generator() as conn:
-            async with conn.cursor() as cur:
-                cur.row_factory = class_row(Book)
-                await cur.execute(
+            async with conn.cursor(row_factory=dict_row) as cur:
+                await statement_registry.execute(
+                    cur,
+                    'word.query_next_many_by_book_id_and_word_id',
                     '''
-                        SELECT * FROM "book"
-                        WHERE "name" = %s;
-                    ''',
-                    [
-                        book_name,
-                    ],
-                )
-                book = await cur.fetchone()
-                if book is None:
-                    raise NotExistsError('book')
-                if not 0 <= order < book.words_count:
-                    raise NotExistsError('word')
-                cur.row_factory = class_row(Word)
-                await cur.execute(
-                    '''
-                        SELECT * FROM "word"
-                        WHERE "book_id" = %s
-                        ORDER BY "word_id"
-                        LIMIT 1 OFFSET %s;
+                        SELECT
+                            "book"."book_id",
+                            "word"."word_id",
+                            "word"."spelling",
+                            "word"."translation"
+                        FROM unnest(%s::BIGINT[], %s::BIGINT[]) WITH ORDINALITY AS "key"("book_id", "word_id", "index")
+                        LEFT JOIN "book" ON "book"."book_id" = "key"."book_id"
+                        LEFT JOIN LATERAL (
+                            SELECT * FROM "word"
+                            WHERE "word"."book_id" = "book"."book_id"
+                            AND "word"."word_id" > "key"."word_id"
+                            ORDER BY "word"."word_id"
+                            LIMIT 1
+                        ) AS "word" ON TRUE
+                        ORDER BY "key"."index";
                     ''',
                     [
-                        book.book_id,
-                        order,
+                        [book_id for book_id, _ in keys],
+                        [word_id for _, word_id in keys],
                     ],
                 )
-                word = await cur.fetchone()
-                if word is None:
-                    raise NotExistsError('word')
-                return word
+                rows = await cur.fetchall()
+                return [self._word_or_error(row) for row in rows]
+
+    @staticmethod
+    def _check_key(book_id: int, word_id: int):
+        if not BIGINT_MIN <= book_id <= BIGINT_MAX:
+            raise NotExistsError('book')
+        if not BIGINT_MIN <= word_id <= BIGINT_MAX:
+            raise NotExistsError('word')
+
+    @staticmethod
+    def _word_or_error(row: dict) -> Union[Word, NotExistsError]:
+        if row['book_id'] is None:
+            return NotExistsError('book')
+        if row['word_id'] is None:
+            return NotExistsError('word')
+        return Word(**row)
 
 
-word_db = WordDB(connection_pool.connection)
+word_db = WordDB(connection)
@@ -0,0 +1,20 @@
+import asyncio
+import logging
+
+from psycopg import Error
+
+from ..config import DAILY_PLAN_ROLLOVER_INTERVAL
+from ..db.daily_plan import daily_plan_db
+
+logger = logging.getLogger(__name__)
+
+
+async def run_daily_plan_rollover():
+    while True:
+        try:
+            rollover_count = await daily_plan_db.rollover()
+            if rollover_count:
+                logger.info('Rolled over %d daily plans', rollover_count)
+        except Error:
+            logger.exception('Failed to roll over daily plans')
+        await asyncio.sleep(DAILY_PLAN_ROLLOVER_INTERVAL)
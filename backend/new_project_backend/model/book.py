@@ -8,6 +8,7 @@ class Book(BaseModel):
     name: str
     description: Optional[str] = None
     words_count: int = 0
+    revision: int = 0
 
 
 class AddingBook(BaseModel):
@@ -1,7 +1,9 @@
 from datetime import datetime
 from typing import Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, validator
+
+from .review import validate_grade
 
 
 class DailyPlan(BaseModel):
@@ -10,6 +12,9 @@ class DailyPlan(BaseModel):
     daily_goal: int
     is_submitted: bool = False
     progress: int = 0
+    last_word_id: int = 0
+    revision: int = 0
+    last_sequence: int = 0
 
 
 class AddingDailyPlan(BaseModel):
@@ -20,6 +25,14 @@ class EditingDailyPlan(BaseModel):
     daily_goal: Optional[int]
 
 
+class DailyPlanReview(BaseModel):
+    sequence: int
+    word_id: int
+    grade: int = 4
+
+    _validate_grade = validator('grade', allow_reuse=True)(validate_grade)
+
+
 class DailyPlanEvaluation(BaseModel):
     evaluation_id: int
     date: datetime
@@ -0,0 +1,40 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, validator
+
+
+def validate_grade(grade: Optional[int]):
+    if grade is None:
+        raise ValueError('grade may not be null')
+    if not 0 <= grade <= 5:
+        raise ValueError('grade must be between 0 and 5')
+    return grade
+
+
+class ReviewSchedule(BaseModel):
+    user_id: int
+    book_id: int
+    word_id: int
+    ease_factor: float
+    interval_days: int
+    repetitions: int
+    last_grade: int
+    due_at: datetime
+    reviewed_at: datetime
+
+
+class DueWord(BaseModel):
+    book_id: int
+    word_id: int
+    spelling: str
+    translation: Optional[str] = None
+    due_at: datetime
+
+
+class Review(BaseModel):
+    book_id: int
+    word_id: int
+    grade: int
+
+    _validate_grade = validator('grade', allow_reuse=True)(validate_grade)
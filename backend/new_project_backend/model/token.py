@@ -0,0 +1,23 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class Token(BaseModel):
+    access_token: str
+    token_type: str = 'bearer'
+    expires_in: int
+    refresh_token: str
+
+
+class RefreshingToken(BaseModel):
+    refresh_token: str
+
+
+class RefreshToken(BaseModel):
+    token_id: str
+    family_id: str
+    user_id: int
+    expires_at: datetime
+    is_used: bool = False
+    is_revoked: bool = False
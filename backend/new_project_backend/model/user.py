@@ -1,6 +1,17 @@
 from typing import Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
-from pydantic import BaseModel
+from pydantic import BaseModel, validator
+
+
+def validate_time_zone(time_zone: Optional[str]):
+    if time_zone is None:
+        raise ValueError('time zone may not be null')
+    try:
+        ZoneInfo(time_zone)
+    except (ZoneInfoNotFoundError, ValueError) as error:
+        raise ValueError(f'unknown time zone {time_zone}') from error
+    return time_zone
 
 
 class UserNoPassword(BaseModel):
@@ -10,6 +21,7 @@ class UserNoPassword(BaseModel):
     nickname: Optional[str] = None
     email: Optional[str] = None
     phone: Optional[str] = None
+    time_zone: str = 'UTC'
 
     @classmethod
     def from_user(cls, user: 'User'):
@@ -26,6 +38,9 @@ class AddingUser(BaseModel):
     nickname: Optional[str] = None
     email: Optional[str] = None
     phone: Optional[str] = None
+    time_zone: str = 'UTC'
+
+    _validate_time_zone = validator('time_zone', allow_reuse=True)(validate_time_zone)
 
 
 class EditingUser(BaseModel):
@@ -34,3 +49,6 @@ class EditingUser(BaseModel):
     nickname: Optional[str] = None
     email: Optional[str] = None
     phone: Optional[str] = None
+    time_zone: Optional[str] = None
+
+    _validate_time_zone = validator('time_zone', allow_reuse=True)(validate_time_zone)
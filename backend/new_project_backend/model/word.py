@@ -1,3 +1,5 @@
+from dataclasses import dataclass
+from enum import Enum
 from typing import Optional
 
 from pydantic import BaseModel
@@ -10,6 +12,14 @@ class Word(BaseModel):
     translation: Optional[str] = None
 
 
+@dataclass(slots=True)
+class WordRecord:
+    book_id: int
+    word_id: int
+    spelling: str
+    translation: Optional[str] = None
+
+
 class AddingWord(BaseModel):
     spelling: str
     translation: Optional[str] = None
@@ -26,3 +36,22 @@ class WordResponce(BaseModel):
     word_id: int
     spelling: str
     translation: Optional[str] = None
+
+
+class WordFormat(str, Enum):
+    CSV = 'csv'
+    TSV = 'tsv'
+    NDJSON = 'ndjson'
+
+
+class WordImportError(BaseModel):
+    line: int
+    detail: str
+
+
+class WordImportResult(BaseModel):
+    inserted_count: int
+    error_count: int
+    errors: list[WordImportError]
+    elapsed_seconds: float
+    rows_per_second: float
@@ -0,0 +1,135 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Generic, Hashable, Optional, TypeVar
+
+K = TypeVar('K', bound=Hashable)
+V = TypeVar('V')
+
+
+class TTLCache(Generic[K, V]):
+    def __init__(self, maxsize: int, ttl: float):
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._items: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: K) -> Optional[V]:
+        item = self._items.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._items[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._items.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: K, value: V, ttl: Optional[float] = None):
+        self._items[key] = (time.monotonic() + (self._ttl if ttl is None else min(ttl, self._ttl)), value)
+        self._items.move_to_end(key)
+        while len(self._items) > self._maxsize:
+            self._items.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: K):
+        if self._items.pop(key, None) is not None:
+            self.invalidations += 1
+
+    def clear(self):
+        self.invalidations += len(self._items)
+        self._items.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._items),
+            'maxsize': self._maxsize,
+            'ttl': self._ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'invalidations': self.invalidations,
+        }
+
+
+class RevalidatingCache(Generic[V]):
+    def __init__(self, load: Callable[[], Awaitable[V]], ttl: float, stale_ttl: float):
+        self._load = load
+        self._ttl = ttl
+        self._stale_ttl = stale_ttl
+        self._value: Optional[V] = None
+        self._loaded_at = 0.0
+        self._generation = 0
+        self._refresh_task: Optional[asyncio.Task[V]] = None
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+
+    async def get(self) -> V:
+        if self._value is not None:
+            age = time.monotonic() - self._loaded_at
+            if age < self._ttl:
+                self.hits += 1
+                return self._value
+            if age < self._stale_ttl:
+                self.stale_hits += 1
+                self._start_refresh()
+                return self._value
+        self.misses += 1
+        return await asyncio.shield(self._start_refresh())
+
+    def _start_refresh(self):
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh())
+            self._refresh_task.add_done_callback(self._on_refresh_done)
+        return self._refresh_task
+
+    async def _refresh(self):
+        generation = self._generation
+        value = await self._load()
+        if generation == self._generation:
+            self._value = value
+            self._loaded_at = time.monotonic()
+        return value
+
+    def _on_refresh_done(self, task: 'asyncio.Task[V]'):
+        self._refresh_task = None
+        self.refreshes += 1
+        if not task.cancelled() and task.exception() is not None:
+            self.refresh_errors += 1
+
+    def update(self, function: Callable[[V], Any]):
+        self._generation += 1
+        if self._value is not None:
+            function(self._value)
+
+    def expire(self):
+        self._generation += 1
+        self._loaded_at = min(self._loaded_at, time.monotonic() - self._ttl)
+
+    def stats(self):
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            'ttl': self._ttl,
+            'stale_ttl': self._stale_ttl,
+            'age': time.monotonic() - self._loaded_at if self._value is not None else None,
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+            'refreshes': self.refreshes,
+            'refresh_errors': self.refresh_errors,
+        }
@@ -0,0 +1,30 @@
+import bisect
+from typing import Sequence
+
+
+class LatencyHistogram:
+    def __init__(self, bounds: Sequence[float]):
+        self._bounds = tuple(sorted(bounds))
+        self._counts = [0] * (len(self._bounds) + 1)
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def observe(self, seconds: float):
+        self._counts[bisect.bisect_left(self._bounds, seconds)] += 1
+        self.count += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+    def stats(self):
+        buckets = {}
+        cumulative_count = 0
+        for bound, count in zip((*map(str, self._bounds), '+Inf'), self._counts):
+            cumulative_count += count
+            buckets[bound] = cumulative_count
+        return {
+            'count': self.count,
+            'average_seconds': self.total_seconds / self.count if self.count else 0.0,
+            'max_seconds': self.max_seconds,
+            'buckets': buckets,
+        }
@@ -1,28 +1,74 @@
+import hashlib
+import time
 from datetime import datetime, timedelta
+from typing import Any
 
 import jwt
 
-from .key import private_key
+from ..config import TOKEN_CACHE_MAXSIZE, TOKEN_CACHE_TTL
+from .cache import TTLCache
+from .key import UnknownKeyError, key_set
+
+token_cache: TTLCache[bytes, tuple[int, int]] = TTLCache(TOKEN_CACHE_MAXSIZE, TOKEN_CACHE_TTL)
 
 
 class InvalidTokenError(Exception):
     pass
 
 
+def encode_token(payload: dict[str, Any]):
+    kid, key = key_set.get_signing_key()
+    return jwt.encode(payload, key, 'EdDSA', headers={'kid': kid})
+
+
+def decode_token(token: str, require: list[str]):
+    try:
+        key = key_set.get_verifying_key(jwt.get_unverified_header(token).get('kid'))
+        return jwt.decode(token, key, ['EdDSA'], options={'require': require})
+    except (jwt.InvalidTokenError, UnknownKeyError) as error:
+        raise InvalidTokenError() from error
+
+
 def create_token(user_id: int, expiration_seconds: int):
     payload = {
-        'sub': user_id,
+        'sub': str(user_id),
+        'exp': datetime.utcnow() + timedelta(seconds=expiration_seconds),
+    }
+    return encode_token(payload)
+
+
+def create_refresh_token(user_id: int, token_id: str, expiration_seconds: int):
+    payload = {
+        'sub': str(user_id),
+        'jti': token_id,
+        'typ': 'refresh',
         'exp': datetime.utcnow() + timedelta(seconds=expiration_seconds),
     }
-    return jwt.encode(payload, private_key.get(), 'EdDSA')
+    return encode_token(payload)
 
 
 def get_user_id_from_token(token: str):
+    digest = hashlib.sha256(token.encode()).digest()
+    version = key_set.get_version()
+    cached = token_cache.get(digest)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    payload = decode_token(token, ['sub', 'exp'])
+    if payload.get('typ') is not None:
+        raise InvalidTokenError()
+    try:
+        user_id = int(payload['sub'])
+    except ValueError as error:
+        raise InvalidTokenError() from error
+    token_cache.set(digest, (version, user_id), payload['exp'] - time.time())
+    return user_id
+
+
+def get_user_id_and_token_id_from_refresh_token(token: str):
+    payload = decode_token(token, ['sub', 'jti', 'typ', 'exp'])
+    if payload['typ'] != 'refresh':
+        raise InvalidTokenError()
     try:
-        payload = jwt.decode(token, private_key.get(), ['EdDSA'], require=['sub', 'exp'])
-        try:
-            return int(payload['sub'])
-        except ValueError as error:
-            raise InvalidTokenError() from error
-    except jwt.InvalidTokenError as error:
+        return int(payload['sub']), str(payload['jti'])
+    except ValueError as error:
         raise InvalidTokenError() from error
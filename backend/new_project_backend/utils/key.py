@@ -1,35 +1,146 @@
+import json
+import os
+import secrets
+import time
 from pathlib import Path
+from typing import Any, Optional, Union
 
-from cryptography.hazmat.primitives import serialization as crypto_serialization
-from cryptography.hazmat.primitives.asymmetric.ed448 import Ed448PrivateKey
+from cryptography.hazmat.primitives.asymmetric.ed448 import (
+    Ed448PrivateKey,
+    Ed448PublicKey,
+)
+from cryptography.hazmat.primitives.asymmetric.ed25519 import (
+    Ed25519PrivateKey,
+    Ed25519PublicKey,
+)
+from jwt.algorithms import OKPAlgorithm
 
-from ..config import PRIVATE_KEY_PATH
+from ..config import KEY_SET_PATH, KEY_SET_RELOAD_INTERVAL
 
+SigningKey = Union[Ed25519PrivateKey, Ed448PrivateKey]
+VerifyingKey = Union[Ed25519PublicKey, Ed448PublicKey]
 
-class PrivateKey:
-    def __init__(self, path: str):
-        self._key = ''
+
+class UnknownKeyError(Exception):
+    pass
+
+
+def generate_jwk():
+    jwk = json.loads(OKPAlgorithm.to_jwk(Ed25519PrivateKey.generate()))
+    jwk['kid'] = secrets.token_urlsafe(12)
+    jwk['key_ops'] = ['sign', 'verify']
+    return jwk
+
+
+def read_jwks(path: Path) -> list[dict[str, Any]]:
+    with path.open('r', encoding='utf-8') as file:
+        return json.load(file)['keys']
+
+
+def write_jwks(path: Path, jwks: list[dict[str, Any]], replace: bool = True):
+    temporary_path = path.with_name(f'.{path.name}.{secrets.token_hex(8)}')
+    with open(temporary_path, 'w', encoding='utf-8', opener=lambda name, flags: os.open(name, flags, 0o600)) as file:
+        json.dump({'keys': jwks}, file, indent=2)
+    try:
+        if replace:
+            os.replace(temporary_path, path)
+        else:
+            os.link(temporary_path, path)
+    finally:
+        temporary_path.unlink(missing_ok=True)
+
+
+def rotate_jwks(path: Path, max_keys: int):
+    jwks = read_jwks(path) if path.exists() else []
+    for jwk in jwks:
+        jwk['key_ops'] = ['verify']
+    jwks = [generate_jwk(), *jwks][:max_keys]
+    write_jwks(path, jwks)
+    return jwks[0]['kid']
+
+
+class KeySet:
+    def __init__(self, path: str, reload_interval: float):
         self._path = Path(path)
+        self._reload_interval = reload_interval
+        self._signing_kid = ''
+        self._signing_key: Optional[SigningKey] = None
+        self._verifying_keys: dict[str, VerifyingKey] = {}
+        self._public_jwks: list[dict[str, Any]] = []
+        self._modified_at = 0
+        self._checked_at = 0.0
+        self.version = 0
 
     def initialize(self):
-        if self._path.exists():
-            with self._path.open('r', encoding='utf-8') as file:
-                self._key = file.read()
-        else:
-            with self._path.open('w', encoding='utf-8') as file:
-                self._key = (
-                    Ed448PrivateKey.generate()
-                    .private_bytes(
-                        encoding=crypto_serialization.Encoding.Raw,
-                        format=crypto_serialization.PrivateFormat.Raw,
-                        encryption_algorithm=crypto_serialization.NoEncryption(),
-                    )
-                    .decode()
-                )
-                file.write(self._key)
-
-    def get(self):
-        return self._key
-
-
-private_key = PrivateKey(PRIVATE_KEY_PATH)
+        if not self._path.exists():
+            try:
+                write_jwks(self._path, [generate_jwk()], replace=False)
+            except FileExistsError:
+                pass
+        self._load()
+
+    def _load(self):
+        modified_at = self._path.stat().st_mtime_ns
+        signing_kid = ''
+        signing_key: Optional[SigningKey] = None
+        verifying_keys: dict[str, VerifyingKey] = {}
+        public_jwks: list[dict[str, Any]] = []
+        for jwk in read_jwks(self._path):
+            key = OKPAlgorithm.from_jwk(jwk)
+            if not isinstance(key, (Ed25519PrivateKey, Ed448PrivateKey)):
+                raise ValueError(f'Key {jwk["kid"]} has no private part')
+            if signing_key is None and 'sign' in jwk.get('key_ops', ['sign']):
+                signing_kid, signing_key = jwk['kid'], key
+            verifying_keys[jwk['kid']] = key.public_key()
+            public_jwks.append(
+                {
+                    **json.loads(OKPAlgorithm.to_jwk(key.public_key())),
+                    'kid': jwk['kid'],
+                    'use': 'sig',
+                    'alg': 'EdDSA',
+                }
+            )
+        if signing_key is None:
+            raise ValueError(f'No signing key in {self._path}')
+        self._signing_kid = signing_kid
+        self._signing_key = signing_key
+        self._verifying_keys = verifying_keys
+        self._public_jwks = public_jwks
+        self._modified_at = modified_at
+        self.version += 1
+
+    def _reload(self, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self._checked_at < self._reload_interval:
+            return
+        self._checked_at = now
+        if self._path.stat().st_mtime_ns != self._modified_at:
+            self._load()
+
+    def get_version(self):
+        self._reload()
+        return self.version
+
+    def get_signing_key(self):
+        self._reload()
+        assert self._signing_key is not None
+        return self._signing_kid, self._signing_key
+
+    def get_verifying_key(self, kid: Optional[str]):
+        self._reload()
+        if kid is None:
+            raise UnknownKeyError()
+        key = self._verifying_keys.get(kid)
+        if key is None:
+            self._reload(force=True)
+            key = self._verifying_keys.get(kid)
+            if key is None:
+                raise UnknownKeyError()
+        return key
+
+    def get_public_jwks(self):
+        self._reload()
+        return {'keys': self._public_jwks}
+
+
+key_set = KeySet(KEY_SET_PATH, KEY_SET_RELOAD_INTERVAL)
@@ -1,3 +1,113 @@
+import asyncio
+import multiprocessing
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
 from argon2 import PasswordHasher
+from argon2.exceptions import VerificationError
+
+from ..config import PASSWORD_HASHER_MAX_PENDING, PASSWORD_HASHER_WORKERS
 
 password_hasher = PasswordHasher()
+
+
+class PasswordHasherBusyError(Exception):
+    pass
+
+
+def hash_password(password: str):
+    return password_hasher.hash(password)
+
+
+def verify_password(hashed_password: str, password: str):
+    password_hasher.verify(hashed_password, password)
+    if password_hasher.check_needs_rehash(hashed_password):
+        return password_hasher.hash(password)
+    return None
+
+
+def ignore_shutdown_signals():
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+
+
+class PasswordHasherPool:
+    def __init__(self, workers: int, max_pending: int):
+        self._workers = workers
+        self._max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.errors = 0
+        self.restarts = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    async def _run(self, function: Callable[..., Any], *args: Any):
+        if self._pending >= self._max_pending:
+            self.rejected += 1
+            raise PasswordHasherBusyError()
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                self._workers, multiprocessing.get_context('spawn'), initializer=ignore_shutdown_signals
+            )
+        executor = self._executor
+        self._pending += 1
+        start_time = time.perf_counter()
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(executor, function, *args)
+        except VerificationError:
+            self._complete(start_time)
+            raise
+        except BrokenProcessPool as error:
+            self.errors += 1
+            if self._executor is executor:
+                self._executor = None
+                self.restarts += 1
+                executor.shutdown(wait=False)
+            raise PasswordHasherBusyError() from error
+        except BaseException:
+            self.errors += 1
+            raise
+        finally:
+            self._pending -= 1
+        self._complete(start_time)
+        return result
+
+    def _complete(self, start_time: float):
+        elapsed_seconds = time.perf_counter() - start_time
+        self.completed += 1
+        self.total_seconds += elapsed_seconds
+        self.max_seconds = max(self.max_seconds, elapsed_seconds)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password)
+
+    async def verify(self, hashed_password: str, password: str) -> Optional[str]:
+        return await self._run(verify_password, hashed_password, password)
+
+    def stats(self):
+        return {
+            'workers': self._workers,
+            'max_pending': self._max_pending,
+            'pending': self._pending,
+            'queued': max(self._pending - self._workers, 0),
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'errors': self.errors,
+            'restarts': self.restarts,
+            'average_seconds': self.total_seconds / self.completed if self.completed else 0.0,
+            'max_seconds': self.max_seconds,
+        }
+
+
+password_hasher_pool = PasswordHasherPool(PASSWORD_HASHER_WORKERS, PASSWORD_HASHER_MAX_PENDING)
@@ -0,0 +1,179 @@
+import codecs
+import csv
+import io
+import json
+from typing import AsyncIterable, Iterable, Optional, Union
+
+from pydantic import ValidationError
+
+from ..config import WORD_IMPORT_BATCH_SIZE, WORD_IMPORT_MAX_ERRORS
+from ..model.word import AddingWord, WordFormat, WordImportError
+
+WORD_COLUMNS = ('spelling', 'translation')
+WORD_ID_COLUMNS = ('book_id', 'word_id')
+WORD_MEDIA_TYPES = {
+    WordFormat.CSV: 'text/csv',
+    WordFormat.TSV: 'text/tab-separated-values',
+    WordFormat.NDJSON: 'application/x-ndjson',
+}
+
+
+class WordFormatError(Exception):
+    pass
+
+
+async def read_lines(chunks: AsyncIterable[bytes]):
+    decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    buffer = ''
+    try:
+        async for chunk in chunks:
+            buffer += decoder.decode(chunk)
+            *lines, buffer = buffer.split('\n')
+            for line in lines:
+                yield line + '\n'
+        buffer += decoder.decode(b'', final=True)
+    except UnicodeDecodeError as error:
+        raise WordFormatError('Invalid UTF-8') from error
+    if buffer:
+        yield buffer
+
+
+async def read_delimited_records(lines: AsyncIterable[str], dialect: str):
+    header: Optional[list[str]] = None
+    record = ''
+    record_line = 0
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        if not record:
+            record_line = line_number
+        record += line
+        if record.count('"') % 2 != 0:
+            continue
+        text, record = record, ''
+        if not text.strip():
+            continue
+        try:
+            fields = next(csv.reader([text], dialect), [])
+        except csv.Error as error:
+            yield record_line, str(error)
+            continue
+        if header is None:
+            header = [field.strip() for field in fields]
+            if 'spelling' not in header:
+                raise WordFormatError('Missing column spelling')
+            for column in header:
+                if column not in WORD_COLUMNS and column not in WORD_ID_COLUMNS:
+                    raise WordFormatError(f'Unknown column {column}')
+            continue
+        if len(fields) != len(header):
+            yield record_line, f'Expected {len(header)} fields, got {len(fields)}'
+            continue
+        yield record_line, {
+            column: field or None for column, field in zip(header, fields) if column not in WORD_ID_COLUMNS
+        }
+    if record:
+        yield record_line, 'Unterminated quoted field'
+
+
+async def read_ndjson_records(lines: AsyncIterable[str]):
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        if not line.strip():
+            continue
+        try:
+            fields = json.loads(line)
+        except ValueError as error:
+            yield line_number, str(error)
+            continue
+        if not isinstance(fields, dict):
+            yield line_number, 'Expected a JSON object'
+            continue
+        yield line_number, fields
+
+
+def find_unstorable_text(adding_word: AddingWord):
+    for column in WORD_COLUMNS:
+        value = getattr(adding_word, column)
+        if value is None:
+            continue
+        if '\x00' in value:
+            return f'{column}: NUL characters are not allowed'
+        try:
+            value.encode()
+        except UnicodeEncodeError:
+            return f'{column}: invalid Unicode characters'
+    return None
+
+
+class WordReader:
+    def __init__(self, chunks: AsyncIterable[bytes], word_format: WordFormat):
+        self._chunks = chunks
+        self._word_format = word_format
+        self.error_count = 0
+        self.errors: list[WordImportError] = []
+
+    def _add_error(self, line: int, detail: str):
+        self.error_count += 1
+        if len(self.errors) < WORD_IMPORT_MAX_ERRORS:
+            self.errors.append(WordImportError(line=line, detail=detail))
+
+    def _read_records(self) -> AsyncIterable[tuple[int, Union[str, dict]]]:
+        lines = read_lines(self._chunks)
+        if self._word_format == WordFormat.CSV:
+            return read_delimited_records(lines, 'excel')
+        if self._word_format == WordFormat.TSV:
+            return read_delimited_records(lines, 'excel-tab')
+        return read_ndjson_records(lines)
+
+    async def batches(self):
+        batch: list[tuple[int, AddingWord]] = []
+        async for line, fields in self._read_records():
+            if isinstance(fields, str):
+                self._add_error(line, fields)
+                continue
+            try:
+                adding_word = AddingWord(**fields)
+            except ValidationError as error:
+                self._add_error(
+                    line,
+                    '; '.join(f'{".".join(map(str, item["loc"]))}: {item["msg"]}' for item in error.errors()),
+                )
+                continue
+            detail = find_unstorable_text(adding_word)
+            if detail is not None:
+                self._add_error(line, detail)
+                continue
+            batch.append((line, adding_word))
+            if len(batch) >= WORD_IMPORT_BATCH_SIZE:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def write_delimited_rows(rows: Iterable[tuple], dialect: str, header: bool = False):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, dialect)
+    if header:
+        writer.writerow([*WORD_ID_COLUMNS, *WORD_COLUMNS])
+    writer.writerows(rows)
+    return buffer.getvalue().encode()
+
+
+def write_ndjson_rows(rows: Iterable[tuple]):
+    return ''.join(
+        json.dumps(dict(zip((*WORD_ID_COLUMNS, *WORD_COLUMNS), row)), ensure_ascii=False) + '\n' for row in rows
+    ).encode()
+
+
+async def write_words(batches: AsyncIterable[list[tuple]], word_format: WordFormat):
+    if word_format == WordFormat.NDJSON:
+        async for rows in batches:
+            yield write_ndjson_rows(rows)
+        return
+    dialect = 'excel' if word_format == WordFormat.CSV else 'excel-tab'
+    yield write_delimited_rows([], dialect, header=True)
+    async for rows in batches:
+        yield write_delimited_rows(rows, dialect)
@@ -1,5 +1,6 @@
 import { AuthContextType } from '../auth/AuthContext';
 import { OAuth2PasswordRequestForm } from '../model/OAuth2PasswordRequestForm';
+import { ITokenResponse } from '../model/Token';
 
 const getLocalStorageToken = () => {
   return localStorage.getItem('token');
@@ -13,6 +14,18 @@ const removeLocalStorageToken = () => {
   localStorage.removeItem('token');
 };
 
+const getLocalStorageRefreshToken = () => {
+  return localStorage.getItem('refreshToken');
+};
+
+const setLocalStorageRefreshToken = (refreshToken: string) => {
+  localStorage.setItem('refreshToken', refreshToken);
+};
+
+const removeLocalStorageRefreshToken = () => {
+  localStorage.removeItem('refreshToken');
+};
+
 const login = async (form: OAuth2PasswordRequestForm, authContext: AuthContextType) => {
   const username = form.username;
   const password = form.password;
@@ -28,17 +41,76 @@ const login = async (form: OAuth2PasswordRequestForm, authContext: AuthContextTy
   if (!res.ok) {
     throw Error(res.statusText);
   }
-  const tokenRes = (await res.json()) as {
-    access_token: string;
-    token_type: string;
-  };
+  const tokenRes = (await res.json()) as ITokenResponse;
   const token = tokenRes.access_token;
-  authContext.setToken(token, rememberMe);
+  authContext.setToken(token, rememberMe, tokenRes.refresh_token);
   return token;
 };
 
+const refreshToken = async (refresh_token: string) => {
+  const res = await fetch('/api/token/refresh', {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+    },
+    body: JSON.stringify({ refresh_token }),
+  });
+  if (!res.ok) {
+    if (res.status == 401) {
+      return null;
+    } else {
+      throw new Error(res.statusText);
+    }
+  }
+  return (await res.json()) as ITokenResponse;
+};
+
+const revokeToken = async (refresh_token: string) => {
+  await fetch('/api/token/revoke', {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+    },
+    body: JSON.stringify({ refresh_token }),
+  });
+};
+
+const fetchWithToken = async (input: string, init: RequestInit, authContext: AuthContextType) => {
+  const send = (token: string | null) => {
+    return fetch(input, {
+      ...init,
+      headers: {
+        ...init.headers,
+        Authorization: `Bearer ${token}`,
+      },
+    });
+  };
+  const res = await send(authContext.token);
+  if (res.status != 401) {
+    return res;
+  }
+  const token = await authContext.refresh();
+  if (token == null) {
+    return res;
+  }
+  return await send(token);
+};
+
 const logout = async (authContext: AuthContextType) => {
+  await authContext.revoke();
   authContext.setToken(null);
 };
 
-export { getLocalStorageToken, login, logout, removeLocalStorageToken, setLocalStorageToken };
+export {
+  fetchWithToken,
+  getLocalStorageRefreshToken,
+  getLocalStorageToken,
+  login,
+  logout,
+  refreshToken,
+  removeLocalStorageRefreshToken,
+  removeLocalStorageToken,
+  revokeToken,
+  setLocalStorageRefreshToken,
+  setLocalStorageToken,
+};
@@ -1,13 +1,9 @@
 import { AuthContextType } from '../auth/AuthContext';
 import { IBook } from '../model/Book';
+import { fetchWithToken } from './Auth';
 
 const queryBookById = async (book_id: number, authContext: AuthContextType) => {
-  const res = await fetch(`/api/book-by-id/${book_id}`, {
-    method: 'GET',
-    headers: {
-      Authorization: `Bearer ${authContext.token}`,
-    },
-  });
+  const res = await fetchWithToken(`/api/book-by-id/${book_id}`, { method: 'GET' }, authContext);
   if (!res.ok) {
     if (res.status == 401) {
       authContext.setToken(null);
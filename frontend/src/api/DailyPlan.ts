@@ -1,14 +1,10 @@
 import { AuthContextType } from '../auth/AuthContext';
 import { IDailyPlan } from '../model/DailyPlan';
 import { IWord } from '../model/Word';
+import { fetchWithToken } from './Auth';
 
 const queryDailyPlans = async (authContext: AuthContextType) => {
-  const res = await fetch('/api/daily-plans', {
-    method: 'GET',
-    headers: {
-      Authorization: `Bearer ${authContext.token}`,
-    },
-  });
+  const res = await fetchWithToken('/api/daily-plans', { method: 'GET' }, authContext);
   if (!res.ok) {
     if (res.status == 401) {
       authContext.setToken(null);
@@ -19,13 +15,20 @@ const queryDailyPlans = async (authContext: AuthContextType) => {
   return (await res.json()) as IDailyPlan[];
 };
 
+const queryDailyPlan = async (book_name: string, authContext: AuthContextType) => {
+  const res = await fetchWithToken(`/api/daily-plan/${book_name}`, { method: 'GET' }, authContext);
+  if (!res.ok) {
+    if (res.status == 401) {
+      authContext.setToken(null);
+    } else {
+      throw new Error(res.statusText);
+    }
+  }
+  return (await res.json()) as IDailyPlan;
+};
+
 const queryDailyPlanWord = async (book_name: string, authContext: AuthContextType) => {
-  const res = await fetch(`/api/daily-plan/${book_name}/word`, {
-    method: 'GET',
-    headers: {
-      Authorization: `Bearer ${authContext.token}`,
-    },
-  });
+  const res = await fetchWithToken(`/api/daily-plan/${book_name}/word`, { method: 'GET' }, authContext);
   if (!res.ok) {
     if (res.status == 401) {
       authContext.setToken(null);
@@ -36,13 +39,14 @@ const queryDailyPlanWord = async (book_name: string, authContext: AuthContextTyp
   return (await res.json()) as IWord;
 };
 
-const submitDailyPlanWord = async (book_name: string, authContext: AuthContextType) => {
-  const res = await fetch(`/api/daily-plan/${book_name}/word`, {
-    method: 'POST',
-    headers: {
-      Authorization: `Bearer ${authContext.token}`,
-    },
-  });
+const submitDailyPlanWord = async (
+  book_name: string,
+  sequence: number,
+  authContext: AuthContextType,
+  grade?: number,
+) => {
+  const query = grade == null ? `?sequence=${sequence}` : `?sequence=${sequence}&grade=${grade}`;
+  const res = await fetchWithToken(`/api/daily-plan/${book_name}/word${query}`, { method: 'POST' }, authContext);
   if (!res.ok) {
     if (res.status == 401) {
       authContext.setToken(null);
@@ -50,7 +54,7 @@ const submitDailyPlanWord = async (book_name: string, authContext: AuthContextTy
       throw new Error(res.statusText);
     }
   }
-  return (await res.json()) as IWord;
+  return (await res.json()) as IWord | null;
 };
 
-export { queryDailyPlans, queryDailyPlanWord, submitDailyPlanWord };
+export { queryDailyPlan, queryDailyPlans, queryDailyPlanWord, submitDailyPlanWord };
@@ -2,7 +2,9 @@ import { createContext } from 'react';
 
 interface AuthContextType {
   token: string | null;
-  setToken: (newToken: string | null, rememberMe?: boolean) => void;
+  setToken: (newToken: string | null, rememberMe?: boolean, newRefreshToken?: string) => void;
+  refresh: () => Promise<string | null>;
+  revoke: () => Promise<void>;
 }
 
 const AuthContext = createContext<AuthContextType>({
@@ -10,6 +12,10 @@ const AuthContext = createContext<AuthContextType>({
   setToken: () => {
     // do nothing;
   },
+  refresh: async () => null,
+  revoke: async () => {
+    // do nothing;
+  },
 });
 
 export { type AuthContextType, AuthContext };
@@ -1,19 +1,67 @@
-import React, { useState } from 'react';
-import { getLocalStorageToken, removeLocalStorageToken, setLocalStorageToken } from '../api/Auth';
+import React, { useRef, useState } from 'react';
+import {
+  getLocalStorageRefreshToken,
+  getLocalStorageToken,
+  refreshToken,
+  removeLocalStorageRefreshToken,
+  removeLocalStorageToken,
+  revokeToken,
+  setLocalStorageRefreshToken,
+  setLocalStorageToken,
+} from '../api/Auth';
 import { AuthContext } from './AuthContext';
 
 const AuthProvider = ({ children }: { children: JSX.Element }) => {
   const [token, setStateToken] = useState(getLocalStorageToken());
+  const refreshTokenRef = useRef(getLocalStorageRefreshToken());
+  const rememberMeRef = useRef(refreshTokenRef.current != null);
+  const refreshingRef = useRef<Promise<string | null> | null>(null);
 
-  const setToken = (newToken: string | null, rememberMe = false) => {
+  const setToken = (newToken: string | null, rememberMe = false, newRefreshToken?: string) => {
     removeLocalStorageToken();
+    removeLocalStorageRefreshToken();
     setStateToken(newToken);
+    refreshTokenRef.current = newToken == null ? null : newRefreshToken ?? null;
+    rememberMeRef.current = rememberMe;
     if (rememberMe && newToken != null) {
       setLocalStorageToken(newToken);
+      if (newRefreshToken != null) {
+        setLocalStorageRefreshToken(newRefreshToken);
+      }
     }
   };
 
-  return <AuthContext.Provider value={{ token, setToken }}>{children}</AuthContext.Provider>;
+  const runRefresh = async () => {
+    const currentRefreshToken = rememberMeRef.current ? getLocalStorageRefreshToken() : refreshTokenRef.current;
+    if (currentRefreshToken == null) {
+      setToken(null);
+      return null;
+    }
+    const tokenRes = await refreshToken(currentRefreshToken);
+    if (tokenRes == null) {
+      setToken(null);
+      return null;
+    }
+    setToken(tokenRes.access_token, rememberMeRef.current, tokenRes.refresh_token);
+    return tokenRes.access_token;
+  };
+
+  const refresh = () => {
+    if (refreshingRef.current == null) {
+      refreshingRef.current = runRefresh().finally(() => {
+        refreshingRef.current = null;
+      });
+    }
+    return refreshingRef.current;
+  };
+
+  const revoke = async () => {
+    if (refreshTokenRef.current != null) {
+      await revokeToken(refreshTokenRef.current);
+    }
+  };
+
+  return <AuthContext.Provider value={{ token, setToken, refresh, revoke }}>{children}</AuthContext.Provider>;
 };
 
 export { AuthProvider };
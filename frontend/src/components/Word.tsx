@@ -1,8 +1,9 @@
 import { CheckOutlined, CloseOutlined, DoubleRightOutlined } from '@ant-design/icons';
 import { Button } from 'antd';
 import React, { ComponentProps, useContext, useEffect, useState } from 'react';
-import { queryDailyPlanWord, submitDailyPlanWord } from '../api/DailyPlan';
+import { queryDailyPlan, queryDailyPlanWord, submitDailyPlanWord } from '../api/DailyPlan';
 import { AuthContext } from '../auth/AuthContext';
+import { IDailyPlan } from '../model/DailyPlan';
 import { IWord } from '../model/Word';
 
 const CheckMarkButton = (props: ComponentProps<typeof Button>) => {
@@ -125,14 +126,11 @@ const NextPageButton = (props: ComponentProps<typeof Button>) => {
 };
 
 interface WordItemProps {
-  bookName: string;
   word: IWord;
-  setRefreshing: (newRefreshing: boolean) => void;
+  submit: (grade?: number) => void;
 }
 
-const NotSubmittedWordItem = ({ bookName, word, setRefreshing }: WordItemProps) => {
-  const authContext = useContext(AuthContext);
-
+const NotSubmittedWordItem = ({ word, submit }: WordItemProps) => {
   return (
     <div
       style={{
@@ -172,14 +170,12 @@ const NotSubmittedWordItem = ({ bookName, word, setRefreshing }: WordItemProps)
       >
         <CheckMarkButton
           onClick={() => {
-            submitDailyPlanWord(bookName, authContext);
-            setRefreshing(true);
+            submit(4);
           }}
         />
         <XMarkButton
           onClick={() => {
-            submitDailyPlanWord(bookName, authContext);
-            setRefreshing(true);
+            submit(1);
           }}
         />
       </div>
@@ -187,9 +183,7 @@ const NotSubmittedWordItem = ({ bookName, word, setRefreshing }: WordItemProps)
   );
 };
 
-const SubmittedWordItem = ({ bookName, word, setRefreshing }: WordItemProps) => {
-  const authContext = useContext(AuthContext);
-
+const SubmittedWordItem = ({ word, submit }: WordItemProps) => {
   return (
     <div
       style={{
@@ -224,8 +218,7 @@ const SubmittedWordItem = ({ bookName, word, setRefreshing }: WordItemProps) =>
       </p>
       <NextPageButton
         onClick={() => {
-          submitDailyPlanWord(bookName, authContext);
-          setRefreshing(true);
+          submit();
         }}
       />
     </div>
@@ -234,24 +227,30 @@ const SubmittedWordItem = ({ bookName, word, setRefreshing }: WordItemProps) =>
 
 const Word = ({ bookName }: { bookName: string }) => {
   const authContext = useContext(AuthContext);
-  const [refreshing, setRefreshing] = useState(false);
-  const [word, setWord] = useState<IWord>();
+  const [dailyPlan, setDailyPlan] = useState<IDailyPlan>();
+  const [word, setWord] = useState<IWord | null>();
 
   useEffect(() => {
-    queryDailyPlanWord(bookName, authContext).then((newWord) => {
-      setWord(newWord);
-      setRefreshing(false);
-    });
-  }, [bookName, authContext, refreshing]);
+    queryDailyPlan(bookName, authContext).then(setDailyPlan);
+    queryDailyPlanWord(bookName, authContext).then(setWord);
+  }, [bookName, authContext]);
 
-  if (word == null) {
+  if (dailyPlan == null || word == null) {
     return <></>;
   }
 
+  const submit = (grade?: number) => {
+    const sequence = dailyPlan.last_sequence + 1;
+    submitDailyPlanWord(bookName, sequence, authContext, grade).then((nextWord) => {
+      setDailyPlan({ ...dailyPlan, last_sequence: sequence });
+      setWord(nextWord);
+    });
+  };
+
   if (!word.is_submitted) {
-    return <NotSubmittedWordItem bookName={bookName} word={word} setRefreshing={setRefreshing} />;
+    return <NotSubmittedWordItem word={word} submit={submit} />;
   } else {
-    return <SubmittedWordItem bookName={bookName} word={word} setRefreshing={setRefreshing} />;
+    return <SubmittedWordItem word={word} submit={submit} />;
   }
 };
 
@@ -3,6 +3,7 @@ interface IBook {
   name: string;
   description: string | null;
   words_count: number;
+  revision: number;
 }
 
 export { type IBook };
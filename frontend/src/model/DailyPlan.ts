@@ -3,6 +3,9 @@ interface IDailyPlan {
   book_id: number;
   daily_goal: number;
   progress: number;
+  last_word_id: number;
+  revision: number;
+  last_sequence: number;
 }
 
 export { type IDailyPlan };
@@ -0,0 +1,8 @@
+interface ITokenResponse {
+  access_token: string;
+  token_type: string;
+  expires_in: number;
+  refresh_token: string;
+}
+
+export { type ITokenResponse };
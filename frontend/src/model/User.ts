@@ -5,6 +5,7 @@ interface IUser {
   nickname: string | null;
   email: string | null;
   phone: string | null;
+  time_zone: string;
 }
 
 export { type IUser };